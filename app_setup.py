@@ -0,0 +1,116 @@
+"""
+Process setup shared by the API (main.py) and the standalone worker (worker.py).
+
+Kept apart from main.py so the worker does not import the FastAPI app, its
+routes and its lifespan.
+"""
+import os
+from functools import partial
+from campaign_planner.utils import (
+    get_category_retriever,
+    get_model_registry,
+    graph_job_handler,
+    close_embedding_cache,
+    StartupOrchestrator,
+    Job,
+    WorkerPool,
+)
+from campaign_planner.utils.jobs import JobHandler
+from campaign_planner.graph import CampaignPlanner
+from campaign_planner.agents.audience_segment_analyzer.fabric import close_fabric_client
+from creative_planner.graph import CreativePlanner
+from creative_planner.agents.mask_generator.inference import (
+    shutdown_mask_executor,
+    warm_up_mask_executor,
+)
+from creative_planner.utils.artifacts import get_artifact_store
+from creative_planner.utils.image_providers import close_image_provider_engine
+from creative_planner.utils.storage import close_storage_backend, get_storage_backend
+
+CAMPAIGN_PIPELINE = "campaign_plan"
+CREATIVE_PIPELINE = "creative_plan"
+
+
+def get_database_url() -> str:
+    return "postgresql://{username}:{password}@{host}:5432/{database_name}".format(
+        host=os.getenv("PGSQL_HOST"),
+        database_name=os.getenv("PGSQL_DATABASE_NAME"),
+        username=os.getenv("PGSQL_USERNAME"),
+        password=os.getenv("PGSQL_PASSWORD"),
+    )
+
+
+def creative_job_handler(config: dict, creative_graph, broker) -> JobHandler:
+    """
+    Run creative plans like any graph job, then drop the request's artifacts.
+
+    The plan state only keeps the uploaded creatives once the graph
+    completes, so the intermediate images are no longer needed. Failed jobs
+    keep theirs for a retry to resume from.
+    """
+    handle_graph = graph_job_handler(creative_graph, broker)
+
+    async def handle(job: Job) -> None:
+        await handle_graph(job)
+        await get_artifact_store(config).adelete_request(job.id)
+
+    return handle
+
+
+def build_worker_pool(
+    config: dict, job_queue, broker, campaign_graph, creative_graph
+) -> WorkerPool:
+    """Create the worker pool that runs queued campaign and creative plans"""
+    pool = WorkerPool(job_queue, config, broker)
+    pool.register(CAMPAIGN_PIPELINE, graph_job_handler(campaign_graph, broker))
+    pool.register(CREATIVE_PIPELINE, creative_job_handler(config, creative_graph, broker))
+    return pool
+
+
+def build_startup(config: dict, include_objective: bool = True) -> StartupOrchestrator:
+    """
+    Register the shared clients and pipeline graphs of a process for concurrent startup.
+
+    The model registry, category retriever, storage backend and mask model
+    are process-wide singletons; they are built first so every graph reuses
+    them. The graphs themselves are independent and compile concurrently.
+    """
+    orchestrator = StartupOrchestrator()
+    orchestrator.add("model_registry", partial(get_model_registry, config))
+    orchestrator.add(
+        "category_index",
+        partial(get_category_retriever, config),
+        depends_on=["model_registry"],
+    )
+    orchestrator.add("storage_backend", partial(get_storage_backend, config), required=False)
+    orchestrator.add("mask_model", partial(warm_up_mask_executor, config))
+    orchestrator.add(
+        CAMPAIGN_PIPELINE,
+        lambda: CampaignPlanner(config).get_compiled_graph(),
+        depends_on=["model_registry", "category_index"],
+    )
+    orchestrator.add(
+        CREATIVE_PIPELINE,
+        lambda: CreativePlanner(config).get_compiled_graph(),
+        depends_on=["model_registry"],
+    )
+    if include_objective:
+        # Only the API serves objective plans
+        from campaign_objective_planner.graph import CampaignObjectiveGraph
+
+        orchestrator.add(
+            "objective_plan",
+            lambda: CampaignObjectiveGraph(config).get_compiled_graph(),
+            depends_on=["model_registry"],
+        )
+    return orchestrator
+
+
+async def close_shared_clients(config: dict) -> None:
+    """Close the process-wide clients built at startup"""
+    await get_model_registry(config).aclose()
+    await close_image_provider_engine()
+    await close_storage_backend()
+    shutdown_mask_executor()
+    close_embedding_cache()
+    close_fabric_client()
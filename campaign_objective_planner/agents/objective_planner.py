@@ -1,9 +1,9 @@
 from typing import Dict, Any, List
 from langchain.prompts import ChatPromptTemplate
-from langchain.chat_models import ChatOpenAI
+from campaign_planner.utils import get_model_registry, get_rate_limiter
 from ..state import  CampaignObjective
 from ..utils.scraper import URLScraper
-import os
+import asyncio
 from dotenv import load_dotenv
 import logging
 from pydantic import BaseModel, Field
@@ -25,12 +25,13 @@ class ObjectiveResponse(BaseModel):
     )
 
 class ObjectivePlannerAgent:
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model="gpt-3.5-turbo",
-            temperature=0,
-            openai_api_key=os.getenv("OPENAI_API_KEY")
+    MODEL_NAME = "gpt-3.5-turbo"
+
+    def __init__(self, config: Dict[str, Any]):
+        self.llm = get_model_registry(config).chat_model(
+            self.MODEL_NAME, temperature=0
         )
+        self.rate_limiter = get_rate_limiter(config, self.MODEL_NAME)
         
         self.scraper = URLScraper()
         
@@ -100,7 +101,7 @@ class ObjectivePlannerAgent:
             'campaign_content': campaign_content
         }
 
-    def process(self, state: Dict) -> Dict:
+    async def process(self, state: Dict) -> Dict:
         """Process the state and determine the campaign objective."""
         try:
             logger.info("Starting objective planner process")
@@ -108,7 +109,8 @@ class ObjectivePlannerAgent:
             
             # Get website and campaign content
             logger.info("Getting content")
-            content = self._analyze_website(
+            content = await asyncio.to_thread(
+                self._analyze_website,
                 state["website_url"],
                 state.get("campaign_url")
             )
@@ -140,7 +142,7 @@ class ObjectivePlannerAgent:
             # Get response from LLM
             logger.info("Invoking LLM")
             try:
-                response = self.llm.invoke(messages)
+                response = await self.rate_limiter.ainvoke(self.llm, messages)
                 logger.info(f"LLM Response: {response}")
                 
                 # Clean up the response content by removing markdown code block
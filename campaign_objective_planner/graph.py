@@ -21,7 +21,7 @@ class CampaignObjectiveGraph:
         self.config = config
         self.graph = None
         self.logger = logging.getLogger(__name__)
-        self.objective_planner = ObjectivePlannerAgent()
+        self.objective_planner = ObjectivePlannerAgent(config)
 
     def _build_graph(self) -> StateGraph:
         """Build the graph structure for campaign objective planning."""
@@ -29,11 +29,11 @@ class CampaignObjectiveGraph:
         graph = StateGraph(State)
 
         # Add the objective planner node
-        def objective_planner(state: Dict) -> Dict:
+        async def objective_planner(state: Dict) -> Dict:
             try:
                 logger.info("Starting objective planner node")
                 logger.info(f"Input state: {state}")
-                result = self.objective_planner.process(state)
+                result = await self.objective_planner.process(state)
                 logger.info(f"Objective planner result: {result}")
                 return result
             except Exception as e:
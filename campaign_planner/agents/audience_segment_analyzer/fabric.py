@@ -0,0 +1,229 @@
+import asyncio
+import os
+import re
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, repeat
+from typing import Any, Dict, Optional
+from azure.identity import ClientSecretCredential
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.elements import TextClause
+from campaign_planner.utils import get_module_logger
+
+logger = get_module_logger()
+
+# Load environment variables for secure credential management
+load_dotenv()
+
+# Fabric connection details
+TENANT_ID = os.getenv("FABRIC_TENANT_ID")
+CLIENT_ID = os.getenv("FABRIC_CLIENT_ID")
+CLIENT_SECRET = os.getenv("FABRIC_CLIENT_SECRET")
+RESOURCE_URL = os.getenv("FABRIC_RESOURCE_URL", "https://database.windows.net/.default")
+SQL_ENDPOINT = os.getenv("FABRIC_SQL_ENDPOINT")
+DATABASE = os.getenv("FABRIC_DATABASE")
+# When set, queries run against this SQLite file instead of Fabric (local runs and tests)
+SQLITE_PATH = os.getenv("FABRIC_SQLITE_PATH")
+
+# Pool tuning
+POOL_SIZE = int(os.getenv("FABRIC_POOL_SIZE", "4"))
+MAX_OVERFLOW = int(os.getenv("FABRIC_MAX_OVERFLOW", "4"))
+# Connections authenticate once, so recycle them well before their token expires
+POOL_RECYCLE_SECONDS = int(os.getenv("FABRIC_POOL_RECYCLE_SECONDS", "1800"))
+TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv("FABRIC_TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+
+SQL_COPT_SS_ACCESS_TOKEN = 1256
+
+# [warehouse].[schema].[table]; SQLite only knows the table
+THREE_PART_NAME = re.compile(r"\[\w+\]\.\[\w+\]\.(\[\w+\])")
+
+
+class FabricTokenProvider:
+    """
+    Caches the AAD access token for the Fabric SQL endpoint.
+
+    The token is refreshed once it is within TOKEN_REFRESH_MARGIN_SECONDS of
+    expiring, so new connections never wait for, or fail on, an expired token.
+    """
+
+    def __init__(self, refresh_margin_seconds: int = TOKEN_REFRESH_MARGIN_SECONDS) -> None:
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self._credential = ClientSecretCredential(
+            tenant_id=TENANT_ID,
+            client_id=CLIENT_ID,
+            client_secret=CLIENT_SECRET,
+        )
+        self._token = None
+        self._lock = threading.Lock()
+
+    def get_token_bytes(self) -> bytes:
+        """Return the current token in the format expected by SQL_COPT_SS_ACCESS_TOKEN"""
+        with self._lock:
+            if (
+                self._token is None
+                or self._token.expires_on - time.time() < self.refresh_margin_seconds
+            ):
+                self._token = self._credential.get_token(RESOURCE_URL)
+                logger.info("Refreshed Fabric access token")
+            token = self._token.token
+
+        token_as_bytes = bytes(token, "UTF-8")
+        encoded_bytes = bytes(chain.from_iterable(zip(token_as_bytes, repeat(0))))
+        return struct.pack("<i", len(encoded_bytes)) + encoded_bytes
+
+
+class BaseFabricClient(ABC):
+    """
+    Runs warehouse queries off the event loop.
+
+    Queries run in a dedicated thread pool the size of the connection pool,
+    so they never block the event loop and never queue for a connection
+    inside a thread. Implementations only provide the engine.
+    """
+
+    engine: Engine
+    executor: ThreadPoolExecutor
+
+    def _fetch_one(self, query: TextClause, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self.engine.connect() as conn:
+            row = conn.execute(query, params).mappings().first()
+        return dict(row) if row is not None else None
+
+    async def fetch_one(
+        self, query: TextClause, params: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Run a query off the event loop and return its first row.
+
+        Args:
+            query (TextClause): Query with bind parameters
+            params (Optional[Dict[str, Any]]): Bind parameter values
+
+        Returns:
+            Optional[Dict[str, Any]]: First row by column name, or None when empty
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self._fetch_one, query, params or {}
+        )
+
+    @abstractmethod
+    def close(self) -> None:
+        """Release the client's connections and threads"""
+        pass
+
+
+class FabricClient(BaseFabricClient):
+    """Long-lived, pooled access to the Fabric SQL endpoint"""
+
+    def __init__(self) -> None:
+        required_vars = {
+            "FABRIC_TENANT_ID": TENANT_ID,
+            "FABRIC_CLIENT_ID": CLIENT_ID,
+            "FABRIC_CLIENT_SECRET": CLIENT_SECRET,
+            "FABRIC_SQL_ENDPOINT": SQL_ENDPOINT,
+            "FABRIC_DATABASE": DATABASE,
+        }
+        missing_vars = [var for var, value in required_vars.items() if not value]
+        if missing_vars:
+            raise ValueError(
+                f"Missing required environment variables: {', '.join(missing_vars)}"
+            )
+
+        self.connection_string = (
+            f"Driver={{ODBC Driver 18 for SQL Server}};"
+            f"Server={SQL_ENDPOINT},1433;"
+            f"Database={DATABASE};"
+            f"Encrypt=Yes;"
+            f"TrustServerCertificate=No"
+        )
+        self.token_provider = FabricTokenProvider()
+        self.engine: Engine = create_engine(
+            "mssql+pyodbc://",
+            creator=self._connect,
+            pool_size=POOL_SIZE,
+            max_overflow=MAX_OVERFLOW,
+            pool_recycle=POOL_RECYCLE_SECONDS,
+            pool_pre_ping=True,
+        )
+        self.executor = ThreadPoolExecutor(
+            max_workers=POOL_SIZE + MAX_OVERFLOW, thread_name_prefix="fabric"
+        )
+        logger.info("Successfully initialized Fabric connection pool")
+
+    def _connect(self):
+        # Imported here so the SQLite client works without the ODBC driver
+        import pyodbc
+
+        return pyodbc.connect(
+            self.connection_string,
+            attrs_before={SQL_COPT_SS_ACCESS_TOKEN: self.token_provider.get_token_bytes()},
+        )
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
+        self.engine.dispose()
+
+
+class SQLiteFabricClient(BaseFabricClient):
+    """
+    Stand-in for FabricClient over a local SQLite file, for tests and local runs.
+
+    The same queries run unchanged, except that three-part
+    [warehouse].[schema].[table] names are reduced to the table name.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): SQLite database file
+        """
+        self.engine = create_engine(f"sqlite:///{path}")
+        event.listen(self.engine, "before_cursor_execute", self._rewrite, retval=True)
+        self.executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="fabric")
+        logger.info(f"Using SQLite Fabric stand-in at {path}")
+
+    @staticmethod
+    def _rewrite(conn, cursor, statement, parameters, context, executemany):
+        return THREE_PART_NAME.sub(r"\1", statement), parameters
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
+        self.engine.dispose()
+
+
+_client: Optional[BaseFabricClient] = None
+_client_lock = threading.Lock()
+
+
+def _get_client() -> BaseFabricClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SQLiteFabricClient(SQLITE_PATH) if SQLITE_PATH else FabricClient()
+        return _client
+
+
+async def get_fabric_client() -> BaseFabricClient:
+    """
+    Get the process-wide Fabric client, creating it off the event loop on first use.
+
+    With FABRIC_SQLITE_PATH set this is a SQLiteFabricClient instead.
+    """
+    if _client is not None:
+        return _client
+    return await asyncio.to_thread(_get_client)
+
+
+def close_fabric_client() -> None:
+    """Close the shared client, if one was created"""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
@@ -0,0 +1,214 @@
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, text
+from campaign_planner.utils import get_module_logger
+from .fabric import BaseFabricClient, get_fabric_client
+
+logger = get_module_logger()
+
+# Objective-level and global maxima change rarely; serve them from memory
+GOALS_CACHE_TTL_SECONDS = float(os.getenv("FABRIC_GOALS_CACHE_TTL_SECONDS", "3600"))
+# Entries older than this are still served but refreshed in the background
+GOALS_REFRESH_AFTER_SECONDS = float(os.getenv("FABRIC_GOALS_REFRESH_AFTER_SECONDS", "2700"))
+
+GOALS_TABLE = "[Gold_WH].[reporting].[merged_ads_final]"
+
+# Goal name -> warehouse column
+GOAL_COLUMNS = {
+    "views": "video_views",
+    "spend": "cost",
+    "impressions": "impressions",
+    "clicks": "clicks",
+    "conversions": "conversions",
+}
+
+ACCOUNT_CONDITION = "account_id IN :account_ids AND campaign_objective = :objective"
+OBJECTIVE_CONDITION = "campaign_objective = :objective"
+
+
+def _select_level(level: str, condition: Optional[str] = None) -> str:
+    """MAX() of every goal column, restricted to rows matching `condition`"""
+    return ",\n".join(
+        f"MAX(CASE WHEN {condition} THEN {column} END) AS {level}_{name}"
+        if condition
+        else f"MAX({column}) AS {level}_{name}"
+        for name, column in GOAL_COLUMNS.items()
+    )
+
+
+# All three levels in one scan, for a cold cache
+ALL_LEVELS_QUERY = text(
+    f"""
+    SELECT {_select_level("account", ACCOUNT_CONDITION)},
+           {_select_level("objective", OBJECTIVE_CONDITION)},
+           {_select_level("global")}
+    FROM {GOALS_TABLE}
+    """
+).bindparams(bindparam("account_ids", expanding=True))
+
+# The cached levels, for a cold cache without account ids and for refreshes
+SHARED_LEVELS_QUERY = text(
+    f"""
+    SELECT {_select_level("objective", OBJECTIVE_CONDITION)},
+           {_select_level("global")}
+    FROM {GOALS_TABLE}
+    """
+)
+
+# The account level alone, for a warm cache
+ACCOUNT_LEVEL_QUERY = text(
+    f"""
+    SELECT {_select_level("account")}
+    FROM {GOALS_TABLE}
+    WHERE {ACCOUNT_CONDITION}
+    """
+).bindparams(bindparam("account_ids", expanding=True))
+
+
+def map_campaign_objective(objective: str) -> str:
+    """Map campaign objectives from enum values to standardized categories"""
+    # Direct mapping from enum values to standardized categories
+    mapping = {
+        "Brand Awareness": "Awareness",
+        "Traffic": "Traffic",
+        "Engagement": "Engagement",
+        "Lead Generation": "Lead Generation",
+        "Shopping": "Sales/Revenue",
+        "Website Conversion": "Conversions",
+        "Video Views": "Video Views",
+        "App Engagement": "Engagement",
+        "App Install": "App Installs"
+    }
+
+    # Return mapped value if it exists, otherwise return "Other"
+    return mapping.get(objective, "Other")
+
+
+def _level_goals(row: Optional[Dict[str, object]], level: str) -> Dict[str, float]:
+    """Non-null goals of one level of a result row"""
+    if not row:
+        return {}
+    goals = {}
+    for name in GOAL_COLUMNS:
+        value = row.get(f"{level}_{name}")
+        if value is not None:
+            goals[name] = float(value)
+    return goals
+
+
+SharedGoals = Dict[str, Dict[str, float]]
+
+
+class GoalsCache:
+    """
+    Objective-level and global goals per mapped objective.
+
+    Stale entries are served while one background task per objective
+    fetches fresh values; expired entries are treated as missing.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = GOALS_CACHE_TTL_SECONDS,
+        refresh_after_seconds: float = GOALS_REFRESH_AFTER_SECONDS,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.refresh_after_seconds = refresh_after_seconds
+        self._entries: Dict[str, Tuple[float, SharedGoals]] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    def get(self, objective: str, client: BaseFabricClient) -> Optional[SharedGoals]:
+        entry = self._entries.get(objective)
+        if entry is None:
+            return None
+        fetched_at, goals = entry
+        age = time.monotonic() - fetched_at
+        if age > self.ttl_seconds:
+            return None
+        if age > self.refresh_after_seconds and objective not in self._refreshing:
+            self._refreshing[objective] = asyncio.create_task(
+                self._refresh(objective, client)
+            )
+        return goals
+
+    def put(self, objective: str, goals: SharedGoals) -> None:
+        self._entries[objective] = (time.monotonic(), goals)
+
+    async def _refresh(self, objective: str, client: BaseFabricClient) -> None:
+        try:
+            row = await client.fetch_one(SHARED_LEVELS_QUERY, {"objective": objective})
+            self.put(objective, _shared_goals(row))
+            logger.info(f"Refreshed cached Fabric goals for {objective}")
+        except Exception as e:
+            logger.error(f"Error refreshing Fabric goals for {objective}: {str(e)}")
+        finally:
+            del self._refreshing[objective]
+
+
+def _shared_goals(row: Optional[Dict[str, object]]) -> SharedGoals:
+    return {
+        "objective": _level_goals(row, "objective"),
+        "global": _level_goals(row, "global"),
+    }
+
+
+goals_cache = GoalsCache()
+
+
+async def get_goals_from_fabric(account_ids: List[str], campaign_objective: str) -> Dict[str, float]:
+    """
+    Get goals from Fabric in cascading manner.
+
+    The most specific non-empty level wins: the given accounts with the
+    objective, then the objective alone, then all campaigns. A cold cache
+    costs one query for all levels; a warm cache costs one query for the
+    account level, or none without account ids.
+    """
+    # Map the campaign objective to standardized category
+    mapped_objective = map_campaign_objective(campaign_objective)
+    client = await get_fabric_client()
+
+    account_goals: Dict[str, float] = {}
+    shared = goals_cache.get(mapped_objective, client)
+    try:
+        if shared is None and account_ids:
+            logger.info("Executing query for all goal levels")
+            row = await client.fetch_one(
+                ALL_LEVELS_QUERY,
+                {"account_ids": list(account_ids), "objective": mapped_objective},
+            )
+            account_goals = _level_goals(row, "account")
+            shared = _shared_goals(row)
+            goals_cache.put(mapped_objective, shared)
+        elif shared is None:
+            logger.info("Executing query for objective and default goals")
+            row = await client.fetch_one(SHARED_LEVELS_QUERY, {"objective": mapped_objective})
+            shared = _shared_goals(row)
+            goals_cache.put(mapped_objective, shared)
+        elif account_ids:
+            logger.info("Executing query with account_ids and campaign_objective")
+            row = await client.fetch_one(
+                ACCOUNT_LEVEL_QUERY,
+                {"account_ids": list(account_ids), "objective": mapped_objective},
+            )
+            account_goals = _level_goals(row, "account")
+    except Exception as e:
+        logger.error(f"Error executing Fabric query: {str(e)}")
+
+    shared = shared or {}
+    levels = [
+        ("account_ids and campaign_objective", account_goals),
+        ("campaign_objective only", shared.get("objective")),
+        ("default without filters", shared.get("global")),
+    ]
+    for description, goals in levels:
+        if goals:
+            logger.info(f"Successfully retrieved goals using {description}")
+            logger.info(f"Retrieved goals from Fabric: {goals}")
+            return goals
+        logger.info(f"No non-null values found for {description}, trying next level")
+
+    logger.warning("No valid goals found in Fabric, skipping goals")
+    return {}
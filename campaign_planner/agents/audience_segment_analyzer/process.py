@@ -24,6 +24,6 @@ class ProcessNode(BaseProcessNode):
 
     async def process(self, state: State, config: RunnableConfig):
         logger.debug(f"{config['configurable']['thread_id']} start")
-        response = await self.agent.ainvoke(state)
+        response = await self._ainvoke_agent(state, config)
         logger.debug(f"{config['configurable']['thread_id']} finish")
         return {"messages": [response]}
@@ -1,10 +1,25 @@
 from abc import ABC, abstractmethod
+import hashlib
 import inspect
+import json
 from pathlib import Path
-from typing import Any, List
-from langchain_core.messages import AnyMessage, AIMessage, HumanMessage
+from typing import Any, Dict, List, Optional
+from langchain_core.messages import (
+    AnyMessage,
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.runnables import Runnable, RunnableBinding
 from langchain.prompts import load_prompt, PromptTemplate
-from campaign_planner.utils import get_module_logger, Generator
+from campaign_planner.utils import (
+    get_module_logger,
+    Generator,
+    metrics,
+    get_rate_limiter,
+)
 from langchain_core.runnables.config import RunnableConfig
 
 logger = get_module_logger()
@@ -20,12 +35,15 @@ class BaseProcessNode(ABC):
 
     The class handles:
     - Loading and managing prompt templates from YAML files
-    - Interfacing with language models
+    - Interfacing with language models, through the shared rate limiter and
+      the LLM response cache when one is configured
     - Processing conversation messages
 
     Attributes:
         llm (ChatOpenAI): Language model instance for generating responses
         prompt (str): Loaded prompt template from YAML file
+        llm_cache (Optional[BaseLLMCache]): Shared response cache from config["llm_cache"]
+        agent_name (str): Name of the agent package, used for cache opt-out and metrics
     """
 
     def __init__(
@@ -49,8 +67,11 @@ class BaseProcessNode(ABC):
         if not prompt_file_path.exists():
             raise FileNotFoundError(f"Prompt file not found: {prompt_file_path}")
 
+        self.config = config
         self.llm = Generator(config).get_model(name=model_name)
         self.prompt = self._load_prompt(prompt_file_path)
+        self.agent_name = module_path.parent.name
+        self.llm_cache = config.get("llm_cache")
 
     @staticmethod
     def _load_prompt(prompt_file: Path) -> PromptTemplate:
@@ -92,6 +113,115 @@ class BaseProcessNode(ABC):
         """
         raise NotImplementedError("This method must be implemented in a subclass.")
 
+    async def _ainvoke_agent(
+        self,
+        inputs: Dict[str, Any],
+        config: RunnableConfig,
+        agent: Optional[Runnable] = None,
+    ) -> BaseMessage:
+        """
+        Run `self.agent` (prompt | llm), answering from the LLM cache when possible.
+
+        Args:
+            inputs (Dict[str, Any]): Prompt variables, usually the graph state
+            config (RunnableConfig): Node configuration
+            agent (Optional[Runnable]): Chain to run instead of `self.agent`, for
+                nodes that bind per-call parameters to the model
+
+        Returns:
+            BaseMessage: The model response
+        """
+        agent = agent or self.agent
+        if self.llm_cache is None or not self.llm_cache.enabled_for(self.agent_name):
+            return await self._call_agent(inputs, agent)
+
+        thread_id = config["configurable"]["thread_id"]
+        key = self._cache_key(inputs, agent)
+        try:
+            cached = await self.llm_cache.aget(key)
+        except Exception as e:
+            logger.warning(f"{thread_id} LLM cache read failed: {str(e)}")
+            cached = None
+
+        if cached is not None:
+            metrics.increment("llm_cache_hits_total", agent=self.agent_name)
+            logger.debug(f"{thread_id} LLM cache hit")
+            return messages_from_dict([cached])[0]
+
+        metrics.increment("llm_cache_misses_total", agent=self.agent_name)
+        response = await self._call_agent(inputs, agent)
+
+        # The graph assigns a fresh id to every message added to the state
+        value = message_to_dict(response)
+        value["data"]["id"] = None
+        try:
+            await self.llm_cache.aset(key, value)
+        except Exception as e:
+            logger.warning(f"{thread_id} LLM cache write failed: {str(e)}")
+        return response
+
+    async def _call_agent(self, inputs: Dict[str, Any], agent: Runnable) -> BaseMessage:
+        """Call the model through the process-wide rate limiter of its model"""
+        limiter = get_rate_limiter(self.config, self.llm.model_name)
+        return await limiter.ainvoke(
+            agent,
+            inputs,
+            prompt=self.prompt.invoke(inputs),
+            max_output_tokens=self.llm.max_tokens,
+        )
+
+    def _cache_key(self, inputs: Dict[str, Any], agent: Runnable) -> str:
+        """
+        Hash the rendered prompt together with the model and its parameters.
+
+        Messages are rendered without their ids and tool-call ids, which
+        differ between otherwise identical runs.
+
+        Args:
+            inputs (Dict[str, Any]): Prompt variables
+            agent (Runnable): The prompt | model chain being called
+
+        Returns:
+            str: Hex digest identifying the model call
+        """
+        if "messages" in inputs:
+            inputs = inputs | {
+                "messages": self._normalize_messages(inputs["messages"])
+            }
+        rendered = self.prompt.invoke(inputs).to_string()
+
+        model = agent.last
+        bound_kwargs = {}
+        if isinstance(model, RunnableBinding):
+            bound_kwargs = model.kwargs
+            model = model.bound
+
+        payload = json.dumps(
+            {
+                "prompt": rendered,
+                "model": type(model).__name__,
+                "params": model._identifying_params,
+                "bound": bound_kwargs,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _normalize_messages(messages: List[AnyMessage]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "type": message.type,
+                "content": message.content,
+                "tool_calls": [
+                    {"name": call["name"], "args": call["args"]}
+                    for call in getattr(message, "tool_calls", None) or []
+                ],
+            }
+            for message in messages or []
+        ]
+
     @staticmethod
     def _to_string(messages: List[AnyMessage]) -> str:
         """
@@ -3,11 +3,12 @@ from campaign_planner.agents.base import BaseGraph
 from .input import InputSchema, InputNode
 from .output import OutputSchema, OutputNode
 from .process import ProcessNode
+from .single_shot import SingleShotProcessNode
 from .router import RouterNode
 from .human import HumanNode
-from campaign_planner.state import State
+from campaign_planner.state import State, output_state
 from langchain_core.tools.retriever import create_retriever_tool
-from campaign_planner.utils import Retriever, get_module_logger
+from campaign_planner.utils import get_category_retriever, get_module_logger
 from langgraph.prebuilt import ToolNode
 from langchain_core.prompts import PromptTemplate
 
@@ -17,22 +18,32 @@ logger = get_module_logger()
 class BrandIndustryClassifier(BaseGraph):
     def __init__(self, config):
         super().__init__(config)
-        # Initialize the retriever
-        retriever = Retriever(config)
+        # tool_loop lets the model query the retriever tool; single_shot
+        # retrieves candidates itself and makes at most one model call
+        self.strategy = config.get("BRAND_INDUSTRY_CLASSIFIER", {}).get(
+            "STRATEGY", "tool_loop"
+        )
 
-        # Initialize the database (this will generate descriptions and store embeddings if they don't exist)
-        retriever.initialize_database()
+        # Shared by every graph build of the process; loads the prebuilt index once
+        self.retriever = get_category_retriever(config)
 
+        retrieval = config["DATASTORE"]["RETRIEVAL"]
         self.tools = [
             create_retriever_tool(
-                retriever.get_retriever(),
+                self.retriever.get_retriever(),
                 name="get_industry_types",
-                description="Suggests 5 type of industry based on the brand description by performing a Maximum Marginal Relevance Search on the vectorstore",
+                description=(
+                    f"Suggests {retrieval['SEARCH_KWARGS'].get('k', 3)} types of industry based on the brand description "
+                    f"by a {'Maximum Marginal Relevance' if retrieval['SEARCH_TYPE'] == 'mmr' else 'similarity'} search over the industry categories"
+                ),
                 document_prompt=PromptTemplate.from_template("Industry 1: {category}"),
             )
         ]
 
     def _build_graph(self) -> StateGraph:
+        if self.strategy == "single_shot":
+            return self._build_single_shot_graph()
+
         # Create nodes
         input_node = InputNode()
         process_node = ProcessNode(self.config, self.tools)
@@ -42,7 +53,7 @@ class BrandIndustryClassifier(BaseGraph):
         tool_node = ToolNode(self.tools)
 
         # Create graph
-        graph = StateGraph(State)
+        graph = StateGraph(State, output=output_state(OutputSchema))
 
         # Add nodes
         graph.add_node("input_node", input_node.validate_and_parse)
@@ -67,6 +78,33 @@ class BrandIndustryClassifier(BaseGraph):
 
         return graph
 
+    def _build_single_shot_graph(self) -> StateGraph:
+        # Create nodes
+        input_node = InputNode()
+        process_node = SingleShotProcessNode(self.config, self.retriever)
+        output_node = OutputNode()
+        human_node = HumanNode()
+
+        # Create graph
+        graph = StateGraph(State, output=output_state(OutputSchema))
+
+        # Add nodes
+        graph.add_node("input_node", input_node.validate_and_parse)
+        graph.add_node("process_node", process_node.process)
+        graph.add_node("output_node", output_node.format_output)
+        graph.add_node("human_node", human_node.get_human_validation)
+
+        # Add edges
+        graph.add_edge("input_node", "process_node")
+        graph.add_edge("process_node", "output_node")
+        graph.add_edge("output_node", "human_node")
+
+        # Add start and end points
+        graph.set_entry_point("input_node")
+        graph.set_finish_point("human_node")
+
+        return graph
+
     def get_input_schema(self) -> type:
         return InputSchema
 
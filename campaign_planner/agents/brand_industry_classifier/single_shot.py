@@ -0,0 +1,103 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.messages import AIMessage
+from langchain_core.runnables.config import RunnableConfig
+from campaign_planner.agents.base import BaseProcessNode
+from campaign_planner.state import State
+from campaign_planner.utils import Retriever, get_module_logger, metrics
+from .output import OutputNode
+
+logger = get_module_logger()
+
+
+class SingleShotProcessNode(BaseProcessNode):
+    """
+    Classifies a brand with one retrieval and at most one model call.
+
+    The brand and product description is embedded and searched against the
+    category index directly, instead of the model writing a tool query.
+    When the best category leads the runner-up by at least decisive_margin
+    cosine similarity, it is the answer and the model is not called;
+    otherwise the model picks among the top_k candidates, constrained by a
+    JSON schema that only admits their names.
+
+    The response is an AIMessage holding the output JSON, so the output node
+    parses both paths the same way.
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        retriever: Retriever,
+        model_name="OPENAI-GPT-4O",
+        prompt_file_name="single_shot_prompt.yaml",
+    ):
+        super().__init__(config, model_name, prompt_file_name)
+        options = config.get("BRAND_INDUSTRY_CLASSIFIER", {})
+        self.retriever = retriever
+        self.top_k = options.get("TOP_K", 5)
+        self.decisive_margin: Optional[float] = options.get("DECISIVE_MARGIN")
+
+        self.prompt.partial_variables["format_instructions"] = (
+            OutputNode.output_parser.get_format_instructions()
+        )
+
+    @staticmethod
+    def _query(state: State) -> str:
+        parts = [
+            state.get("brand_name"),
+            state.get("brand_description"),
+            state.get("product_name"),
+            state.get("product_description"),
+        ]
+        return "\n".join(part for part in parts if part)
+
+    def _is_decisive(self, candidates: List[Tuple[str, float]]) -> bool:
+        if self.decisive_margin is None:
+            return False
+        if len(candidates) < 2:
+            return True
+        return candidates[0][1] - candidates[1][1] >= self.decisive_margin
+
+    def _constrained_agent(self, names: List[str]):
+        """The prompt | model chain, with the answer restricted to the candidate names"""
+        response_format = {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "industry_classification",
+                "strict": True,
+                "schema": {
+                    "type": "object",
+                    "properties": {"industry": {"type": "string", "enum": names}},
+                    "required": ["industry"],
+                    "additionalProperties": False,
+                },
+            },
+        }
+        return self.prompt | self.llm.bind(response_format=response_format)
+
+    async def process(self, state: State, config: RunnableConfig) -> Dict[str, Any]:
+        thread_id = config["configurable"]["thread_id"]
+        logger.debug(f"{thread_id} start")
+
+        index = self.retriever.index
+        query_vector = await self.retriever.embeddings.aembed_query(self._query(state))
+        candidates = [
+            (index.categories[position], score)
+            for position, score in index.search(query_vector, self.top_k)
+        ]
+        logger.debug(f"{thread_id} candidates: {candidates}")
+
+        if self._is_decisive(candidates):
+            metrics.increment("industry_classifications_total", path="retrieval")
+            response = AIMessage(content=json.dumps({"industry": candidates[0][0]}))
+        else:
+            metrics.increment("industry_classifications_total", path="llm")
+            names = [name for name, _ in candidates]
+            inputs = state | {"candidates": "\n".join(f"- {name}" for name in names)}
+            response = await self._ainvoke_agent(
+                inputs, config, agent=self._constrained_agent(names)
+            )
+
+        logger.debug(f"{thread_id} finish")
+        return {"messages": [response]}
@@ -25,8 +25,8 @@ class ProcessNode(BaseProcessNode):
 
     async def process(self, state: State, config: RunnableConfig):
         logger.debug(f"{config['configurable']['thread_id']} start")
-        response = self.agent.invoke(
-            state | {"current_date": datetime.today().strftime("%d-%m-%Y")}
+        response = await self._ainvoke_agent(
+            state | {"current_date": datetime.today().strftime("%d-%m-%Y")}, config
         )
         logger.debug(f"{config['configurable']['thread_id']} finish")
         return {"messages": [response]}
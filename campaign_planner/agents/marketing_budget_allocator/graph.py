@@ -5,7 +5,7 @@ from .output import OutputSchema, OutputNode
 from .process import ProcessNode
 from .router import RouterNode
 from .human import HumanNode
-from campaign_planner.state import State
+from campaign_planner.state import State, output_state
 from campaign_planner.utils import get_module_logger
 from langgraph.prebuilt import ToolNode
 
@@ -27,7 +27,7 @@ class MarketingBudgetAllocator(BaseGraph):
         tool_node = ToolNode(self.tools)
 
         # Create graph
-        graph = StateGraph(State)
+        graph = StateGraph(State, output=output_state(OutputSchema))
 
         # Add nodes
         graph.add_node("input_node", input_node.validate_and_parse)
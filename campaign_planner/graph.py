@@ -1,4 +1,5 @@
-from langgraph.graph import StateGraph
+from typing import Dict, List, Set
+from langgraph.graph import StateGraph, START, END
 from campaign_planner.agents.base import BaseGraph
 from campaign_planner.agents.brand_industry_classifier import BrandIndustryClassifier
 from campaign_planner.agents.audience_segment_analyzer import AudienceSegmentAnalyzer
@@ -9,6 +10,88 @@ from campaign_planner.agents.campaign_schedule_recommender import (
 from campaign_planner.agents.marketing_budget_allocator import MarketingBudgetAllocator
 from campaign_planner.agents.campaign_name_generator import CampaignNameGenerator
 from campaign_planner.state import State
+from campaign_planner.utils import get_module_logger
+
+logger = get_module_logger()
+
+
+def derive_stage_dependencies(stages: Dict[str, BaseGraph]) -> Dict[str, List[str]]:
+    """
+    Derive which stages each stage has to wait for from the declared schemas.
+
+    A stage depends on the stages that produce any of the fields in its
+    InputSchema. Stages are given in data-flow order, so a field is always
+    produced by an earlier stage. Dependencies already implied by another
+    dependency are dropped, leaving only the direct predecessors.
+
+    Args:
+        stages (Dict[str, BaseGraph]): Stage name to agent graph, in data-flow order
+
+    Returns:
+        Dict[str, List[str]]: Stage name to the names of its direct predecessors
+
+    Raises:
+        ValueError: If two stages that can run concurrently declare the same output field
+    """
+    producers: Dict[str, str] = {}
+    ancestors: Dict[str, Set[str]] = {}
+    dependencies: Dict[str, List[str]] = {}
+
+    for name, stage in stages.items():
+        depends_on = {
+            producers[field]
+            for field in stage.get_input_schema().model_fields
+            if field in producers
+        }
+        ancestors[name] = set(depends_on).union(
+            *(ancestors[dependency] for dependency in depends_on)
+        )
+        dependencies[name] = sorted(
+            dependency
+            for dependency in depends_on
+            if not any(dependency in ancestors[other] for other in depends_on)
+        )
+        for field in stage.get_output_schema().model_fields:
+            producers[field] = name
+
+    outputs = {
+        name: set(stage.get_output_schema().model_fields)
+        for name, stage in stages.items()
+    }
+    names = list(stages)
+    for index, first in enumerate(names):
+        for second in names[index + 1 :]:
+            concurrent = first not in ancestors[second]
+            shared = outputs[first] & outputs[second]
+            if concurrent and shared:
+                raise ValueError(
+                    f"Stages {first} and {second} can run concurrently "
+                    f"but both write {sorted(shared)}"
+                )
+
+    return dependencies
+
+
+def execution_levels(dependencies: Dict[str, List[str]]) -> List[List[str]]:
+    """
+    Group stages into the steps in which they run.
+
+    Args:
+        dependencies (Dict[str, List[str]]): Output of derive_stage_dependencies
+
+    Returns:
+        List[List[str]]: Stages of each step; stages in one step run in parallel
+    """
+    level: Dict[str, int] = {}
+    for name, depends_on in dependencies.items():
+        level[name] = 1 + max(
+            (level[dependency] for dependency in depends_on), default=-1
+        )
+
+    levels: List[List[str]] = [[] for _ in range(max(level.values()) + 1)]
+    for name, index in level.items():
+        levels[index].append(name)
+    return levels
 
 
 class CampaignPlanner(BaseGraph):
@@ -18,84 +101,49 @@ class CampaignPlanner(BaseGraph):
         """
         Build the graph structure for campaign planning.
 
+        Edges are derived from the agents' input and output schemas, so every
+        stage starts as soon as the stages producing its inputs have finished.
+
         Returns:
             StateGraph: Configured graph for campaign planning
         """
-        # Create nodes
-        brand_industry_classifier = BrandIndustryClassifier(self.config)
-        audience_segment_analyzer = AudienceSegmentAnalyzer(self.config)
-        ad_channel_recommender = AdChannelRecommender(self.config)
-        campaign_schedule_recommender = CampaignScheduleRecommender(self.config)
-        marketing_budget_allocator = MarketingBudgetAllocator(self.config)
-        campaign_name_generator = CampaignNameGenerator(self.config)
+        # Create nodes, in data-flow order
+        stages: Dict[str, BaseGraph] = {
+            "brand_industry_classifier": BrandIndustryClassifier(self.config),
+            "audience_segment_analyzer": AudienceSegmentAnalyzer(self.config),
+            "ad_channel_recommender": AdChannelRecommender(self.config),
+            "campaign_schedule_recommender": CampaignScheduleRecommender(self.config),
+            "marketing_budget_allocator": MarketingBudgetAllocator(self.config),
+            "campaign_name_generator": CampaignNameGenerator(self.config),
+        }
+        dependencies = derive_stage_dependencies(stages)
+        logger.debug(f"Campaign planner schedule: {execution_levels(dependencies)}")
 
         # Create graph
         graph = StateGraph(State)
 
         # Add nodes
-        graph.add_node(
-            "brand_industry_classifier", brand_industry_classifier.get_compiled_graph()
-        )
-        graph.add_node(
-            "audience_segment_analyzer", audience_segment_analyzer.get_compiled_graph()
-        )
-        graph.add_node(
-            "ad_channel_recommender", ad_channel_recommender.get_compiled_graph()
-        )
-        graph.add_node(
-            "campaign_schedule_recommender",
-            campaign_schedule_recommender.get_compiled_graph(),
-        )
-        graph.add_node(
-            "marketing_budget_allocator",
-            marketing_budget_allocator.get_compiled_graph(),
-        )
-        graph.add_node(
-            "campaign_name_generator",
-            campaign_name_generator.get_compiled_graph(),
-        )
+        for name, stage in stages.items():
+            graph.add_node(name, stage.get_compiled_graph())
+
+        # Add edges; a stage with several predecessors waits for all of them
+        for name, depends_on in dependencies.items():
+            if not depends_on:
+                graph.add_edge(START, name)
+            elif len(depends_on) == 1:
+                graph.add_edge(depends_on[0], name)
+            else:
+                graph.add_edge(depends_on, name)
 
-        # Add edges
-        graph.add_edge("brand_industry_classifier", "audience_segment_analyzer")
-        graph.add_edge("audience_segment_analyzer", "ad_channel_recommender")
-        graph.add_edge("ad_channel_recommender", "campaign_schedule_recommender")
-        graph.add_edge("campaign_schedule_recommender", "marketing_budget_allocator")
-        graph.add_edge("marketing_budget_allocator", "campaign_name_generator")
-
-        # Set entry and finish points
-        graph.set_entry_point("brand_industry_classifier")
-        graph.set_finish_point("campaign_name_generator")
-
-        # Configure state passing
-        graph.config = {
-            "recursion_limit": 1,
-            "state_updates": {
-                "brand_industry_classifier": {
-                    "next": "audience_segment_analyzer",
-                    "state": lambda x: x
-                },
-                "audience_segment_analyzer": {
-                    "next": "ad_channel_recommender",
-                    "state": lambda x: x
-                },
-                "ad_channel_recommender": {
-                    "next": "campaign_schedule_recommender",
-                    "state": lambda x: x
-                },
-                "campaign_schedule_recommender": {
-                    "next": "marketing_budget_allocator",
-                    "state": lambda x: x
-                },
-                "marketing_budget_allocator": {
-                    "next": "campaign_name_generator",
-                    "state": lambda x: x
-                },
-                "campaign_name_generator": {
-                    "next": None,
-                    "state": lambda x: x
-                }
-            }
+        # Stages nothing depends on finish the graph
+        required = {
+            dependency
+            for depends_on in dependencies.values()
+            for dependency in depends_on
         }
+        for name in stages:
+            if name not in required:
+                graph.add_edge(name, END)
 
         return graph
 
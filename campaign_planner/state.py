@@ -1,5 +1,6 @@
-from typing import Annotated, Dict, List
+from typing import Annotated, Dict, List, Type, TypedDict, get_type_hints
 from langgraph.graph import MessagesState
+from pydantic import BaseModel
 
 
 class State(MessagesState):
@@ -76,3 +77,28 @@ class State(MessagesState):
         List[str],
         "Recommended Digital advertising platforms by the model integrated with the platform where campaigns will run",
     ]
+
+
+def output_state(schema: Type[BaseModel]) -> type:
+    """
+    Build the output state of an agent sub-graph from its output schema.
+
+    Sub-graphs run on the full State, but only the channels declared in the
+    agent's OutputSchema, plus `messages`, are written back to the parent
+    graph. Stages running in parallel therefore never write the same
+    last-value channel in the same step; `messages` is merged by its
+    add_messages reducer, so later prompts still see the earlier stages'
+    conversation.
+
+    Args:
+        schema (Type[BaseModel]): The agent's OutputSchema
+
+    Returns:
+        type: TypedDict restricted to the schema's fields, typed as in State
+    """
+    agent_name = schema.__module__.split(".")[-2]
+    state_fields = get_type_hints(State, include_extras=True)
+    return TypedDict(
+        f"{agent_name}_output",
+        {name: state_fields[name] for name in ["messages", *schema.model_fields]},
+    )
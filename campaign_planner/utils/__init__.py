@@ -1,13 +1,90 @@
 from .config import load_config
 from .logger import get_module_logger
-from .retriever import Retriever
-from .generator import Generator
+from .metrics import MetricsRegistry, metrics
+from .category_index import CategoryIndex, CategoryIndexRetriever
+from .category_index_builder import CategoryIndexBuilder
+from .embedding_cache import (
+    EmbeddingCache,
+    CachedEmbeddings,
+    get_embedding_cache,
+    close_embedding_cache,
+)
+from .retriever import Retriever, get_category_retriever
+from .generator import Generator, ModelRegistry, get_model_registry
 from .draw_graph import draw_mermaid_graph
+from .rate_limiter import (
+    Priority,
+    RateLimiter,
+    llm_priority,
+    estimate_tokens,
+    get_rate_limiter,
+)
+from .llm_cache import (
+    BaseLLMCache,
+    InMemoryLLMCache,
+    SQLiteLLMCache,
+    PostgresLLMCache,
+    build_llm_cache,
+)
+from .progress import (
+    ProgressEventType,
+    ProgressEvent,
+    ProgressBroker,
+    PostgresProgressBroker,
+    format_sse,
+    event_data,
+)
+from .startup import StartupOrchestrator
+from .jobs import (
+    ProcessingStatus,
+    Job,
+    BaseJobQueue,
+    InMemoryJobQueue,
+    PostgresJobQueue,
+    WorkerPool,
+    graph_job_handler,
+)
 
 __all__ = [
     "load_config",
     "get_module_logger",
+    "MetricsRegistry",
+    "metrics",
+    "CategoryIndex",
+    "CategoryIndexRetriever",
+    "CategoryIndexBuilder",
+    "EmbeddingCache",
+    "CachedEmbeddings",
+    "get_embedding_cache",
+    "close_embedding_cache",
     "Retriever",
+    "get_category_retriever",
     "Generator",
+    "ModelRegistry",
+    "get_model_registry",
     "draw_mermaid_graph",
+    "Priority",
+    "RateLimiter",
+    "llm_priority",
+    "estimate_tokens",
+    "get_rate_limiter",
+    "BaseLLMCache",
+    "InMemoryLLMCache",
+    "SQLiteLLMCache",
+    "PostgresLLMCache",
+    "build_llm_cache",
+    "ProgressEventType",
+    "ProgressEvent",
+    "ProgressBroker",
+    "PostgresProgressBroker",
+    "format_sse",
+    "event_data",
+    "ProcessingStatus",
+    "Job",
+    "BaseJobQueue",
+    "InMemoryJobQueue",
+    "PostgresJobQueue",
+    "WorkerPool",
+    "graph_job_handler",
+    "StartupOrchestrator",
 ]
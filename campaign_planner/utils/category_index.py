@@ -0,0 +1,316 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from pydantic import Field
+from campaign_planner.utils import get_module_logger
+
+logger = get_module_logger()
+
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILE = "metadata.json"
+# Small file at the index path naming the current version and what it was built from
+MANIFEST_FILE = "manifest.json"
+# Bumped when the files of an index change incompatibly
+INDEX_FORMAT_VERSION = 1
+
+
+def index_path(config: Dict[str, Any]) -> str:
+    """Index path of the DATASTORE section"""
+    return config["DATASTORE"].get(
+        "INDEX_PATH", str(Path(config["DATASTORE"]["PATH"]) / "category_index")
+    )
+
+
+def load_categories(path: str) -> List[str]:
+    """Load the category names from the categories JSON file"""
+    with open(path, "r") as f:
+        return json.load(f)["categories"]
+
+
+def categories_hash(categories: List[str]) -> str:
+    """Hash of the category list an index is built from, independent of file formatting"""
+    return hashlib.sha256(json.dumps(categories).encode("utf-8")).hexdigest()
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    """
+    Read the manifest of an index without loading the index.
+
+    Raises:
+        FileNotFoundError: If no index was saved at path
+    """
+    directory = Path(path)
+    try:
+        with open(directory / MANIFEST_FILE, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        pass
+    # Indexes saved before versioning keep their files at the top level
+    with open(directory / METADATA_FILE, "r") as f:
+        metadata = json.load(f)
+    categories = metadata.pop("categories")
+    metadata.pop("descriptions")
+    return {**metadata, "version": None, "count": len(categories)}
+
+
+def is_fresh(manifest: Dict[str, Any], categories_digest: str, embedding_model: str) -> bool:
+    """Whether an index was built in this format, from these categories, with this model"""
+    return (
+        manifest.get("format_version") == INDEX_FORMAT_VERSION
+        and manifest.get("categories_hash") == categories_digest
+        and manifest.get("embedding_model") == embedding_model
+    )
+
+
+class CategoryIndex:
+    """
+    Exact nearest-neighbour search over the industry category embeddings.
+
+    The index is a single (categories, dimensions) float32 matrix of unit
+    vectors, memory-mapped from EMBEDDINGS_FILE, next to a JSON file with the
+    category names and descriptions. With a few dozen categories an exact
+    cosine search is one matrix-vector product, cheaper than any approximate
+    index and without its I/O.
+
+    Each save writes a new version directory under the index path and then
+    points MANIFEST_FILE at it, so a reader always sees one complete build.
+    The manifest also records the format version, the categories hash and
+    the embedding model the index was built with, so readiness and freshness
+    checks read one small file instead of the index.
+    """
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        categories: List[str],
+        descriptions: List[str],
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if len(matrix) != len(categories) or len(categories) != len(descriptions):
+            raise ValueError(
+                f"Index has {len(matrix)} vectors for {len(categories)} categories "
+                f"and {len(descriptions)} descriptions"
+            )
+        self.matrix = matrix
+        self.categories = categories
+        self.descriptions = descriptions
+        self.metadata = metadata or {}
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    @staticmethod
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    @classmethod
+    def from_embeddings(
+        cls,
+        embeddings: List[List[float]],
+        categories: List[str],
+        descriptions: List[str],
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> "CategoryIndex":
+        return cls(cls.normalize(np.array(embeddings)), categories, descriptions, metadata)
+
+    @staticmethod
+    def version_directory(path: str) -> Path:
+        """
+        Directory of the version an index path currently serves.
+
+        Raises:
+            FileNotFoundError: If no index was saved at path
+        """
+        try:
+            version = read_manifest(path)["version"]
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No category index at {path}")
+        return Path(path) / version if version else Path(path)
+
+    @classmethod
+    def load(cls, path: str) -> "CategoryIndex":
+        """
+        Load the current version of an index saved with `save`, memory-mapping the matrix.
+
+        Raises:
+            FileNotFoundError: If no index was saved at path
+        """
+        directory = cls.version_directory(path)
+        with open(directory / METADATA_FILE, "r") as f:
+            metadata = json.load(f)
+        matrix = np.load(directory / EMBEDDINGS_FILE, mmap_mode="r")
+        categories = metadata.pop("categories")
+        descriptions = metadata.pop("descriptions")
+        logger.debug(f"Loaded category index of {len(categories)} categories from {path}")
+        return cls(matrix, categories, descriptions, metadata)
+
+    def is_fresh(self, categories_digest: str, embedding_model: str) -> bool:
+        """Whether the index was built in this format, from these categories, with this model"""
+        return is_fresh(self.metadata, categories_digest, embedding_model)
+
+    def save(self, path: str, keep: int = 3) -> str:
+        """
+        Write the index as a new version and make it current.
+
+        Args:
+            path (str): Index path
+            keep (int): Versions kept, the new one included
+
+        Returns:
+            str: Name of the new version directory
+        """
+        directory = Path(path)
+        directory.mkdir(parents=True, exist_ok=True)
+        # The suffix keeps versions saved within the same second apart
+        version = (
+            f"{time.strftime('%Y%m%dT%H%M%S')}-"
+            f"{self.metadata.get('categories_hash', '')[:12]}-{uuid.uuid4().hex[:6]}"
+        )
+
+        temp_directory = directory / f".{version}.tmp"
+        temp_manifest = directory / f".{version}.{MANIFEST_FILE}.tmp"
+        try:
+            temp_directory.mkdir()
+            with open(temp_directory / EMBEDDINGS_FILE, "wb") as f:
+                np.save(f, np.ascontiguousarray(self.matrix, dtype=np.float32))
+            manifest = {
+                **self.metadata,
+                "format_version": INDEX_FORMAT_VERSION,
+                "built_at": time.time(),
+                "count": len(self),
+            }
+            metadata = {**manifest, "categories": self.categories, "descriptions": self.descriptions}
+            with open(temp_directory / METADATA_FILE, "w") as f:
+                json.dump(metadata, f, indent=2)
+            os.replace(temp_directory, directory / version)
+
+            with open(temp_manifest, "w") as f:
+                json.dump({**manifest, "version": version}, f, indent=2)
+            os.replace(temp_manifest, directory / MANIFEST_FILE)
+        except BaseException:
+            shutil.rmtree(temp_directory, ignore_errors=True)
+            temp_manifest.unlink(missing_ok=True)
+            raise
+        logger.info(f"Saved category index version {version} to {path}")
+
+        # Older versions, oldest first; the new one is always kept
+        previous = sorted(
+            entry for entry in directory.iterdir()
+            if entry.is_dir() and not entry.name.startswith(".") and entry.name != version
+        )
+        for stale in previous[:max(0, len(previous) - (keep - 1))]:
+            shutil.rmtree(stale, ignore_errors=True)
+        return version
+
+    def similarities(self, query: List[float]) -> np.ndarray:
+        """Cosine similarity of the query with every category"""
+        return self.matrix @ self.normalize(np.array(query))
+
+    def search(self, query: List[float], k: int = 3) -> List[Tuple[int, float]]:
+        """
+        Top-k categories by cosine similarity.
+
+        Returns:
+            List[Tuple[int, float]]: Category positions and similarities, best first
+        """
+        scores = self.similarities(query)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(index), float(scores[index])) for index in top]
+
+    def max_marginal_relevance_search(
+        self,
+        query: List[float],
+        k: int = 3,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+    ) -> List[Tuple[int, float]]:
+        """
+        Top-k categories re-ranked for diversity with Maximal Marginal Relevance.
+
+        The fetch_k most similar categories are candidates; each pick
+        maximizes lambda_mult * relevance - (1 - lambda_mult) * similarity
+        to the categories already picked.
+
+        Returns:
+            List[Tuple[int, float]]: Category positions and query similarities, in pick order
+        """
+        candidates = self.search(query, fetch_k)
+        positions = np.array([index for index, _ in candidates])
+        relevance = np.array([score for _, score in candidates])
+        vectors = np.asarray(self.matrix[positions])
+        redundancy = vectors @ vectors.T
+
+        selected: List[int] = []
+        remaining = list(range(len(positions)))
+        while remaining and len(selected) < k:
+            if selected:
+                penalty = redundancy[np.ix_(remaining, selected)].max(axis=1)
+            else:
+                penalty = np.zeros(len(remaining))
+            scores = lambda_mult * relevance[remaining] - (1 - lambda_mult) * penalty
+            selected.append(remaining.pop(int(np.argmax(scores))))
+        return [(int(positions[i]), float(relevance[i])) for i in selected]
+
+
+class CategoryIndexRetriever(BaseRetriever):
+    """
+    LangChain retriever over a CategoryIndex, usable with create_retriever_tool.
+
+    Documents hold the category description, with the category name and
+    its similarity to the query in their metadata.
+    """
+
+    index: CategoryIndex
+    embeddings: Embeddings
+    search_type: str = "similarity"
+    search_kwargs: Dict[str, Any] = Field(default_factory=dict)
+
+    def _rank(self, query_vector: List[float]) -> List[Document]:
+        k = self.search_kwargs.get("k", 3)
+        if self.search_type == "mmr":
+            ranked = self.index.max_marginal_relevance_search(
+                query_vector,
+                k=k,
+                fetch_k=self.search_kwargs.get("fetch_k", 20),
+                lambda_mult=self.search_kwargs.get("lambda_mult", 0.5),
+            )
+        else:
+            ranked = self.index.search(query_vector, k=k)
+        return [
+            Document(
+                page_content=self.index.descriptions[position],
+                metadata={
+                    "category": self.index.categories[position],
+                    "description": self.index.descriptions[position],
+                    "score": score,
+                },
+            )
+            for position, score in ranked
+        ]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self._rank(self.embeddings.embed_query(query))
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self._rank(await self.embeddings.aembed_query(query))
@@ -0,0 +1,181 @@
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from langchain.prompts import ChatPromptTemplate
+from campaign_planner.utils import get_module_logger
+from campaign_planner.utils.category_index import (
+    CategoryIndex,
+    categories_hash,
+    index_path,
+    is_fresh,
+    load_categories,
+    read_manifest,
+)
+from campaign_planner.utils.generator import Generator, get_model_registry
+from campaign_planner.utils.rate_limiter import get_rate_limiter
+
+logger = get_module_logger()
+
+DESCRIPTION_PROMPT = ChatPromptTemplate.from_template(
+    """Generate a concise description (<250 words) for the industry category: {category}.
+    The description should help identify brands and products that belong to this category.
+    Include key characteristics, typical products/services, and common business models."""
+)
+
+# (description, embedding or None) of a category in an earlier build
+PreviousEntry = Tuple[str, Optional[np.ndarray]]
+
+
+class CategoryIndexBuilder:
+    """
+    Builds the category index offline, ahead of API startup.
+
+    Descriptions are generated concurrently, at most `concurrency` model
+    calls at a time through the shared rate limiter, and embedded in batches
+    of `batch_size`. Unless forced, categories already described in the
+    current index (or in a datastore left by the Chroma version) keep their
+    description, and their vector when it came from the same embedding
+    model, so adding a category costs one description and one embedding.
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        concurrency: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            config (Dict[str, Any]): Application configuration
+            concurrency (Optional[int]): Concurrent description calls. Defaults to DATASTORE.BUILD.CONCURRENCY
+            batch_size (Optional[int]): Texts per embedding request. Defaults to DATASTORE.BUILD.BATCH_SIZE
+        """
+        build_config = config["DATASTORE"].get("BUILD", {})
+        self.config = config
+        self.concurrency = concurrency or build_config.get("CONCURRENCY", 8)
+        self.batch_size = batch_size or build_config.get("BATCH_SIZE", 64)
+        self.categories_path = config["DATA"]["CATEGORIES_PATH"]
+        self.index_path = index_path(config)
+        self.embedding_model = config["OPENAI"]["EMBEDDINGS"]["MODEL_NAME"]
+        self.embeddings = get_model_registry(config).embeddings(model=self.embedding_model)
+        self.chat_model = Generator(config).get_model()
+
+    def is_fresh(self) -> bool:
+        """Whether the current index matches the categories file and embedding model"""
+        try:
+            manifest = read_manifest(self.index_path)
+        except FileNotFoundError:
+            return False
+        digest = categories_hash(load_categories(self.categories_path))
+        return is_fresh(manifest, digest, self.embedding_model)
+
+    def _previous(self) -> Dict[str, PreviousEntry]:
+        """Descriptions, and reusable vectors, of the categories of an earlier build"""
+        try:
+            index = CategoryIndex.load(self.index_path)
+            same_model = index.metadata.get("embedding_model") == self.embedding_model
+            return {
+                category: (description, np.asarray(vector) if same_model else None)
+                for category, description, vector in zip(
+                    index.categories, index.descriptions, index.matrix
+                )
+            }
+        except FileNotFoundError:
+            return self._previous_chroma()
+
+    def _previous_chroma(self) -> Dict[str, PreviousEntry]:
+        persist_directory = self.config["DATASTORE"]["PATH"]
+        if not (Path(persist_directory) / "chroma.sqlite3").exists():
+            return {}
+        try:
+            from langchain_chroma import Chroma
+
+            collection = Chroma(
+                collection_name="industry_description",
+                persist_directory=persist_directory,
+            ).get(include=["embeddings", "metadatas"])
+        except Exception as e:
+            logger.warning(f"Error reading the Chroma collection: {str(e)}")
+            return {}
+        # The Chroma store was always built with the configured embedding model
+        return {
+            metadata["category"]: (metadata["description"], np.asarray(vector, dtype=np.float32))
+            for metadata, vector in zip(collection["metadatas"], collection["embeddings"])
+        }
+
+    async def _describe(self, category: str, semaphore: asyncio.Semaphore) -> str:
+        messages = DESCRIPTION_PROMPT.format_messages(category=category)
+        limiter = get_rate_limiter(self.config, self.chat_model.model_name)
+        async with semaphore:
+            response = await limiter.ainvoke(
+                self.chat_model,
+                messages,
+                max_output_tokens=self.chat_model.max_tokens,
+            )
+        logger.debug(f"Described {category}")
+        return response.content.strip()
+
+    async def _embed(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(
+                await self.embeddings.aembed_documents(texts[start:start + self.batch_size])
+            )
+        return vectors
+
+    async def build(self, force: bool = False) -> CategoryIndex:
+        """
+        Build the index from the categories file and save it as the current version.
+
+        Args:
+            force (bool): Regenerate every description and embedding
+
+        Returns:
+            CategoryIndex: The new index
+
+        Raises:
+            RuntimeError: If any description could not be generated; nothing is saved
+        """
+        categories = load_categories(self.categories_path)
+        previous = {} if force else self._previous()
+
+        to_describe = [category for category in categories if category not in previous]
+        logger.info(
+            f"Building category index of {len(categories)} categories: "
+            f"{len(to_describe)} to describe, concurrency {self.concurrency}"
+        )
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(
+            *(self._describe(category, semaphore) for category in to_describe),
+            return_exceptions=True,
+        )
+        failed = []
+        for category, result in zip(to_describe, results):
+            if isinstance(result, BaseException) or not result:
+                logger.error(f"Error generating description for {category}: {result}")
+                failed.append(category)
+            else:
+                previous[category] = (result, None)
+        if failed:
+            raise RuntimeError(f"Could not describe {len(failed)} categories: {failed}")
+
+        descriptions = [previous[category][0] for category in categories]
+        to_embed = [i for i, category in enumerate(categories) if previous[category][1] is None]
+        logger.info(f"Embedding {len(to_embed)} descriptions in batches of {self.batch_size}")
+        computed = await self._embed([descriptions[i] for i in to_embed])
+        vectors = [previous[category][1] for category in categories]
+        for i, vector in zip(to_embed, computed):
+            vectors[i] = vector
+
+        index = CategoryIndex.from_embeddings(
+            vectors,
+            categories,
+            descriptions,
+            metadata={
+                "categories_hash": categories_hash(categories),
+                "embedding_model": self.embedding_model,
+            },
+        )
+        index.save(self.index_path)
+        return index
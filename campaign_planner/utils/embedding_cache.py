@@ -0,0 +1,297 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from campaign_planner.utils import get_module_logger
+from campaign_planner.utils.metrics import metrics
+
+logger = get_module_logger()
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form of a text for cache keys.
+
+    Unicode is NFKC-normalized and whitespace collapsed; case is kept, since
+    embedding models do not treat it as insignificant.
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def embedding_key(text: str, model: str) -> str:
+    """Cache key of the embedding of text by model"""
+    return hashlib.sha256(f"{model}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Embedding vectors keyed by text hash and model.
+
+    A bounded least-recently-used dict in memory sits over an SQLite file on
+    disk, which outlives restarts and is shared by the processes of a host.
+    Vectors are stored as float32 bytes. Entries do not expire: an embedding
+    only changes with its model, which is part of the key.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 4096) -> None:
+        """
+        Args:
+            path (Optional[str]): SQLite file of the disk layer; None keeps the cache in memory only
+            max_entries (int): Vectors kept in memory
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            with self._lock, self._conn:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS embedding_cache (
+                        key TEXT PRIMARY KEY,
+                        vector BLOB NOT NULL
+                    )
+                    """
+                )
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_many(self, keys: Sequence[str], model: str) -> Dict[str, np.ndarray]:
+        """
+        Look keys up, in memory first and then on disk.
+
+        Args:
+            keys (Sequence[str]): Keys from embedding_key
+            model (str): Model the keys belong to, used as a metrics label
+
+        Returns:
+            Dict[str, np.ndarray]: The vectors found; missing keys are absent
+        """
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = vector
+        if found:
+            metrics.increment("embedding_cache_hits_total", len(found), layer="memory", model=model)
+
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing and self._conn is not None:
+            placeholders = ", ".join("?" * len(missing))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embedding_cache WHERE key IN ({placeholders})",
+                    missing,
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(key, vector)
+                    found[key] = vector
+            if rows:
+                metrics.increment("embedding_cache_hits_total", len(rows), layer="disk", model=model)
+        return found
+
+    def set_many(self, vectors: Dict[str, np.ndarray]) -> None:
+        """Store vectors in both layers"""
+        with self._lock:
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO embedding_cache (key, vector) VALUES (?, ?)",
+                        [(key, vector.tobytes()) for key, vector in vectors.items()],
+                    )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings client that answers repeated texts from an EmbeddingCache.
+
+    Texts missing from the cache are embedded in one batched request per
+    call. Concurrent async queries are also coalesced: misses arriving
+    within batch_window_seconds of each other share one request, and a
+    text already queued or in flight waits for that request's result
+    instead of being embedded again. Queries are embedded as
+    documents, which is the same for the OpenAI models this repo uses.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache: EmbeddingCache,
+        model: str,
+        batch_window_seconds: float = 0.01,
+    ) -> None:
+        """
+        Args:
+            embeddings (Embeddings): Client that computes the missing vectors
+            cache (EmbeddingCache): Shared cache
+            model (str): Embedding model name, part of every key
+            batch_window_seconds (float): How long an async miss waits for others to batch with
+        """
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = model
+        self.batch_window_seconds = batch_window_seconds
+        # Futures of every text queued or in flight, until their flush resolves them
+        self._pending: Dict[str, "asyncio.Future[np.ndarray]"] = {}
+        # Texts waiting for the next flush
+        self._pending_texts: Dict[str, str] = {}
+        self._flush_scheduled = False
+        # Running flushes, referenced so they are not garbage collected
+        self._flush_tasks: Set["asyncio.Task[None]"] = set()
+        self._stats_lock = threading.Lock()
+        self._requested = 0
+        self._missed = 0
+
+    def _record(self, requested: int, missed: int) -> None:
+        with self._stats_lock:
+            self._requested += requested
+            self._missed += missed
+            hit_ratio = 1 - self._missed / self._requested if self._requested else 0.0
+        metrics.increment("embedding_cache_misses_total", missed, model=self.model)
+        metrics.set_gauge("embedding_cache_hit_ratio", hit_ratio, model=self.model)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_key(text, self.model) for text in texts]
+        found = self.cache.get_many(keys, self.model)
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        self._record(len(texts), len(missing))
+        if missing:
+            logger.debug(f"Embedding {len(missing)} of {len(texts)} texts not in the cache")
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = {
+                key: np.asarray(vector, dtype=np.float32)
+                for key, vector in zip(missing, vectors)
+            }
+            self.cache.set_many(computed)
+            found.update(computed)
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def _flush(self) -> None:
+        await asyncio.sleep(self.batch_window_seconds)
+        texts, self._pending_texts = self._pending_texts, {}
+        self._flush_scheduled = False
+        try:
+            vectors = await self.embeddings.aembed_documents(list(texts.values()))
+            computed = {
+                key: np.asarray(vector, dtype=np.float32) for key, vector in zip(texts, vectors)
+            }
+            await asyncio.to_thread(self.cache.set_many, computed)
+        except asyncio.CancelledError:
+            for key in texts:
+                self._pending.pop(key).cancel()
+            raise
+        except Exception as e:
+            for key in texts:
+                future = self._pending.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key in texts:
+            future = self._pending.pop(key)
+            if not future.done():
+                future.set_result(computed[key])
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_key(text, self.model) for text in texts]
+        found = await asyncio.to_thread(self.cache.get_many, keys, self.model)
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        self._record(len(texts), len(missing))
+        if missing:
+            loop = asyncio.get_running_loop()
+            futures = {}
+            for key, text in missing.items():
+                if key not in self._pending:
+                    self._pending[key] = loop.create_future()
+                    self._pending_texts[key] = text
+                futures[key] = self._pending[key]
+            if self._pending_texts and not self._flush_scheduled:
+                self._flush_scheduled = True
+                task = asyncio.create_task(self._flush())
+                self._flush_tasks.add(task)
+                task.add_done_callback(self._flush_tasks.discard)
+            for key, future in futures.items():
+                found[key] = await asyncio.shield(future)
+        return [found[key].tolist() for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache(config: Dict[str, Any]) -> Optional[EmbeddingCache]:
+    """
+    Get the process-wide embedding cache described by the EMBEDDING_CACHE section.
+
+    Args:
+        config (Dict[str, Any]): Application configuration
+
+    Returns:
+        Optional[EmbeddingCache]: The shared cache, or None when caching is disabled
+    """
+    global _cache
+    cache_config = config.get("EMBEDDING_CACHE", {})
+    if not cache_config.get("ENABLED", False):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache(
+                cache_config.get("SQLITE_PATH"),
+                cache_config.get("MAX_ENTRIES", 4096),
+            )
+            logger.info(f"Embedding cache: {cache_config.get('SQLITE_PATH') or 'memory only'}")
+        return _cache
+
+
+def cached_embeddings(embeddings: Embeddings, model: str, config: Dict[str, Any]) -> Embeddings:
+    """Wrap an embeddings client with the shared cache, when it is enabled"""
+    cache = get_embedding_cache(config)
+    if cache is None:
+        return embeddings
+    return CachedEmbeddings(
+        embeddings,
+        cache,
+        model,
+        config["EMBEDDING_CACHE"].get("BATCH_WINDOW_SECONDS", 0.01),
+    )
+
+
+def close_embedding_cache() -> None:
+    """Close the shared cache, if one was created"""
+    global _cache
+    with _cache_lock:
+        cache, _cache = _cache, None
+    if cache is not None:
+        cache.close()
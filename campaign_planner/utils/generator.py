@@ -1,10 +1,139 @@
-from typing import Annotated, Any, Dict
+import json
+import threading
+from typing import Annotated, Any, Callable, Dict, Optional
+import httpx
 from campaign_planner.utils import get_module_logger
-from langchain_openai import ChatOpenAI
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 
 logger = get_module_logger()
 
 
+class ModelRegistry:
+    """
+    Process-wide cache of model clients.
+
+    Clients are shared per (provider, model, params), and every client sends
+    its requests through the same keep-alive HTTP connection pool, so TLS
+    handshakes and connection memory are paid once per process instead of
+    once per node.
+    """
+
+    PROVIDERS = ("openai",)
+
+    def __init__(self, http_config: Dict[str, Any]) -> None:
+        """
+        Args:
+            http_config (Dict[str, Any]): The OPENAI.HTTP configuration section
+        """
+        limits = httpx.Limits(
+            max_connections=http_config.get("MAX_CONNECTIONS", 100),
+            max_keepalive_connections=http_config.get("MAX_KEEPALIVE_CONNECTIONS", 20),
+            keepalive_expiry=http_config.get("KEEPALIVE_EXPIRY_SECONDS", 60),
+        )
+        timeout = httpx.Timeout(http_config.get("TIMEOUT_SECONDS", 120), connect=10)
+        http2 = http_config.get("HTTP2", True)
+
+        self.http_client = httpx.Client(http2=http2, limits=limits, timeout=timeout)
+        self.http_async_client = httpx.AsyncClient(
+            http2=http2, limits=limits, timeout=timeout
+        )
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, key: Dict[str, Any], factory: Callable[[], Any]) -> Any:
+        cache_key = json.dumps(key, sort_keys=True, default=str)
+        with self._lock:
+            if cache_key not in self._models:
+                logger.debug(f"Creating model client {cache_key}")
+                self._models[cache_key] = factory()
+            return self._models[cache_key]
+
+    def _check_provider(self, provider: str) -> None:
+        if provider not in self.PROVIDERS:
+            raise ValueError(f"Unsupported model provider: {provider}")
+
+    def chat_model(self, model: str, provider: str = "openai", **params) -> ChatOpenAI:
+        """
+        Get the shared chat model client for a model and generation parameters.
+
+        Args:
+            model (str): Model name, e.g. gpt-4o
+            provider (str): Model provider. Defaults to "openai"
+            **params: ChatOpenAI parameters such as temperature or max_completion_tokens
+
+        Returns:
+            ChatOpenAI: Shared client
+
+        Raises:
+            ValueError: If the provider is not supported
+        """
+        self._check_provider(provider)
+        return self._get_or_create(
+            {"provider": provider, "kind": "chat", "model": model, "params": params},
+            lambda: ChatOpenAI(
+                model=model,
+                http_client=self.http_client,
+                http_async_client=self.http_async_client,
+                # Retries are coordinated across callers by the rate limiter
+                **({"max_retries": 0} | params),
+            ),
+        )
+
+    def embeddings(
+        self, model: str, provider: str = "openai", **params
+    ) -> OpenAIEmbeddings:
+        """
+        Get the shared embeddings client for a model.
+
+        Args:
+            model (str): Embedding model name, e.g. text-embedding-3-large
+            provider (str): Model provider. Defaults to "openai"
+            **params: OpenAIEmbeddings parameters
+
+        Returns:
+            OpenAIEmbeddings: Shared client
+
+        Raises:
+            ValueError: If the provider is not supported
+        """
+        self._check_provider(provider)
+        return self._get_or_create(
+            {"provider": provider, "kind": "embeddings", "model": model, "params": params},
+            lambda: OpenAIEmbeddings(
+                model=model,
+                http_client=self.http_client,
+                http_async_client=self.http_async_client,
+                **params,
+            ),
+        )
+
+    async def aclose(self) -> None:
+        """Close the shared connection pools"""
+        self.http_client.close()
+        await self.http_async_client.aclose()
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry(config: Dict[str, Any]) -> ModelRegistry:
+    """
+    Get the process-wide model registry, creating it on first use.
+
+    Args:
+        config (Dict[str, Any]): Configuration containing the OPENAI.HTTP section
+
+    Returns:
+        ModelRegistry: The shared registry
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry(config.get("OPENAI", {}).get("HTTP", {}))
+        return _registry
+
+
 class Generator:
     """Handles model initialization and retrieval for language models."""
 
@@ -19,7 +148,7 @@ class Generator:
         """
         try:
             openai_config = config["OPENAI"]["COMPLETION"]
-            openai_model = ChatOpenAI(
+            openai_model = get_model_registry(config).chat_model(
                 model=openai_config["MODEL_NAME"],
                 temperature=openai_config["TEMPERATURE"],
                 max_completion_tokens=openai_config["MAX_TOKENS"],
@@ -0,0 +1,456 @@
+import asyncio
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+from pydantic import BaseModel, Field
+from campaign_planner.utils import get_module_logger
+from campaign_planner.utils.progress import (
+    ProgressBroker,
+    ProgressEvent,
+    ProgressEventType,
+)
+
+logger = get_module_logger()
+
+
+class ProcessingStatus(str, Enum):
+    QUEUED = "QUEUED"
+    BUILDING = "BUILDING"
+    COMPLETE = "COMPLETE"
+    FAILED = "FAILED"
+
+
+class Job(BaseModel):
+    """A unit of work waiting for, or being processed by, a worker"""
+
+    id: str = Field(description="Unique job id, also used as the graph thread id")
+    pipeline: str = Field(description="Name of the pipeline that processes the job")
+    payload: Dict[str, Any] = Field(description="Input state for the pipeline graph")
+    status: ProcessingStatus = Field(default=ProcessingStatus.QUEUED)
+    attempts: int = Field(default=0, description="Number of times a worker claimed the job")
+    error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+JobHandler = Callable[[Job], Awaitable[None]]
+
+
+class BaseJobQueue(ABC):
+    """Persistent FIFO of jobs, partitioned by pipeline"""
+
+    async def setup(self) -> None:
+        """Create any storage the queue needs"""
+        pass
+
+    @abstractmethod
+    async def enqueue(self, job: Job) -> None:
+        """Persist a new job in the QUEUED state"""
+        pass
+
+    @abstractmethod
+    async def dequeue(self, pipeline: str, lease_seconds: float) -> Optional[Job]:
+        """
+        Claim the oldest runnable job of a pipeline.
+
+        A job is runnable when it is QUEUED, or when it is BUILDING but its
+        lease expired because the worker that claimed it died.
+
+        Args:
+            pipeline (str): Pipeline to take a job from
+            lease_seconds (float): How long the claim is valid without a heartbeat
+
+        Returns:
+            Optional[Job]: The claimed job, or None when nothing is runnable
+        """
+        pass
+
+    @abstractmethod
+    async def heartbeat(self, job_id: str, lease_seconds: float) -> None:
+        """Extend the lease of a running job"""
+        pass
+
+    @abstractmethod
+    async def mark_complete(self, job_id: str) -> None:
+        pass
+
+    @abstractmethod
+    async def mark_failed(self, job_id: str, error: str) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Job]:
+        pass
+
+    @abstractmethod
+    async def depth(self, pipeline: str) -> int:
+        """Number of jobs still waiting for a worker"""
+        pass
+
+
+class InMemoryJobQueue(BaseJobQueue):
+    """Process-local queue used in debug mode; jobs do not survive a restart"""
+
+    def __init__(self) -> None:
+        self._jobs: Dict[str, Job] = {}
+        self._pending: Dict[str, Deque[str]] = {}
+        self._lock = asyncio.Lock()
+
+    async def enqueue(self, job: Job) -> None:
+        async with self._lock:
+            self._jobs[job.id] = job
+            self._pending.setdefault(job.pipeline, deque()).append(job.id)
+
+    async def dequeue(self, pipeline: str, lease_seconds: float) -> Optional[Job]:
+        async with self._lock:
+            pending = self._pending.get(pipeline)
+            if not pending:
+                return None
+            job = self._jobs[pending.popleft()]
+            job.status = ProcessingStatus.BUILDING
+            job.attempts += 1
+            return job.model_copy()
+
+    async def heartbeat(self, job_id: str, lease_seconds: float) -> None:
+        pass
+
+    async def mark_complete(self, job_id: str) -> None:
+        self._jobs[job_id].status = ProcessingStatus.COMPLETE
+
+    async def mark_failed(self, job_id: str, error: str) -> None:
+        self._jobs[job_id].status = ProcessingStatus.FAILED
+        self._jobs[job_id].error = error
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        return job.model_copy() if job else None
+
+    async def depth(self, pipeline: str) -> int:
+        return len(self._pending.get(pipeline, ()))
+
+
+class PostgresJobQueue(BaseJobQueue):
+    """Queue stored in a Postgres table, shared by every API and worker process"""
+
+    SETUP_SQL = [
+        """
+        CREATE TABLE IF NOT EXISTS job_queue (
+            id TEXT PRIMARY KEY,
+            pipeline TEXT NOT NULL,
+            payload JSONB NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            started_at TIMESTAMPTZ,
+            finished_at TIMESTAMPTZ,
+            lease_expires_at TIMESTAMPTZ
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS job_queue_runnable_idx
+        ON job_queue (pipeline, created_at)
+        WHERE status IN ('QUEUED', 'BUILDING')
+        """,
+    ]
+
+    DEQUEUE_SQL = """
+        UPDATE job_queue
+        SET status = 'BUILDING',
+            attempts = attempts + 1,
+            started_at = now(),
+            lease_expires_at = now() + make_interval(secs => %(lease)s)
+        WHERE id = (
+            SELECT id FROM job_queue
+            WHERE pipeline = %(pipeline)s
+              AND (status = 'QUEUED'
+                   OR (status = 'BUILDING' AND lease_expires_at < now()))
+            ORDER BY created_at
+            FOR UPDATE SKIP LOCKED
+            LIMIT 1
+        )
+        RETURNING id, pipeline, payload, status, attempts, error, created_at
+    """
+
+    def __init__(self, pool) -> None:
+        """
+        Args:
+            pool (AsyncConnectionPool): Autocommit connection pool shared with the checkpointer
+        """
+        self.pool = pool
+
+    async def setup(self) -> None:
+        async with self.pool.connection() as conn:
+            for statement in self.SETUP_SQL:
+                await conn.execute(statement)
+
+    async def enqueue(self, job: Job) -> None:
+        from psycopg.types.json import Jsonb
+
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                """
+                INSERT INTO job_queue (id, pipeline, payload, status, created_at)
+                VALUES (%s, %s, %s, %s, %s)
+                """,
+                (job.id, job.pipeline, Jsonb(job.payload), job.status.value, job.created_at),
+            )
+
+    async def dequeue(self, pipeline: str, lease_seconds: float) -> Optional[Job]:
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                self.DEQUEUE_SQL, {"pipeline": pipeline, "lease": lease_seconds}
+            )
+            row = await cursor.fetchone()
+        return self._to_job(row) if row else None
+
+    async def heartbeat(self, job_id: str, lease_seconds: float) -> None:
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                """
+                UPDATE job_queue
+                SET lease_expires_at = now() + make_interval(secs => %s)
+                WHERE id = %s AND status = 'BUILDING'
+                """,
+                (lease_seconds, job_id),
+            )
+
+    async def mark_complete(self, job_id: str) -> None:
+        await self._finish(job_id, ProcessingStatus.COMPLETE, None)
+
+    async def mark_failed(self, job_id: str, error: str) -> None:
+        await self._finish(job_id, ProcessingStatus.FAILED, error)
+
+    async def _finish(
+        self, job_id: str, status: ProcessingStatus, error: Optional[str]
+    ) -> None:
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                """
+                UPDATE job_queue
+                SET status = %s, error = %s, finished_at = now(), lease_expires_at = NULL
+                WHERE id = %s
+                """,
+                (status.value, error, job_id),
+            )
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                """
+                SELECT id, pipeline, payload, status, attempts, error, created_at
+                FROM job_queue WHERE id = %s
+                """,
+                (job_id,),
+            )
+            row = await cursor.fetchone()
+        return self._to_job(row) if row else None
+
+    async def depth(self, pipeline: str) -> int:
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                "SELECT count(*) FROM job_queue WHERE pipeline = %s AND status = 'QUEUED'",
+                (pipeline,),
+            )
+            row = await cursor.fetchone()
+        return row[0]
+
+    @staticmethod
+    def _to_job(row) -> Job:
+        job_id, pipeline, payload, status, attempts, error, created_at = row
+        return Job(
+            id=job_id,
+            pipeline=pipeline,
+            payload=payload,
+            status=ProcessingStatus(status),
+            attempts=attempts,
+            error=error,
+            created_at=created_at,
+        )
+
+
+class WorkerPool:
+    """
+    Pool of async workers pulling jobs from a queue.
+
+    Every registered pipeline gets its own set of worker tasks, so the
+    number of jobs of a pipeline running at once never exceeds its
+    configured concurrency no matter how many requests are queued.
+    """
+
+    def __init__(
+        self,
+        queue: BaseJobQueue,
+        config: Dict[str, Any],
+        broker: Optional[ProgressBroker] = None,
+    ) -> None:
+        """
+        Args:
+            queue (BaseJobQueue): Queue to pull jobs from
+            config (Dict[str, Any]): Application configuration containing the JOBS section
+            broker (Optional[ProgressBroker]): Broker job progress is published to
+        """
+        jobs_config = config["JOBS"]
+        self.queue = queue
+        self.broker = broker
+        self.poll_interval = jobs_config["POLL_INTERVAL_SECONDS"]
+        self.lease_seconds = jobs_config["LEASE_SECONDS"]
+        self.max_attempts = jobs_config["MAX_ATTEMPTS"]
+        self.concurrency: Dict[str, int] = jobs_config["CONCURRENCY"]
+        self._handlers: Dict[str, JobHandler] = {}
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, pipeline: str, handler: JobHandler) -> None:
+        """Register the coroutine that processes jobs of a pipeline"""
+        self._handlers[pipeline] = handler
+        self._wakeups[pipeline] = asyncio.Event()
+
+    async def submit(self, pipeline: str, job_id: str, payload: Dict[str, Any]) -> Job:
+        """Queue a job and wake up an idle worker of this process"""
+        job = Job(id=job_id, pipeline=pipeline, payload=payload)
+        await self.queue.enqueue(job)
+        if pipeline in self._wakeups:
+            self._wakeups[pipeline].set()
+        await self._publish(job.id, ProgressEventType.QUEUED)
+        logger.debug(f"{job_id} queued for {pipeline}")
+        return job
+
+    def start(self) -> None:
+        for pipeline, handler in self._handlers.items():
+            for index in range(self.concurrency.get(pipeline, 1)):
+                self._tasks.append(
+                    asyncio.create_task(
+                        self._work(pipeline, handler),
+                        name=f"{pipeline}-worker-{index}",
+                    )
+                )
+        logger.info(f"Started {len(self._tasks)} job workers")
+
+    async def stop(self) -> None:
+        """Cancel all workers; jobs they were running are re-claimed once their lease expires"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _work(self, pipeline: str, handler: JobHandler) -> None:
+        wakeup = self._wakeups[pipeline]
+        while True:
+            try:
+                job = await self.queue.dequeue(pipeline, self.lease_seconds)
+            except Exception as e:
+                logger.error(f"Failed to dequeue {pipeline} job: {str(e)}")
+                job = None
+
+            if job is None:
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run(job, handler)
+
+    async def _run(self, job: Job, handler: JobHandler) -> None:
+        if job.attempts > self.max_attempts:
+            logger.error(f"{job.id} exceeded {self.max_attempts} attempts")
+            error = "Exceeded maximum number of attempts"
+            await self.queue.mark_failed(job.id, error)
+            await self._publish(job.id, ProgressEventType.FAILED, error=error)
+            return
+
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            logger.debug(f"{job.id} start (attempt {job.attempts})")
+            await self._publish(job.id, ProgressEventType.STARTED)
+            await handler(job)
+            await self.queue.mark_complete(job.id)
+            await self._publish(job.id, ProgressEventType.COMPLETE)
+            logger.debug(f"{job.id} finish")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"{job.id} failed")
+            await self.queue.mark_failed(job.id, str(e))
+            await self._publish(job.id, ProgressEventType.FAILED, error=str(e))
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.queue.heartbeat(job_id, self.lease_seconds)
+            except Exception as e:
+                logger.warning(f"{job_id} heartbeat failed: {str(e)}")
+
+    async def _publish(self, job_id: str, event_type: ProgressEventType, **fields) -> None:
+        if self.broker is not None:
+            await self.broker.publish(
+                ProgressEvent(request_id=job_id, type=event_type, **fields)
+            )
+
+    async def run_forever(self) -> None:
+        """Run the workers until the process is cancelled"""
+        self.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.stop()
+
+
+def graph_job_handler(workflow, broker: Optional[ProgressBroker] = None) -> JobHandler:
+    """
+    Build a job handler that runs a compiled graph with the job id as thread id.
+
+    A job re-claimed after a crash resumes from its last checkpoint instead
+    of starting over, so completed stages are not paid for twice. With a
+    broker, the start and finish of every top-level node is published as
+    it happens.
+
+    Args:
+        workflow (CompiledStateGraph): Compiled pipeline graph
+        broker (Optional[ProgressBroker]): Broker node progress is published to
+
+    Returns:
+        JobHandler: Coroutine function processing one job
+    """
+
+    async def handle(job: Job) -> None:
+        thread_config = {"configurable": {"thread_id": job.id}}
+        graph_input = job.payload
+        if job.attempts > 1:
+            snapshot = await workflow.aget_state(thread_config)
+            if snapshot.next:
+                graph_input = None
+
+        if broker is None:
+            await workflow.ainvoke(graph_input, config=thread_config)
+            return
+
+        async for mode, chunk in workflow.astream(
+            graph_input, config=thread_config, stream_mode=["updates", "debug"]
+        ):
+            if mode == "debug" and chunk["type"] == "task":
+                await broker.publish(
+                    ProgressEvent(
+                        request_id=job.id,
+                        type=ProgressEventType.NODE_START,
+                        node=chunk["payload"]["name"],
+                    )
+                )
+            elif mode == "updates":
+                for node in chunk:
+                    if not node.startswith("__"):
+                        await broker.publish(
+                            ProgressEvent(
+                                request_id=job.id,
+                                type=ProgressEventType.NODE_FINISH,
+                                node=node,
+                            )
+                        )
+
+    return handle
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+from campaign_planner.utils import get_module_logger
+
+logger = get_module_logger()
+
+
+class BaseLLMCache(ABC):
+    """
+    Store of LLM responses keyed by a hash of everything that determines them.
+
+    Values are serialized messages (see langchain_core.messages.message_to_dict).
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        disabled_agents: Iterable[str] = (),
+    ) -> None:
+        """
+        Args:
+            ttl_seconds (Optional[float]): Lifetime of an entry; None keeps entries forever
+            disabled_agents (Iterable[str]): Agents that always call the model
+        """
+        self.ttl_seconds = ttl_seconds
+        self.disabled_agents = set(disabled_agents)
+
+    def enabled_for(self, agent_name: str) -> bool:
+        return agent_name not in self.disabled_agents
+
+    async def setup(self) -> None:
+        """Create any storage the cache needs"""
+        pass
+
+    @abstractmethod
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value, or None when missing or expired"""
+        pass
+
+    @abstractmethod
+    async def aset(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a value for ttl_seconds"""
+        pass
+
+
+class InMemoryLLMCache(BaseLLMCache):
+    """Least-recently-used cache local to the process"""
+
+    def __init__(self, max_entries: int = 1024, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Optional[float], Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def aset(self, key: str, value: Dict[str, Any]) -> None:
+        expires_at = (
+            time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+        )
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class SQLiteLLMCache(BaseLLMCache):
+    """Cache in a local SQLite file, shared by the processes of one host"""
+
+    def __init__(self, path: str, **kwargs) -> None:
+        super().__init__(**kwargs)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL
+                )
+                """
+            )
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT value FROM llm_cache
+                WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)
+                """,
+                (key, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set(self, key: str, value: Dict[str, Any]) -> None:
+        expires_at = (
+            time.time() + self.ttl_seconds if self.ttl_seconds is not None else None
+        )
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_cache (key, value, expires_at)
+                VALUES (?, ?, ?)
+                """,
+                (key, json.dumps(value), expires_at),
+            )
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def aset(self, key: str, value: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._set, key, value)
+
+
+class PostgresLLMCache(BaseLLMCache):
+    """Cache in a Postgres table, shared by every API and worker process"""
+
+    SETUP_SQL = """
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            value JSONB NOT NULL,
+            expires_at TIMESTAMPTZ
+        )
+    """
+
+    def __init__(self, pool, **kwargs) -> None:
+        """
+        Args:
+            pool (AsyncConnectionPool): Autocommit connection pool shared with the checkpointer
+        """
+        super().__init__(**kwargs)
+        self.pool = pool
+
+    async def setup(self) -> None:
+        async with self.pool.connection() as conn:
+            await conn.execute(self.SETUP_SQL)
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                """
+                SELECT value FROM llm_cache
+                WHERE key = %s AND (expires_at IS NULL OR expires_at > now())
+                """,
+                (key,),
+            )
+            row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def aset(self, key: str, value: Dict[str, Any]) -> None:
+        from psycopg.types.json import Jsonb
+
+        expires_at = (
+            datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+            if self.ttl_seconds is not None
+            else None
+        )
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                """
+                INSERT INTO llm_cache (key, value, expires_at)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (key) DO UPDATE
+                SET value = EXCLUDED.value, expires_at = EXCLUDED.expires_at
+                """,
+                (key, Jsonb(value), expires_at),
+            )
+
+
+def build_llm_cache(config: Dict[str, Any]) -> Optional[BaseLLMCache]:
+    """
+    Create the LLM response cache described by the LLM_CACHE config section.
+
+    The postgres backend uses config["db_pool"]; without a database (debug
+    mode) it falls back to the in-memory backend.
+
+    Args:
+        config (Dict[str, Any]): Application configuration
+
+    Returns:
+        Optional[BaseLLMCache]: The cache, or None when caching is disabled
+    """
+    cache_config = config.get("LLM_CACHE", {})
+    if not cache_config.get("ENABLED", False):
+        return None
+
+    options = {
+        "ttl_seconds": cache_config.get("TTL_SECONDS"),
+        "disabled_agents": cache_config.get("DISABLED_AGENTS") or (),
+    }
+    backend = cache_config.get("BACKEND", "memory").lower()
+
+    if backend == "postgres" and config.get("db_pool") is not None:
+        cache = PostgresLLMCache(config["db_pool"], **options)
+    elif backend == "sqlite":
+        cache = SQLiteLLMCache(cache_config["SQLITE_PATH"], **options)
+    else:
+        if backend not in ("memory", "postgres"):
+            logger.warning(f"Unknown LLM cache backend {backend}, using memory")
+        cache = InMemoryLLMCache(cache_config.get("MAX_ENTRIES", 1024), **options)
+
+    logger.info(f"LLM response cache: {type(cache).__name__}")
+    return cache
@@ -0,0 +1,115 @@
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class _Histogram:
+    def __init__(self, buckets: Iterable[float]) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {str(bound): n for bound, n in zip(self.buckets, self.counts)},
+        }
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters, gauges and histograms.
+
+    Metrics are created on first use and identified by name plus labels;
+    `snapshot` returns everything in a JSON-serializable form for /metrics.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._gauges: Dict[str, Dict[LabelSet, float]] = {}
+        self._histograms: Dict[str, Dict[LabelSet, _Histogram]] = {}
+
+    @staticmethod
+    def _labels(labels: Dict[str, Any]) -> LabelSet:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        """Add to a counter"""
+        key = self._labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        """Set a gauge to its current value"""
+        with self._lock:
+            self._gauges.setdefault(name, {})[self._labels(labels)] = value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        buckets: Optional[Iterable[float]] = None,
+        **labels,
+    ) -> None:
+        """
+        Record a value in a histogram.
+
+        Args:
+            name (str): Histogram name
+            value (float): Observed value, e.g. a duration in seconds
+            buckets (Optional[Iterable[float]]): Upper bounds used when the series
+                is created. Defaults to DEFAULT_BUCKETS
+            **labels: Label values identifying the series
+        """
+        key = self._labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = _Histogram(buckets or DEFAULT_BUCKETS)
+            series[key].observe(value)
+
+    def get_counter(self, name: str, **labels) -> float:
+        return self._counters.get(name, {}).get(self._labels(labels), 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": {
+                    name: [
+                        {"labels": dict(key), "value": value}
+                        for key, value in series.items()
+                    ]
+                    for name, series in self._counters.items()
+                },
+                "gauges": {
+                    name: [
+                        {"labels": dict(key), "value": value}
+                        for key, value in series.items()
+                    ]
+                    for name, series in self._gauges.items()
+                },
+                "histograms": {
+                    name: [
+                        {"labels": dict(key), **histogram.snapshot()}
+                        for key, histogram in series.items()
+                    ]
+                    for name, series in self._histograms.items()
+                },
+            }
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,208 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from enum import Enum
+from typing import AsyncIterator, Dict, List, Optional, Set
+from pydantic import BaseModel, Field
+from campaign_planner.utils import get_module_logger
+
+logger = get_module_logger()
+
+
+class ProgressEventType(str, Enum):
+    QUEUED = "queued"
+    STARTED = "started"
+    NODE_START = "node_start"
+    NODE_FINISH = "node_finish"
+    COMPLETE = "complete"
+    FAILED = "failed"
+
+
+TERMINAL_EVENTS = {ProgressEventType.COMPLETE, ProgressEventType.FAILED}
+
+
+class ProgressEvent(BaseModel):
+    """A single step of a job's progress, as pushed to streaming clients"""
+
+    request_id: str = Field(description="Id of the job the event belongs to")
+    type: ProgressEventType = Field(description="What happened")
+    node: Optional[str] = Field(default=None, description="Graph node for node events")
+    error: Optional[str] = Field(default=None, description="Failure reason for failed events")
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.type in TERMINAL_EVENTS
+
+
+def format_sse(event: str, data: str) -> str:
+    """
+    Format one Server-Sent Events message.
+
+    Args:
+        event (str): Event name
+        data (str): Single-line payload, usually JSON
+
+    Returns:
+        str: The message, terminated by a blank line
+    """
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+def event_data(event: ProgressEvent) -> str:
+    """Serialize an event for an SSE data line"""
+    return json.dumps(event.model_dump(mode="json", exclude_none=True))
+
+
+class ProgressBroker:
+    """
+    Fans progress events out to the subscribers of this process.
+
+    Recent events of every job are kept for HISTORY_SECONDS, so a client that
+    subscribes after submitting still sees the events it missed.
+    """
+
+    def __init__(self, history_seconds: float = 600) -> None:
+        """
+        Args:
+            history_seconds (float): How long events of an idle job are kept for replay
+        """
+        self.history_seconds = history_seconds
+        self._history: Dict[str, List[ProgressEvent]] = {}
+        self._updated: Dict[str, float] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, event: ProgressEvent) -> None:
+        self._dispatch(event)
+
+    def _dispatch(self, event: ProgressEvent) -> None:
+        now = time.monotonic()
+        self._history.setdefault(event.request_id, []).append(event)
+        self._updated[event.request_id] = now
+        for queue in self._subscribers.get(event.request_id, ()):
+            queue.put_nowait(event)
+        self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        expired = [
+            request_id
+            for request_id, updated in self._updated.items()
+            if now - updated > self.history_seconds
+            and request_id not in self._subscribers
+        ]
+        for request_id in expired:
+            del self._history[request_id]
+            del self._updated[request_id]
+
+    async def subscribe(
+        self, request_id: str, idle_seconds: float
+    ) -> AsyncIterator[Optional[ProgressEvent]]:
+        """
+        Iterate over the events of a job, starting with the retained ones.
+
+        Iteration stops after a complete or failed event.
+
+        Args:
+            request_id (str): Job to follow
+            idle_seconds (float): Yield None after this long without an event,
+                so callers can send keep-alives
+
+        Yields:
+            Optional[ProgressEvent]: The next event, or None when idle
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in self._history.get(request_id, ()):
+            queue.put_nowait(event)
+        self._subscribers.setdefault(request_id, set()).add(queue)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=idle_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+                if event.is_terminal:
+                    return
+        finally:
+            subscribers = self._subscribers[request_id]
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[request_id]
+
+
+class PostgresProgressBroker(ProgressBroker):
+    """
+    Broker shared by API and worker processes through Postgres LISTEN/NOTIFY.
+
+    Publishing is a single pg_notify on the shared pool. Processes that serve
+    streams also call start(), which keeps one dedicated connection listening
+    and feeds every notification into the in-memory fan-out.
+    """
+
+    CHANNEL = "job_progress"
+
+    def __init__(self, pool, conninfo: str, history_seconds: float = 600) -> None:
+        """
+        Args:
+            pool (AsyncConnectionPool): Autocommit connection pool used to publish
+            conninfo (str): Connection string for the listening connection
+            history_seconds (float): How long events of an idle job are kept for replay
+        """
+        super().__init__(history_seconds)
+        self.pool = pool
+        self.conninfo = conninfo
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._listener = asyncio.create_task(self._listen(), name="progress-listener")
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def publish(self, event: ProgressEvent) -> None:
+        # Progress is best effort; it must never fail the job that reports it
+        try:
+            async with self.pool.connection() as conn:
+                await conn.execute(
+                    "SELECT pg_notify(%s, %s)",
+                    (self.CHANNEL, event.model_dump_json()),
+                )
+        except Exception as e:
+            logger.warning(
+                f"{event.request_id} failed to publish {event.type.value}: {str(e)}"
+            )
+
+    async def _listen(self) -> None:
+        from psycopg import AsyncConnection
+
+        while True:
+            try:
+                async with await AsyncConnection.connect(
+                    self.conninfo, autocommit=True
+                ) as conn:
+                    await conn.execute(f"LISTEN {self.CHANNEL}")
+                    logger.info(f"Listening for progress on {self.CHANNEL}")
+                    async for notify in conn.notifies():
+                        try:
+                            event = ProgressEvent.model_validate_json(notify.payload)
+                        except ValueError as e:
+                            logger.warning(f"Ignoring malformed progress event: {str(e)}")
+                            continue
+                        self._dispatch(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Progress listener disconnected: {str(e)}")
+                await asyncio.sleep(1)
+
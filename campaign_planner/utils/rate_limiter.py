@@ -0,0 +1,290 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import openai
+import tiktoken
+from campaign_planner.utils import get_module_logger
+from campaign_planner.utils.metrics import metrics
+
+logger = get_module_logger()
+
+
+class Priority(IntEnum):
+    """Admission order for queued model calls; lower values go first"""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+# Set by request handlers; read when a call is queued
+llm_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.BACKGROUND)
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def estimate_tokens(prompt: Any, model: str) -> int:
+    """
+    Estimate the number of prompt tokens of a model call.
+
+    Args:
+        prompt (Any): A string, a PromptValue, or a list of messages or
+            role/content dicts
+        model (str): Model name, used to pick the tokenizer
+
+    Returns:
+        int: Approximate token count, including per-message overhead
+    """
+    if hasattr(prompt, "to_messages"):
+        prompt = prompt.to_messages()
+    if isinstance(prompt, str):
+        return len(_encoding(model).encode(prompt))
+
+    total = 0
+    for message in prompt or []:
+        content = message["content"] if isinstance(message, dict) else message.content
+        total += len(_encoding(model).encode(str(content))) + 4
+    return total
+
+
+class _Lease:
+    def __init__(self, estimated_tokens: int) -> None:
+        self.estimated_tokens = estimated_tokens
+        self.used_tokens: Optional[int] = None
+
+
+class RateLimiter:
+    """
+    Admission control for the calls made to one model.
+
+    A call is admitted once a concurrency slot is free and the request and
+    token buckets, refilled continuously from the per-minute budgets, can
+    cover it. Waiting calls are admitted strictly by priority, then in
+    arrival order. A 429 from the API pauses admission for every caller
+    until the suggested retry time instead of each one retrying on its own.
+    """
+
+    def __init__(self, model: str, limits: Dict[str, Any], options: Dict[str, Any]) -> None:
+        """
+        Args:
+            model (str): Model the limits apply to
+            limits (Dict[str, Any]): REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE and MAX_CONCURRENCY
+            options (Dict[str, Any]): The RATE_LIMITS configuration section
+        """
+        self.model = model
+        self.requests_per_minute = float(limits["REQUESTS_PER_MINUTE"])
+        self.tokens_per_minute = float(limits["TOKENS_PER_MINUTE"])
+        self.max_concurrency = int(limits["MAX_CONCURRENCY"])
+        self.default_output_tokens = int(options.get("DEFAULT_OUTPUT_TOKENS", 1024))
+        self.max_retries = int(options.get("MAX_RETRIES", 3))
+        self.backoff_seconds = float(options.get("BACKOFF_SECONDS", 2))
+
+        self._request_tokens = self.requests_per_minute
+        self._budget_tokens = self.tokens_per_minute
+        self._refilled_at = time.monotonic()
+        self._cooldown_until = 0.0
+        self._active = 0
+        self._waiters: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._condition = asyncio.Condition()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self._request_tokens = min(
+            self.requests_per_minute,
+            self._request_tokens + elapsed * self.requests_per_minute / 60,
+        )
+        self._budget_tokens = min(
+            self.tokens_per_minute,
+            self._budget_tokens + elapsed * self.tokens_per_minute / 60,
+        )
+
+    def _try_admit(self, tokens: int) -> Optional[float]:
+        """Admit the call and return 0, or return how long to wait (None: until a release)"""
+        now = time.monotonic()
+        self._refill(now)
+        if self._active >= self.max_concurrency:
+            return None
+        if self._cooldown_until > now:
+            return self._cooldown_until - now
+        if self._request_tokens < 1:
+            return (1 - self._request_tokens) * 60 / self.requests_per_minute
+        # A call larger than the whole budget waits for a full bucket, not forever
+        tokens = min(tokens, self.tokens_per_minute)
+        if self._budget_tokens < tokens:
+            return (tokens - self._budget_tokens) * 60 / self.tokens_per_minute
+
+        self._request_tokens -= 1
+        self._budget_tokens -= tokens
+        self._active += 1
+        return 0
+
+    def _report_queue(self) -> None:
+        metrics.set_gauge("llm_limiter_queue_depth", len(self._waiters), model=self.model)
+        metrics.set_gauge("llm_limiter_active", self._active, model=self.model)
+
+    @asynccontextmanager
+    async def acquire(self, tokens: int) -> AsyncIterator[_Lease]:
+        """
+        Wait for admission and hold a concurrency slot for the duration of the block.
+
+        Set `used_tokens` on the yielded lease when the actual usage is known;
+        the difference to the estimate is returned to or taken from the budget.
+
+        Args:
+            tokens (int): Estimated prompt plus completion tokens
+        """
+        priority = llm_priority.get()
+        entry = (int(priority), next(self._sequence))
+        queued_at = time.monotonic()
+
+        async with self._condition:
+            heapq.heappush(self._waiters, entry)
+            self._report_queue()
+            try:
+                while True:
+                    delay = self._try_admit(tokens) if self._waiters[0] == entry else None
+                    if delay == 0:
+                        heapq.heappop(self._waiters)
+                        break
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+                raise
+            finally:
+                self._report_queue()
+            # The next waiter may be admissible right away
+            self._condition.notify_all()
+
+        metrics.observe(
+            "llm_limiter_wait_seconds",
+            time.monotonic() - queued_at,
+            model=self.model,
+            priority=priority.name.lower(),
+        )
+        lease = _Lease(tokens)
+        try:
+            yield lease
+        finally:
+            async with self._condition:
+                self._active -= 1
+                if lease.used_tokens is not None:
+                    self._budget_tokens += lease.estimated_tokens - lease.used_tokens
+                self._report_queue()
+                self._condition.notify_all()
+
+    async def _cool_down(self, error: openai.RateLimitError, attempt: int) -> None:
+        retry_after = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get("retry-after"))
+            except (TypeError, ValueError):
+                retry_after = None
+        delay = retry_after if retry_after is not None else self.backoff_seconds * 2**attempt
+
+        async with self._condition:
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+            self._condition.notify_all()
+        metrics.increment("llm_rate_limited_total", model=self.model)
+        logger.warning(f"{self.model} rate limited, pausing calls for {delay:.1f}s")
+
+    async def ainvoke(
+        self,
+        runnable: Any,
+        inputs: Any,
+        prompt: Any = None,
+        max_output_tokens: Optional[int] = None,
+    ) -> Any:
+        """
+        Invoke a runnable under the limits, retrying rate-limit and transient errors.
+
+        Args:
+            runnable (Any): Chain or chat model to call
+            inputs (Any): Input passed to `runnable.ainvoke`
+            prompt (Any): What is sent to the model, for the token estimate.
+                Defaults to `inputs`
+            max_output_tokens (Optional[int]): Expected completion size.
+                Defaults to RATE_LIMITS.DEFAULT_OUTPUT_TOKENS
+
+        Returns:
+            Any: The runnable's result
+        """
+        estimated = estimate_tokens(
+            inputs if prompt is None else prompt, self.model
+        ) + (max_output_tokens or self.default_output_tokens)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.acquire(estimated) as lease:
+                    response = await runnable.ainvoke(inputs)
+                    usage = getattr(response, "usage_metadata", None)
+                    if usage:
+                        lease.used_tokens = usage["total_tokens"]
+                    metrics.increment("llm_requests_total", model=self.model)
+                    metrics.increment(
+                        "llm_tokens_total",
+                        lease.used_tokens or estimated,
+                        model=self.model,
+                    )
+                    return response
+            except openai.RateLimitError as e:
+                if attempt == self.max_retries:
+                    raise
+                await self._cool_down(e, attempt)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_seconds * 2**attempt
+                logger.warning(f"{self.model} call failed ({str(e)}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(config: Dict[str, Any], model: str) -> RateLimiter:
+    """
+    Get the process-wide limiter of a model, creating it on first use.
+
+    Limits come from RATE_LIMITS.MODELS[model], falling back to RATE_LIMITS.DEFAULT.
+
+    Args:
+        config (Dict[str, Any]): Configuration containing the RATE_LIMITS section
+        model (str): Model name, e.g. gpt-4o
+
+    Returns:
+        RateLimiter: The shared limiter
+    """
+    with _limiters_lock:
+        if model not in _limiters:
+            options = config["RATE_LIMITS"]
+            limits = (options.get("MODELS") or {}).get(model, options["DEFAULT"])
+            _limiters[model] = RateLimiter(model, limits, options)
+        return _limiters[model]
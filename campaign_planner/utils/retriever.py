@@ -1,93 +1,114 @@
-from typing import Any, Dict, List
-from langchain_chroma import Chroma
+import threading
+from typing import Any, Dict, Optional
 from campaign_planner.utils import get_module_logger
-from langchain_openai import OpenAIEmbeddings
-from langchain.prompts import ChatPromptTemplate
-from campaign_planner.utils.generator import Generator
-import json
-from pathlib import Path
-from tqdm import tqdm
+from campaign_planner.utils.category_index import (
+    CategoryIndex,
+    CategoryIndexRetriever,
+    categories_hash,
+    index_path,
+    is_fresh,
+    load_categories,
+    read_manifest,
+)
+from campaign_planner.utils.embedding_cache import cached_embeddings
+from campaign_planner.utils.generator import get_model_registry
 
 logger = get_module_logger()
 
+BUILD_COMMAND = "python scripts/build_category_index.py"
+
 
 class Retriever:
     def __init__(self, config: Dict[str, Any]) -> None:
         self.config = config
-        self.generator = Generator(config)
 
-        self.embeddings = OpenAIEmbeddings(
-            model=config["OPENAI"]["EMBEDDINGS"]["MODEL_NAME"]
+        self.embedding_model = config["OPENAI"]["EMBEDDINGS"]["MODEL_NAME"]
+        # Repeat brands send the same tool queries; their vectors come from the cache
+        self.embeddings = cached_embeddings(
+            get_model_registry(config).embeddings(model=self.embedding_model),
+            self.embedding_model,
+            config,
         )
 
-        self.vector_store = Chroma(
-            collection_name="industry_description",
-            embedding_function=self.embeddings,
-            persist_directory=config["DATASTORE"]["PATH"],
-        )
+        # The index is built offline by BUILD_COMMAND; startup only loads it
+        self.index_path = index_path(config)
+        self.index: Optional[CategoryIndex] = None
+        self.retriever: Optional[CategoryIndexRetriever] = None
 
-        self.retriever = self.vector_store.as_retriever(
-            search_type=config["DATASTORE"]["RETRIEVAL"]["SEARCH_TYPE"],
-            search_kwargs=config["DATASTORE"]["RETRIEVAL"]["SEARCH_KWARGS"],
-        )
+    def get_retriever(self) -> CategoryIndexRetriever:
+        return self.retriever
+
+    def index_status(self) -> Dict[str, Any]:
+        """
+        Readiness of the category index, from its manifest alone.
 
-    def _load_categories(self) -> List[str]:
-        """Load categories from JSON file."""
+        Returns:
+            Dict[str, Any]: Whether an index is built and loaded, whether it matches
+                the categories file and embedding model, and its version
+        """
         try:
-            categories_path = Path(self.config["DATA"]["CATEGORIES_PATH"])
-            with open(categories_path, "r") as f:
-                data = json.load(f)
-                return data["categories"]
-        except Exception as e:
-            logger.error(f"Error loading categories: {str(e)}")
+            manifest = read_manifest(self.index_path)
+        except FileNotFoundError:
+            return {"built": False, "loaded": False, "fresh": False, "version": None}
+        digest = categories_hash(load_categories(self.config["DATA"]["CATEGORIES_PATH"]))
+        return {
+            "built": True,
+            "loaded": self.index is not None,
+            "fresh": is_fresh(manifest, digest, self.embedding_model),
+            "version": manifest.get("version"),
+        }
+
+    def initialize_database(self):
+        """
+        Load the prebuilt category index.
+
+        Raises:
+            FileNotFoundError: If the index has not been built
+        """
+        try:
+            self.index = CategoryIndex.load(self.index_path)
+        except FileNotFoundError:
+            logger.error(f"No category index at {self.index_path}; build it with `{BUILD_COMMAND}`")
             raise
 
-    def generate_category_description(self, category: str) -> str:
-        """Generate a description for a given category using LangChain ChatModel."""
-        prompt = ChatPromptTemplate.from_template(
-            """Generate a concise description (<250 words) for the industry category: {category}.
-            The description should help identify brands and products that belong to this category.
-            Include key characteristics, typical products/services, and common business models."""
+        if not self.index_status()["fresh"]:
+            logger.warning(
+                f"Category index at {self.index_path} does not match the categories file "
+                f"or embedding model; rebuild it with `{BUILD_COMMAND}`"
+            )
+
+        self.retriever = CategoryIndexRetriever(
+            index=self.index,
+            embeddings=self.embeddings,
+            search_type=self.config["DATASTORE"]["RETRIEVAL"]["SEARCH_TYPE"],
+            search_kwargs=self.config["DATASTORE"]["RETRIEVAL"]["SEARCH_KWARGS"],
         )
 
-        try:
-            chat_model = self.generator.get_model()
-            messages = prompt.format_messages(category=category)
-            response = chat_model.invoke(messages)
-            return response.content.strip()
-        except Exception as e:
-            logger.error(f"Error generating description for {category}: {str(e)}")
-            return ""
-
-    def embed_and_store_categories(self):
-        """Generate descriptions, embed them, and store in Chroma."""
-        texts = []
-        metadatas = []
-
-        logger.debug("Generating descriptions and storing embeddings...")
-        for category in tqdm(self.categories):
-            description = self.generate_category_description(category)
-            if description:
-                texts.append(description)
-                metadatas.append({"category": category, "description": description})
 
-        try:
-            # Add texts to the vector store
-            self.vector_store.add_texts(texts=texts, metadatas=metadatas)
-            self.vector_store.persist()
-            logger.debug(f"Successfully stored {len(texts)} category descriptions")
-        except Exception as e:
-            logger.error(f"Error storing embeddings: {str(e)}")
-
-    def get_retriever(self):
-        return self.retriever
+_retriever: Optional[Retriever] = None
+_retriever_lock = threading.Lock()
 
-    def initialize_database(self):
-        """Initialize the vector database with category descriptions."""
-        self.categories = self._load_categories()
-        # Check if database already contains embeddings
-        if len(self.vector_store.get()["ids"]) == 0:
-            logger.debug("Initializing database with category descriptions...")
-            self.embed_and_store_categories()
-        else:
-            logger.debug("Database already contains embeddings")
+
+def get_category_retriever(config: Dict[str, Any]) -> Retriever:
+    """
+    Get the process-wide category retriever, loading the index on first use.
+
+    Every graph build of the process shares it, so the index is read and its
+    embeddings client wrapped once.
+
+    Args:
+        config (Dict[str, Any]): Application configuration
+
+    Returns:
+        Retriever: The shared, initialized retriever
+
+    Raises:
+        FileNotFoundError: If the index has not been built
+    """
+    global _retriever
+    with _retriever_lock:
+        if _retriever is None:
+            retriever = Retriever(config)
+            retriever.initialize_database()
+            _retriever = retriever
+        return _retriever
@@ -0,0 +1,125 @@
+import asyncio
+import graphlib
+import inspect
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from campaign_planner.utils import get_module_logger
+from campaign_planner.utils.metrics import metrics
+
+logger = get_module_logger()
+
+
+@dataclass
+class _Component:
+    name: str
+    factory: Callable[[], Any]
+    depends_on: List[str] = field(default_factory=list)
+    required: bool = True
+
+
+class StartupOrchestrator:
+    """
+    Builds the startup components of a process concurrently.
+
+    Each component is a factory, synchronous (run in a thread) or async,
+    that starts as soon as the components it depends on are built. The
+    heavy objects the graphs need (model clients, the category retriever,
+    the mask model) are process-wide singletons, so warming them up as
+    components first lets every graph built afterwards share them.
+
+    The time each component took, from its start to its end, is logged,
+    kept in `timings` and reported as the `startup_seconds` gauge.
+    """
+
+    def __init__(self) -> None:
+        self._components: Dict[str, _Component] = {}
+        self.timings: Dict[str, float] = {}
+
+    def add(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        depends_on: Optional[List[str]] = None,
+        required: bool = True,
+    ) -> "StartupOrchestrator":
+        """
+        Register a component.
+
+        Args:
+            name (str): Component name, used for dependencies and timings
+            factory (Callable[[], Any]): Builds the component; may be a coroutine function
+            depends_on (Optional[List[str]]): Components that must be built first
+            required (bool): Whether a failure aborts startup; optional components
+                only log it and produce None
+
+        Returns:
+            StartupOrchestrator: self, for chaining
+        """
+        self._components[name] = _Component(name, factory, depends_on or [], required)
+        return self
+
+    async def _build(self, component: _Component, tasks: Dict[str, "asyncio.Task[Any]"]) -> Any:
+        for dependency in component.depends_on:
+            await tasks[dependency]
+
+        started_at = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(component.factory):
+                result = await component.factory()
+            else:
+                result = await asyncio.to_thread(component.factory)
+        except Exception:
+            if component.required:
+                raise
+            logger.exception(f"Optional startup component {component.name} failed")
+            result = None
+
+        elapsed = time.perf_counter() - started_at
+        self.timings[component.name] = elapsed
+        metrics.set_gauge("startup_seconds", elapsed, component=component.name)
+        logger.info(f"Started {component.name} in {elapsed:.2f}s")
+        return result
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Build every component.
+
+        Returns:
+            Dict[str, Any]: Each component by name
+
+        Raises:
+            ValueError: If a component depends on one that is not registered, or
+                dependencies form a cycle
+            Exception: The first failure of a required component
+        """
+        for component in self._components.values():
+            unknown = set(component.depends_on) - set(self._components)
+            if unknown:
+                raise ValueError(f"{component.name} depends on unknown components {sorted(unknown)}")
+        try:
+            graphlib.TopologicalSorter(
+                {name: component.depends_on for name, component in self._components.items()}
+            ).prepare()
+        except graphlib.CycleError as e:
+            raise ValueError(f"Startup components depend on each other: {e.args[1]}")
+
+        started_at = time.perf_counter()
+        tasks: Dict[str, "asyncio.Task[Any]"] = {}
+        for name, component in self._components.items():
+            tasks[name] = asyncio.create_task(self._build(component, tasks))
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except Exception:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        total = time.perf_counter() - started_at
+        self.timings["total"] = total
+        metrics.set_gauge("startup_seconds", total, component="total")
+        logger.info(
+            f"Startup finished in {total:.2f}s: "
+            + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.timings.items() if name != "total")
+        )
+        return dict(zip(tasks, results))
@@ -12,7 +12,7 @@ from creative_planner.state import State
 from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_openai import ChatOpenAI
+from campaign_planner.utils import get_model_registry, get_rate_limiter
 import logging
 
 logger = logging.getLogger("creative_planner.agents.base_process")
@@ -56,10 +56,8 @@ class BaseProcessNode(Runnable, ABC):
         try:
             self.MODEL_NAME = self.model_name
             self.processor = None  # No processor needed for GPT-4
-            self.model = ChatOpenAI(
-                model_name=self.model_name,
-                temperature=0.7,
-                api_key=self.config.get("openai_api_key")
+            self.model = get_model_registry(self.config).chat_model(
+                self.model_name, temperature=0.7
             )
         except Exception as e:
             logger.exception("Error loading model or processor")
@@ -90,6 +88,10 @@ class BaseProcessNode(Runnable, ABC):
             logger.error(f"The prompt YAML file '{prompt_file}' was not found.")
             raise e
 
+    def _rate_limiter(self):
+        """Process-wide rate limiter for this node's model"""
+        return get_rate_limiter(self.config, self.model.model_name)
+
     async def _invoke_llm(self, prompt: str) -> str:
         """Invoke the language model with the given prompt"""
         try:
@@ -100,7 +102,9 @@ class BaseProcessNode(Runnable, ABC):
             ]) | self.model | StrOutputParser()
             
             # Invoke the chain
-            result = await chain.ainvoke({"input": prompt})
+            result = await self._rate_limiter().ainvoke(
+                chain, {"input": prompt}, prompt=prompt
+            )
             return result
             
         except Exception as e:
@@ -4,12 +4,13 @@ from typing import Any, Dict, Optional
 from langchain_core.runnables import RunnableConfig
 from creative_planner.agents.base.process import BaseProcessNode
 from creative_planner.utils import get_module_logger, get_required_env_var
+from creative_planner.utils.artifacts import artifact_name, get_artifact_store, request_id_of
+from creative_planner.utils.image_providers import get_image_provider_engine
+from creative_planner.utils.error_handler import NyxAIException
 import logging
 from pathlib import Path
 import yaml
 from langchain.prompts import PromptTemplate
-import requests
-import tempfile
 
 logger = logging.getLogger("creative_planner.agents.image_analyzer")
 
@@ -107,7 +108,11 @@ class ImageAnalyzer(BaseProcessNode):
             logger.info("refined_prompt: %s", refined_prompt)
             # Regenerate image with refined prompt
             model_name = state.get("image_model", "Flux pro 1.1")
-            new_image_path = await self._regenerate_image(model_name, refined_prompt)
+            request_id = request_id_of(config)
+            new_image_path = await self._regenerate_image(
+                model_name, refined_prompt, request_id, artifact_name(state, "image_refined")
+            )
+            await get_artifact_store(self.config).flush(request_id)
             
             # Update state with new image path and analysis results
             logger.info("old_image_path: %s", image_path)
@@ -154,7 +159,7 @@ class ImageAnalyzer(BaseProcessNode):
             """
             
             # Get the mapped category using LLM
-            response = await self.model.ainvoke(mapping_prompt)
+            response = await self._rate_limiter().ainvoke(self.model, mapping_prompt)
             mapped_category = response.content.strip().lower()
             
             # Validate the mapped category
@@ -178,26 +183,27 @@ class ImageAnalyzer(BaseProcessNode):
             
             # Create the client with proper timeout and redirect following
             async with httpx.AsyncClient(timeout=self.alison_timeout, follow_redirects=True) as client:
-                # Check if file exists
-                if not os.path.isfile(image_path):
-                    logger.error(f"File '{image_path}' not found")
-                    return {"error": f"File '{image_path}' not found"}
+                try:
+                    image_data = await get_artifact_store(self.config).aget_bytes(image_path)
+                except NyxAIException as e:
+                    logger.error(f"Image '{image_path}' not found")
+                    return {"error": e.detail}
+
+                # Send the image bytes as they were generated
+                filename = os.path.basename(image_path)
+                files = {"image": (filename, image_data, "application/octet-stream")}
+                logger.info(f"Sending request to {self.alison_endpoint}")
+                logger.info(f"Request details:")
+                logger.info(f"- Category: {mapped_category}")
+                logger.info(f"- Image: {filename} ({len(image_data)} bytes)")
+                logger.info(f"- Content type: application/octet-stream")
+
+                response = await client.post(
+                    self.alison_endpoint,
+                    params=params,
+                    files=files
+                )
 
-                # Open and send the image file
-                with open(image_path, "rb") as img:
-                    files = {"image": (os.path.basename(image_path), img, "application/octet-stream")}
-                    logger.info(f"Sending request to {self.alison_endpoint}")
-                    logger.info(f"Request details:")
-                    logger.info(f"- Category: {mapped_category}")
-                    logger.info(f"- Image file: {os.path.basename(image_path)}")
-                    logger.info(f"- Content type: application/octet-stream")
-                    
-                    response = await client.post(
-                        self.alison_endpoint,
-                        params=params,
-                        files=files
-                    )
-                
                 # Log response details
                 logger.info(f"Response status: {response.status_code}")
                 logger.info(f"Response headers: {response.headers}")
@@ -259,103 +265,18 @@ class ImageAnalyzer(BaseProcessNode):
             
             
             # Generate refined prompt using the model
-            response = await self.model.ainvoke(messages)
+            response = await self._rate_limiter().ainvoke(self.model, messages)
             logger.info("response: %s", response)
             return response.content
         except Exception as e:
             logger.error(f"Error generating refined prompt: {str(e)}")
             raise
 
-    async def _regenerate_image(self, model_name: str, prompt: str) -> str:
-        """Regenerate the image using the specified model"""
+    async def _regenerate_image(self, model_name: str, prompt: str, request_id: str, name: str) -> str:
+        """Regenerate the image using the specified model, replacing the first one in memory"""
         try:
-            if model_name == "Flux pro 1.1":
-                image_url = self._handle_flux_pro(prompt)
-            elif model_name == "Reve 1.0":
-                image_url = self._handle_reve(prompt)
-            elif model_name == "Ideogram v2":
-                image_url = self._handle_ideogram(prompt)
-            else:
-                raise Exception(f"Unsupported model: {model_name}")
-
-            response = requests.get(image_url, stream=True)
-            response.raise_for_status()
-
-            tmpdir = tempfile.mkdtemp(prefix=f"{model_name.lower().replace(' ', '_')}_")
-            filename = os.path.basename(image_url.split("?")[0]) or "image.jpg"
-            path = os.path.join(tmpdir, filename)
-
-            with open(path, "wb") as f:
-                for chunk in response.iter_content(8192):
-                    f.write(chunk)
-
-            logger.info(f"Image saved to: {path}")
-            return path
-
+            result = await get_image_provider_engine(self.config).generate(model_name, prompt)
+            return await get_artifact_store(self.config).aput_bytes(request_id, name, result.data)
         except Exception as e:
             logger.error(f"Error regenerating image: {str(e)}")
             raise
-
-    def _handle_flux_pro(self, prompt: str) -> str:
-        """Handle Flux Pro 1.1 image generation"""
-        url_post = get_required_env_var("FLUX_API_HOST_POST")
-        url_get = get_required_env_var("FLUX_API_HOST_GET")
-        headers = {
-            "Content-Type": "application/json",
-            "x-key": get_required_env_var("NYX_BFL_FLUX_KEY")
-        }
-        payload = {
-            "prompt": prompt,
-            "width": 1024,
-            "height": 768
-        }
-
-        response = requests.post(url_post, headers=headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
-        image_id = data.get("id")
-
-        if not image_id:
-            raise Exception("Missing image ID in Flux Pro response")
-
-        max_attempts = 10
-        for _ in range(max_attempts):
-            result = requests.get(url_get, headers=headers, params={"id": image_id})
-            result.raise_for_status()
-            result_data = result.json()
-
-            status = result_data.get("status")
-            if status == "Ready":
-                return result_data["result"].get("sample")
-            elif status not in ["Pending", "InProgress"]:
-                raise Exception(f"Unexpected status: {status}")
-
-        raise Exception("Flux Pro image generation timed out")
-
-    def _handle_reve(self, prompt: str) -> str:
-        """Handle Reve 1.0 image generation"""
-        url = get_required_env_var("REVE_API_URL")
-        payload = {"prompt": prompt, "negative_prompt": "..."}
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        return response.json().get("result")
-
-    def _handle_ideogram(self, prompt: str) -> str:
-        """Handle Ideogram v2 image generation"""
-        url = get_required_env_var("IDEOGRAM_GENERATE_URL")
-        headers = {
-            "Api-Key": get_required_env_var("IDEOGRAM_KEY"),
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "image_request": {
-                "prompt": prompt,
-                "model": "V_2",
-                "style_type": "REALISTIC",
-                "aspect_ratio": "ASPECT_16_9",
-                "negative_prompt": "logos, lowres, bad anatomy, bad hands, text, error, missing fingers, extra digit, fewer digits, cropped, worst quality, low quality, normal quality, jpeg artifacts,signature, watermark, username, blurry"
-            }
-        }
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        return response.json()["data"][0].get("url") 
\ No newline at end of file
@@ -0,0 +1,245 @@
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional, Type
+
+import numpy as np
+import logging
+
+# torch and transformers are imported by the backends that need them, so that
+# importing the mask generator stays cheap until a model is actually loaded
+if TYPE_CHECKING:
+    import torch
+
+logger = logging.getLogger("creative_planner.agents.mask_generator.backends")
+
+DEFAULT_MODEL_NAME = "CIDAS/clipseg-rd64-refined"
+
+# Processor outputs fed to the model, in the order of the exported ONNX graph
+MODEL_INPUTS = ("input_ids", "pixel_values", "attention_mask")
+
+
+@dataclass(frozen=True)
+class MaskModelSpec:
+    """Which CLIPSeg weights to run and how; sent to the inference workers"""
+
+    model_name: str = DEFAULT_MODEL_NAME
+    backend: str = "torch"
+    onnx_path: str = "datastore/clipseg/model.onnx"
+    onnx_threads: int = 0
+
+    @classmethod
+    def from_options(cls, options: Dict) -> "MaskModelSpec":
+        """
+        Args:
+            options (Dict): The MASK_GENERATOR configuration section
+        """
+        return cls(
+            model_name=options.get("MODEL_NAME", DEFAULT_MODEL_NAME),
+            backend=options.get("BACKEND", "torch").lower(),
+            onnx_path=options.get("ONNX_PATH", cls.onnx_path),
+            onnx_threads=int(options.get("TORCH_THREADS", 0)),
+        )
+
+
+class MaskBackend(ABC):
+    """Runs the CLIPSeg forward pass on processor outputs"""
+
+    def __init__(self, spec: MaskModelSpec) -> None:
+        self.spec = spec
+
+    @abstractmethod
+    def predict(self, inputs: Dict[str, "torch.Tensor"]) -> np.ndarray:
+        """
+        Args:
+            inputs (Dict[str, torch.Tensor]): Processor outputs for a batch
+
+        Returns:
+            np.ndarray: Logits of shape (batch, height, width)
+        """
+        pass
+
+
+class TorchBackend(MaskBackend):
+    """Full-precision eager PyTorch"""
+
+    def __init__(self, spec: MaskModelSpec) -> None:
+        super().__init__(spec)
+        self.model = self._load()
+
+    def _load(self) -> "torch.nn.Module":
+        from transformers import CLIPSegForImageSegmentation
+
+        model = CLIPSegForImageSegmentation.from_pretrained(self.spec.model_name)
+        model.eval()
+        return model
+
+    def predict(self, inputs: Dict[str, "torch.Tensor"]) -> np.ndarray:
+        import torch
+
+        with torch.no_grad():
+            logits = self.model(**{name: inputs[name] for name in MODEL_INPUTS}).logits
+        batch_size = inputs["pixel_values"].shape[0]
+        return logits.reshape(batch_size, *logits.shape[-2:]).cpu().numpy()
+
+
+class TorchInt8Backend(TorchBackend):
+    """PyTorch with the linear layers dynamically quantized to int8"""
+
+    def _load(self) -> "torch.nn.Module":
+        import torch
+
+        return torch.quantization.quantize_dynamic(
+            super()._load(), {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+
+def export_onnx(model_name: str, path: str) -> None:
+    """
+    Export CLIPSeg to an ONNX graph with dynamic batch and text length.
+
+    Args:
+        model_name (str): Hugging Face model id
+        path (str): Destination of the .onnx file
+    """
+    import torch
+    from PIL import Image
+    from transformers import AutoProcessor, CLIPSegForImageSegmentation
+
+    class LogitsOnly(torch.nn.Module):
+        """Exposes only the logits, so the exported graph has a single output"""
+
+        def __init__(self, model: torch.nn.Module) -> None:
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, pixel_values, attention_mask):
+            return self.model(
+                input_ids=input_ids, pixel_values=pixel_values, attention_mask=attention_mask
+            ).logits
+
+    logger.info(f"Exporting {model_name} to ONNX at {path}")
+    processor = AutoProcessor.from_pretrained(model_name)
+    model = CLIPSegForImageSegmentation.from_pretrained(model_name)
+    model.eval()
+    sample = processor(
+        text=["background"],
+        images=[Image.new("RGB", (352, 352))],
+        padding=True,
+        return_tensors="pt",
+    )
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    torch.onnx.export(
+        LogitsOnly(model),
+        tuple(sample[name] for name in MODEL_INPUTS),
+        path,
+        input_names=list(MODEL_INPUTS),
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "pixel_values": {0: "batch"},
+            "logits": {0: "batch"},
+        },
+        opset_version=17,
+    )
+
+
+class OnnxBackend(MaskBackend):
+    """
+    The exported graph on ONNX Runtime's CPU provider.
+
+    The graph is exported from the torch weights on first use when ONNX_PATH
+    does not exist yet.
+    """
+
+    def __init__(self, spec: MaskModelSpec) -> None:
+        super().__init__(spec)
+        import onnxruntime
+
+        if not os.path.exists(spec.onnx_path):
+            export_onnx(spec.model_name, spec.onnx_path)
+
+        options = onnxruntime.SessionOptions()
+        if spec.onnx_threads > 0:
+            options.intra_op_num_threads = spec.onnx_threads
+        self.session = onnxruntime.InferenceSession(
+            spec.onnx_path, options, providers=["CPUExecutionProvider"]
+        )
+
+    def predict(self, inputs: Dict[str, "torch.Tensor"]) -> np.ndarray:
+        (logits,) = self.session.run(
+            ["logits"], {name: inputs[name].cpu().numpy() for name in MODEL_INPUTS}
+        )
+        batch_size = inputs["pixel_values"].shape[0]
+        return logits.reshape(batch_size, *logits.shape[-2:])
+
+
+BACKENDS: Dict[str, Type[MaskBackend]] = {
+    "torch": TorchBackend,
+    "torch_int8": TorchInt8Backend,
+    "onnx": OnnxBackend,
+}
+
+
+def build_backend(spec: MaskModelSpec) -> MaskBackend:
+    """
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    backend_class = BACKENDS.get(spec.backend)
+    if backend_class is None:
+        raise ValueError(
+            f"Unknown mask backend {spec.backend}, expected one of {', '.join(BACKENDS)}"
+        )
+    return backend_class(spec)
+
+
+def mask_iou(mask: np.ndarray, reference: np.ndarray) -> float:
+    """
+    Intersection over union of two binary masks.
+
+    Two empty masks are identical, so their IoU is 1.
+    """
+    mask = mask.astype(bool)
+    reference = reference.astype(bool)
+    union = np.logical_or(mask, reference).sum()
+    if union == 0:
+        return 1.0
+    return float(np.logical_and(mask, reference).sum() / union)
+
+
+def check_parity(
+    backend: MaskBackend,
+    reference: MaskBackend,
+    inputs: Dict[str, "torch.Tensor"],
+    threshold: float,
+    min_iou: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Compare the masks of a backend with those of a reference backend.
+
+    Args:
+        backend (MaskBackend): Backend under test
+        reference (MaskBackend): Usually the full-precision torch backend
+        inputs (Dict[str, torch.Tensor]): Processor outputs for a batch
+        threshold (float): Mask threshold, as used by the mask generator
+        min_iou (Optional[float]): Raise when any image falls below this IoU
+
+    Returns:
+        np.ndarray: IoU per image
+
+    Raises:
+        ValueError: If min_iou is given and not met
+    """
+    masks = 1 / (1 + np.exp(-backend.predict(inputs))) < threshold
+    reference_masks = 1 / (1 + np.exp(-reference.predict(inputs))) < threshold
+    ious = np.array([mask_iou(a, b) for a, b in zip(masks, reference_masks)])
+    if min_iou is not None and ious.min() < min_iou:
+        raise ValueError(
+            f"{backend.spec.backend} masks differ from {reference.spec.backend}: "
+            f"minimum IoU {ious.min():.3f} < {min_iou}"
+        )
+    return ious
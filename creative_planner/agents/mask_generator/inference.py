@@ -0,0 +1,490 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+from PIL import Image
+import logging
+
+from campaign_planner.utils.metrics import metrics
+from creative_planner.utils.error_handler import NyxAIException
+from creative_planner.agents.mask_generator.backends import (
+    MaskBackend,
+    MaskModelSpec,
+    build_backend,
+)
+
+logger = logging.getLogger("creative_planner.agents.mask_generator.inference")
+
+# CLIPSeg weights of the current process, shared by every graph instance and
+# loaded by the warmup or by the first batch computed in the process
+_models: Dict[MaskModelSpec, Tuple[Any, MaskBackend]] = {}
+_models_lock = threading.Lock()
+
+# Side of the blank image used to warm up a model
+WARMUP_IMAGE_SIZE = 352
+
+
+def _init_worker(torch_threads: int, seed: int, warmup_spec: Optional[MaskModelSpec] = None) -> None:
+    """Configure torch in a new inference worker, and load the model when warming up"""
+    import torch
+
+    if torch_threads > 0:
+        torch.set_num_threads(torch_threads)
+    # Set deterministic behavior for reproducibility
+    torch.manual_seed(seed)
+    np.random.seed(seed)
+    torch.backends.cudnn.deterministic = True
+    torch.backends.cudnn.benchmark = False
+
+    if warmup_spec is not None:
+        warm_up_model(warmup_spec)
+
+
+def load_clipseg(spec: MaskModelSpec = MaskModelSpec()) -> Tuple[Any, MaskBackend]:
+    """
+    Load the CLIPSeg processor and inference backend once per process.
+
+    Args:
+        spec (MaskModelSpec): Weights and backend to load
+
+    Returns:
+        Tuple[Any, MaskBackend]: The processor and the backend
+
+    Raises:
+        NyxAIException: If the weights cannot be loaded
+    """
+    with _models_lock:
+        if spec not in _models:
+            from transformers import AutoProcessor
+
+            started_at = time.monotonic()
+            try:
+                processor = AutoProcessor.from_pretrained(spec.model_name)
+                backend = build_backend(spec)
+            except Exception as e:
+                logger.exception("Error loading CLIPSeg model or processor")
+                raise NyxAIException(
+                    internal_code=7109,
+                    message="Error loading config or model for segmentation",
+                    detail=f"7109: {str(e)}"
+                )
+            load_seconds = time.monotonic() - started_at
+            metrics.observe("mask_model_load_seconds", load_seconds, backend=spec.backend)
+            logger.info(
+                f"Loaded {spec.model_name} with the {spec.backend} backend in {load_seconds:.1f}s"
+            )
+            _models[spec] = (processor, backend)
+        return _models[spec]
+
+
+def warm_up_model(spec: MaskModelSpec) -> Dict[str, float]:
+    """
+    Load the model if needed and run one forward pass on a blank image.
+
+    The first pass allocates the backend's buffers, so running it here keeps
+    that cost out of the first real mask.
+
+    Returns:
+        Dict[str, float]: load_seconds (0 when already loaded) and warmup_seconds
+    """
+    started_at = time.monotonic()
+    processor, backend = load_clipseg(spec)
+    loaded_at = time.monotonic()
+
+    inputs = processor(
+        text=["background"],
+        images=[Image.new("RGB", (WARMUP_IMAGE_SIZE, WARMUP_IMAGE_SIZE))],
+        padding=True,
+        return_tensors="pt",
+    )
+    backend.predict(inputs)
+    return {
+        "load_seconds": loaded_at - started_at,
+        "warmup_seconds": time.monotonic() - loaded_at,
+    }
+
+
+@dataclass
+class MaskRequest:
+    """One mask to compute; sent to the inference workers"""
+
+    image: Image.Image
+    threshold: float
+    text_prompt: str = "background"
+
+
+def _prepare_image(request: MaskRequest) -> Image.Image:
+    try:
+        return request.image.convert("RGB")
+    except Exception as e:
+        logger.exception("Error preparing image or processor input")
+        raise NyxAIException(
+            internal_code=7101,
+            message="Failed to preprocess image for segmentation",
+            detail=f"7101: {str(e)}"
+        )
+
+
+def _to_mask(request: MaskRequest, probs: np.ndarray, size: Tuple[int, int]) -> Image.Image:
+    mask = (probs < request.threshold).astype(np.uint8)
+
+    mask_img = Image.fromarray((mask * 255).astype(np.uint8))
+    return mask_img.resize(size, resample=Image.NEAREST)
+
+
+def _inference_error(e: Exception) -> NyxAIException:
+    logger.exception("Error during mask generation process")
+    return NyxAIException(
+        internal_code=7104,
+        message="Error analyzing image",
+        detail=f"7104: {str(e)}"
+    )
+
+
+def compute_masks(
+    spec: MaskModelSpec, requests: List[MaskRequest]
+) -> List[Union[Image.Image, NyxAIException]]:
+    """
+    Compute binary segmentation masks with one batched CLIPSeg forward pass.
+
+    Runs inside an inference worker: preprocessing, the forward pass and
+    resizing are all CPU bound. A request that fails does not fail the others.
+
+    Args:
+        spec (MaskModelSpec): Weights and backend to run
+        requests (List[MaskRequest]): Masks to compute
+
+    Returns:
+        List[Union[Image.Image, NyxAIException]]: Per request, the mask at the
+            size of its image or the error to raise to its caller
+    """
+    processor, backend = load_clipseg(spec)
+    results: List[Union[Image.Image, NyxAIException, None]] = [None] * len(requests)
+
+    images, indices = [], []
+    for index, request in enumerate(requests):
+        try:
+            images.append(_prepare_image(request))
+            indices.append(index)
+        except NyxAIException as e:
+            results[index] = e
+    if not indices:
+        return results
+
+    try:
+        inputs = processor(
+            text=[requests[index].text_prompt for index in indices],
+            images=images,
+            padding=True,
+            return_tensors="pt",
+        )
+    except Exception as e:
+        logger.exception("Error preparing image or processor input")
+        error = NyxAIException(
+            internal_code=7101,
+            message="Failed to preprocess image for segmentation",
+            detail=f"7101: {str(e)}"
+        )
+        for index in indices:
+            results[index] = error
+        return results
+
+    try:
+        # Inference
+        logits = backend.predict(inputs)
+        probs = 1 / (1 + np.exp(-logits))
+    except Exception as e:
+        error = _inference_error(e)
+        for index in indices:
+            results[index] = error
+        return results
+
+    # Post-processing
+    for position, index in enumerate(indices):
+        try:
+            results[index] = _to_mask(requests[index], probs[position], images[position].size)
+        except Exception as e:
+            results[index] = _inference_error(e)
+    return results
+
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32)
+
+QueuedMask = Tuple[MaskRequest, asyncio.Future, float]
+
+
+class MaskInferenceExecutor:
+    """
+    Runs CLIPSeg inference off the event loop, in micro-batches.
+
+    Concurrent mask requests are collected for up to MAX_WAIT_MS (or until
+    MAX_BATCH_SIZE are waiting) and computed with one batched forward pass,
+    which on CPU costs far less than one pass per image. Batches run in a
+    thread pool (sharing one copy of the weights) or a process pool (one copy
+    per process, no GIL contention with the API) of MAX_WORKERS, each worker
+    with its own torch intra-op thread count.
+
+    At most MAX_WORKERS * MAX_BATCH_SIZE + MAX_QUEUE masks are admitted at
+    once; callers wait up to QUEUE_TIMEOUT_SECONDS for a slot and are then
+    rejected, so a burst of creative jobs fails fast instead of piling up
+    behind the model.
+    """
+
+    def __init__(self, options: Dict[str, Any], seed: int = 42) -> None:
+        """
+        Args:
+            options (Dict[str, Any]): The MASK_GENERATOR configuration section
+            seed (int): Seed of the torch and numpy RNGs in every worker
+        """
+        self.spec = MaskModelSpec.from_options(options)
+        self.kind = options.get("EXECUTOR", "thread").lower()
+        self.max_workers = int(options.get("MAX_WORKERS", 1))
+        self.max_batch_size = int(options.get("MAX_BATCH_SIZE", 8))
+        self.max_wait_seconds = float(options.get("MAX_WAIT_MS", 10)) / 1000
+        self.max_queue = int(options.get("MAX_QUEUE", 8))
+        self.queue_timeout_seconds = float(options.get("QUEUE_TIMEOUT_SECONDS", 30))
+        self.eager = options.get("LOAD", "lazy").lower() == "eager"
+        torch_threads = int(options.get("TORCH_THREADS", 0))
+
+        # Nothing is loaded here: workers configure torch when they start,
+        # and load the model either then (eager) or with their first batch
+        if self.kind == "process":
+            self.executor: Executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(torch_threads, seed, self.spec if self.eager else None),
+            )
+        else:
+            if self.kind != "thread":
+                logger.warning(f"Unknown mask executor {self.kind}, using threads")
+                self.kind = "thread"
+            # Threads share the process-wide model cache, so warmup() loads it once
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="clipseg",
+                initializer=_init_worker,
+                initargs=(torch_threads, seed),
+            )
+        self._slots = asyncio.Semaphore(
+            self.max_workers * self.max_batch_size + self.max_queue
+        )
+        self._workers = asyncio.Semaphore(self.max_workers)
+        self._queue: "asyncio.Queue[QueuedMask]" = asyncio.Queue()
+        self._collector: Optional[asyncio.Task] = None
+        self._batches: Set[asyncio.Task] = set()
+        self._pending = 0
+        logger.info(
+            f"Mask inference runs on {self.spec.backend} in a {self.kind} pool of "
+            f"{self.max_workers}, batches of up to {self.max_batch_size}"
+        )
+
+    async def generate_mask(
+        self,
+        image: Image.Image,
+        threshold: float,
+        text_prompt: str = "background",
+    ) -> Image.Image:
+        """
+        Compute a mask in the next batch.
+
+        Args:
+            image (Image.Image): Image to segment; not modified
+            threshold (float): Probability below which a pixel is masked
+            text_prompt (str): What CLIPSeg segments
+
+        Returns:
+            Image.Image: Binary mask ("L") at the size of the image
+
+        Raises:
+            NyxAIException: If the queue stays full for QUEUE_TIMEOUT_SECONDS,
+                or inference fails
+        """
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            metrics.increment("mask_inference_rejected_total")
+            raise NyxAIException(
+                internal_code=7112,
+                message="Mask generator is overloaded",
+                detail=f"7112: No inference slot within {self.queue_timeout_seconds:.0f}s",
+                http_status_code=503
+            )
+
+        self._pending += 1
+        metrics.set_gauge("mask_inference_pending", self._pending)
+        try:
+            if self._collector is None or self._collector.done():
+                self._collector = asyncio.create_task(self._collect())
+            future = asyncio.get_running_loop().create_future()
+            request = MaskRequest(image, threshold, text_prompt)
+            self._queue.put_nowait((request, future, time.monotonic()))
+            return await future
+        finally:
+            self._pending -= 1
+            metrics.set_gauge("mask_inference_pending", self._pending)
+            self._slots.release()
+
+    async def _collect(self) -> None:
+        """Form batches as workers become free"""
+        batch: List[QueuedMask] = []
+        try:
+            while True:
+                await self._workers.acquire()
+                try:
+                    await self._fill_batch(batch)
+                except BaseException:
+                    self._workers.release()
+                    raise
+
+                task = asyncio.create_task(self._run_batch(batch))
+                self._batches.add(task)
+                task.add_done_callback(self._batches.discard)
+                batch = []
+        except BaseException:
+            # Stopped, on shutdown: nothing computes these masks any more
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(NyxAIException(
+                        internal_code=7104,
+                        message="Error analyzing image",
+                        detail="7104: Mask inference was stopped",
+                    ))
+            raise
+
+    async def _fill_batch(self, batch: List[QueuedMask]) -> None:
+        """Wait for a mask, then for more until the batch is full or MAX_WAIT_MS passed"""
+        loop = asyncio.get_running_loop()
+        while not batch:
+            self._add_live(batch, await self._queue.get())
+        deadline = loop.time() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            # Masks that queued while every worker was busy join at once
+            if not self._queue.empty():
+                self._add_live(batch, self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                self._add_live(batch, await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+    @staticmethod
+    def _add_live(batch: List[QueuedMask], queued: QueuedMask) -> None:
+        """Add a queued mask to the batch unless its caller was cancelled meanwhile"""
+        if not queued[1].done():
+            batch.append(queued)
+
+    async def _run_batch(self, batch: List[QueuedMask]) -> None:
+        started_at = time.monotonic()
+        for _, _, queued_at in batch:
+            metrics.observe("mask_queue_seconds", started_at - queued_at)
+        metrics.observe("mask_batch_size", len(batch), buckets=BATCH_SIZE_BUCKETS)
+
+        try:
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(
+                self.executor,
+                compute_masks,
+                self.spec,
+                [request for request, _, _ in batch],
+            )
+        except Exception as e:
+            results = [e] * len(batch)
+        finally:
+            self._workers.release()
+            metrics.observe("mask_inference_seconds", time.monotonic() - started_at)
+
+        for (_, future, _), result in zip(batch, results):
+            # The caller may have been cancelled while the batch ran
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def warmup(self) -> None:
+        """
+        Load the model and run a forward pass in the workers ahead of the first request.
+
+        Every process worker loads its own copy, so all of them are started.
+        """
+        started_at = time.monotonic()
+        loop = asyncio.get_running_loop()
+        calls = self.max_workers if self.kind == "process" else 1
+        # Process workers load their copy in the initializer; these calls
+        # start every worker and wait for it
+        await asyncio.gather(*[
+            loop.run_in_executor(self.executor, warm_up_model, self.spec)
+            for _ in range(calls)
+        ])
+        warmup_seconds = time.monotonic() - started_at
+        metrics.set_gauge("mask_warmup_seconds", warmup_seconds, backend=self.spec.backend)
+        logger.info(
+            f"Mask model warm in {warmup_seconds:.1f}s ({calls} {self.kind} worker(s))"
+        )
+
+    def shutdown(self) -> None:
+        if self._collector is not None:
+            self._collector.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: Optional[MaskInferenceExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_mask_executor(config: Dict[str, Any]) -> MaskInferenceExecutor:
+    """
+    Get the process-wide mask inference executor, creating it on first use.
+
+    Args:
+        config (Dict[str, Any]): Configuration containing the MASK_GENERATOR section
+
+    Returns:
+        MaskInferenceExecutor: The shared executor
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = MaskInferenceExecutor(
+                config.get("MASK_GENERATOR", {}),
+                seed=int(os.getenv("SEED", "42")),
+            )
+        return _executor
+
+
+def shutdown_mask_executor() -> None:
+    """Stop the shared executor's workers, if it was created"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
+
+
+async def warm_up_mask_executor(config: Dict[str, Any]) -> None:
+    """
+    Warm up the shared mask executor when MASK_GENERATOR.LOAD is eager.
+
+    Failures are logged, not raised: the model is then loaded by the first
+    mask instead, and the rest of the API starts normally.
+    """
+    executor = get_mask_executor(config)
+    if not executor.eager:
+        return
+    try:
+        await executor.warmup()
+    except Exception:
+        logger.exception("Mask model warmup failed, loading on first use instead")
@@ -1,11 +1,5 @@
-import os
-import tempfile
 from typing import Optional, Dict, Any
 
-import torch
-import numpy as np
-from PIL import Image
-from transformers import AutoProcessor, CLIPSegForImageSegmentation
 from langchain_core.runnables.config import RunnableConfig
 import logging
 
@@ -13,119 +7,60 @@ from creative_planner.agents.base.process import BaseProcessNode
 from creative_planner.state import State
 from creative_planner.utils.error_handler import NyxAIException
 from creative_planner.utils import get_required_env_var
+from creative_planner.utils.artifacts import artifact_name, get_artifact_store, request_id_of
+from creative_planner.agents.mask_generator.inference import get_mask_executor
 
 logger = logging.getLogger("creative_planner.agents.mask_generator")
 
-# Set deterministic behavior for reproducibility
-torch.manual_seed(int(get_required_env_var("SEED", "42")))
-np.random.seed(int(get_required_env_var("SEED", "42")))
-torch.backends.cudnn.deterministic = True
-torch.backends.cudnn.benchmark = False
-
 
 class MaskGenerator(BaseProcessNode):
     """Process implementation for mask generator agent"""
 
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
-        self._load_model()
 
     def _load_model(self):
-        """Load the CLIPSeg model and processor"""
-        try:
-            self.MODEL_NAME = "CIDAS/clipseg-rd64-refined"
-            # Load processor with the correct config file
-            self.processor = AutoProcessor.from_pretrained(
-                self.MODEL_NAME
-            )
-            # Load model
-            self.model = CLIPSegForImageSegmentation.from_pretrained(
-                self.MODEL_NAME
-            )
-            # Move model to appropriate device
-            # self.model = self.model.to(torch.device("cuda" if torch.cuda.is_available() else "cpu"))
-        except Exception as e:
-            logger.exception("Error loading CLIPSeg model or processor")
-            raise NyxAIException(
-                internal_code=7109,
-                message="Error loading config or model for segmentation",
-                detail=f"7109: {str(e)}"
-            )
+        """CLIPSeg is loaded by the inference workers; only attach to their executor"""
+        self.mask_executor = get_mask_executor(self.config)
 
     async def _generate_mask(
         self,
         image_path: str,
         threshold: float,
+        request_id: str,
         text_prompt: Optional[str] = "background",
-        model_name: Optional[str] = "mask",
-        save_format: Optional[str] = "PNG"
+        mask_name: Optional[str] = "mask",
     ) -> str:
         """
         Generates a binary segmentation mask for a given image and text prompt.
-        """
-        logger.info(f"Generating mask for prompt '{text_prompt}' on image: {image_path}")
 
-        try:
-            # Load and preprocess image
-            image = Image.open(image_path).convert("RGB")
-            orig_w, orig_h = image.size
-            inputs = self.processor(text=[text_prompt], images=[image], padding=True, return_tensors="pt")
-        except FileNotFoundError:
-            logger.exception(f"Image not found: {image_path}")
-            raise NyxAIException(
-                internal_code=7102,
-                message="Image file not found",
-                detail=f"7102: File '{image_path}' not found."
-            )
-        except Exception as e:
-            logger.exception("Error preparing image or processor input")
-            raise NyxAIException(
-                internal_code=7101,
-                message="Failed to preprocess image for segmentation",
-                detail=f"7101: {str(e)}"
-            )
-
-        try:
-            # Inference
-            with torch.no_grad():
-                outputs = self.model(**inputs)
+        The image is decoded once by the artifact store and the mask stays in
+        memory; inference runs in the mask executor's pool, off the event loop.
 
-            # Post-processing
-            
-            probs = outputs.logits.unsqueeze(1).sigmoid()[0, 0].cpu().numpy()
-            mask = (probs < threshold).astype(np.uint8)
-
-            mask_img = Image.fromarray((mask * 255).astype(np.uint8))
-            mask_resized = mask_img.resize((orig_w, orig_h), resample=Image.NEAREST)
-
-            tmpdir = tempfile.mkdtemp(prefix=f"{model_name.lower().replace(' ', '_')}_")
-            filename = os.path.splitext(os.path.basename(image_path))[0] + f"_mask.{save_format.lower()}"
-            out_path = os.path.join(tmpdir, filename)
-            mask_resized.save(out_path, format=save_format.upper())
-            
-            logger.info(f"Image at: {image_path}")
+        Returns:
+            str: Reference of the mask in the artifact store
+        """
+        logger.info(f"Generating mask for prompt '{text_prompt}' on image: {image_path}")
 
-            logger.info(f"Mask saved at: {out_path}")
-            return out_path
+        store = get_artifact_store(self.config)
+        image = await store.aget_image(image_path)
+        mask = await self.mask_executor.generate_mask(image, threshold, text_prompt=text_prompt)
+        mask_path = await store.aput_image(request_id, mask_name, mask)
 
-        except Exception as e:
-            logger.exception("Error during mask generation process")
-            raise NyxAIException(
-                internal_code=7104,
-                message="Error analyzing image",
-                detail=f"7104: {str(e)}"
-            )
+        logger.info(f"Image at: {image_path}")
+        logger.info(f"Mask stored at: {mask_path}")
+        return mask_path
 
     async def process(self, state: Dict[str, Any], config: RunnableConfig = None) -> Dict[str, Any]:
         """
         Process the state to generate a mask for the image.
 
         Args:
-            state: Current state containing the image path
+            state: Current state containing the image reference
             config: Optional configuration for the runnable
 
         Returns:
-            Dict[str, Any]: Updated state with the mask path
+            Dict[str, Any]: Updated state with the mask reference
         """
         logger.info("\n" + "="*80)
         logger.info("🚀 STARTING MASK GENERATOR AGENT")
@@ -152,13 +87,15 @@ class MaskGenerator(BaseProcessNode):
             logger.info(f"Threshold: {threshold}")
 
             # Generate mask
+            request_id = request_id_of(config)
             mask_path = await self._generate_mask(
                 image_path=image_path,
                 threshold=threshold,
+                request_id=request_id,
                 text_prompt="background",
-                model_name="mask",
-                save_format="PNG"
+                mask_name=artifact_name(state, "mask"),
             )
+            await get_artifact_store(self.config).flush(request_id)
 
             # Update state with mask path
             state["generated_mask_path"] = mask_path
@@ -185,6 +122,9 @@ class MaskGenerator(BaseProcessNode):
             for key, value in state.items():
                 logger.error(f"  - {key}: {value}")
             logger.error("="*80 + "\n")
+            # Back-pressure reaches the job as is, so callers can retry later
+            if isinstance(e, NyxAIException) and e.http_status_code == 503:
+                raise
             raise NyxAIException(
                 internal_code=7105,
                 message="Error generating mask",
@@ -1,7 +1,7 @@
 from typing import Dict, Any
 import yaml
 from langchain.prompts import PromptTemplate
-from langchain_community.chat_models import ChatOpenAI
+from campaign_planner.utils import get_model_registry, get_rate_limiter
 from creative_planner.utils import get_required_env_var
 from creative_planner.agents.base.process import BaseProcessNode
 import logging
@@ -22,7 +22,7 @@ class PromptGenerator(BaseProcessNode):
         self.model_name = get_required_env_var("PROMPT_MODEL_NAME", "gpt-4")
         self.temperature = float(get_required_env_var("PROMPT_TEMPERATURE", "0.5"))
 
-    def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    async def process(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Process the current state to generate creative prompts.
 
@@ -60,14 +60,15 @@ class PromptGenerator(BaseProcessNode):
             # Format the prompt with the input variables
             formatted_prompt = prompt_template.format(**input_vars)
             
-            # Initialize the LLM
-            llm = ChatOpenAI(
-                model_name=self.model_name,
-                temperature=self.temperature
+            # Get the shared LLM client
+            llm = get_model_registry(self.config).chat_model(
+                self.model_name, temperature=self.temperature
             )
             
             # Generate the system prompt using the LLM
-            response = llm.invoke(formatted_prompt)
+            response = await get_rate_limiter(self.config, self.model_name).ainvoke(
+                llm, formatted_prompt
+            )
             system_prompt = response.content
             logger.info(f"System Prompt: {system_prompt}")
             
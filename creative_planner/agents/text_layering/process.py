@@ -1,28 +1,33 @@
+import asyncio
+import io
 from typing import Dict, Any
+from PIL import Image
 from creative_planner.agents.base.process import BaseProcessNode
-import os
 import requests
 from creative_planner.utils import get_required_env_var
+from creative_planner.utils.artifacts import artifact_name, get_artifact_store, request_id_of
+from creative_planner.utils.storage import get_storage_backend
 import logging
 from creative_planner.utils.logging_config import configure_logging
 from creative_planner.utils.error_handler import NyxAIException
 from creative_planner.agents.base.process import RunnableConfig
+from creative_planner.agents.text_layering.renderer import TextOverlayRenderer
 
 # Configure logging
 configure_logging()
 logger = logging.getLogger("creative_planner.agents.text_layering")
 
-def generate_image(prompt: str, image_path: str, mask_path: str) -> str:
+def generate_image(prompt: str, image: bytes, mask: bytes) -> bytes:
     """
     Generate an image with text overlay using Ideogram API.
     
     Args:
         prompt (str): The text prompt describing the desired image
-        image_path (str): Path to the base image
-        mask_path (str): Path to the mask image
+        image (bytes): Encoded base image
+        mask (bytes): Encoded PNG mask
         
     Returns:
-        str: Local path to the generated image
+        bytes: The generated image
     """
     # Get API credentials and configuration
     url = get_required_env_var("IDEOGRAM_OVERLAY_URL", "https://api.ideogram.ai/edit")
@@ -31,41 +36,35 @@ def generate_image(prompt: str, image_path: str, mask_path: str) -> str:
     
     
     # Prepare files and data
-    with open(image_path, "rb") as img, open(mask_path, "rb") as mask:
-        files = {
-            "image_file": (os.path.basename(image_path), img, "image/jpeg"),
-            "mask": (os.path.basename(mask_path), mask, "image/png")
-        }
-        data = {
-            "prompt": prompt,
-            "model": model
-        }
-        
-        # Make the request
-        response = requests.post(
-            url,
-            headers={"Api-Key": api_key},
-            data=data,
-            files=files
-        )
-        
-        # Check for errors
-        response.raise_for_status()
-        
-        # Get the image URL from the response
-        result = response.json()
-        image_url = result["data"][0]["url"]
-        
-        # Download the image
-        image_response = requests.get(image_url)
-        image_response.raise_for_status()
+    files = {
+        "image_file": ("image.jpeg", image, "image/jpeg"),
+        "mask": ("mask.png", mask, "image/png")
+    }
+    data = {
+        "prompt": prompt,
+        "model": model
+    }
+    
+    # Make the request
+    response = requests.post(
+        url,
+        headers={"Api-Key": api_key},
+        data=data,
+        files=files
+    )
+    
+    # Check for errors
+    response.raise_for_status()
+    
+    # Get the image URL from the response
+    result = response.json()
+    image_url = result["data"][0]["url"]
+    
+    # Download the image
+    image_response = requests.get(image_url)
+    image_response.raise_for_status()
         
-        # Save the image locally
-        output_path = os.path.join(os.path.dirname(image_path), "output.png")
-        with open(output_path, "wb") as f:
-            f.write(image_response.content)
-            
-        return output_path
+    return image_response.content
 
 class TextLayeringProcess(BaseProcessNode):
     def __init__(self, config: Dict[str, Any]):
@@ -77,6 +76,13 @@ class TextLayeringProcess(BaseProcessNode):
         """
         super().__init__(config)
         self.logger = logger
+        self.signed_url_expiration = int(
+            config.get("STORAGE", {}).get("SIGNED_URL_EXPIRATION_SECONDS", 3600)
+        )
+        options = config.get("TEXT_LAYERING", {})
+        # local draws the text with Pillow; ideogram sends image and mask to the Ideogram edit API
+        self.renderer_name = options.get("RENDERER", "local").lower()
+        self.renderer = TextOverlayRenderer(options)
 
     async def process(self, state: Dict[str, Any], config: RunnableConfig = None) -> Dict[str, Any]:
         try:
@@ -119,20 +125,40 @@ class TextLayeringProcess(BaseProcessNode):
             if not cta:
                 cta = "Shop Now"
 
-            # Format the text overlay prompt
-            overlay_prompt = f"Add only the following text within the double quotes, directly onto the image, with no background, no box, no shadow, and no extra design elements:\nHeadline: \"{headline}\"\nSubheadline: \"{subheadline or ''}\"\nCTA: \"{cta}\"\nOnly include this text. Do not add any other characters, words, or symbols, Leave the rest of the space blank."
-            
-            self.logger.info(f"Generated overlay prompt: {overlay_prompt}")
+            self.logger.info(f"Rendering text with the {self.renderer_name} renderer")
             self.logger.info(f"Using image path: {image_path}")
             self.logger.info(f"Using mask path: {mask_path}")
 
             try:
-                # Apply text overlay using Ideogram API
-                output_path = generate_image(overlay_prompt, image_path, mask_path)
-                
-                # Update state with the new image path
-                state['image_url'] = output_path
-                self.logger.info(f"Text layered image saved to: {output_path}")
+                store = get_artifact_store(self.config)
+                if self.renderer_name == "ideogram":
+                    output = await self._render_with_ideogram(store, image_path, mask_path, headline, subheadline, cta)
+                else:
+                    image, mask = await asyncio.gather(
+                        store.aget_image(image_path), store.aget_image(mask_path)
+                    )
+                    output = await asyncio.to_thread(
+                        self._render_locally, image, mask, headline, subheadline, cta
+                    )
+
+                request_id = request_id_of(config)
+                output_name = artifact_name(state, "output")
+                # Read by no later stage, so it is not uploaded under DURABLE_PREFIX
+                output_path = await store.aput_bytes(request_id, output_name, output, durable=False)
+                state['output_image_path'] = output_path
+                self.logger.info(f"Text layered image stored at: {output_path}")
+
+                # Upload the final creative once; the API serves the signed URL
+                # from the state. The blob is named after the request, so a
+                # retried job overwrites it instead of adding another
+                blob_name = f"image_gen_agents/{request_id}/{output_name}.jpeg"
+                storage = get_storage_backend(self.config)
+                await storage.upload(output, blob_name)
+                signed_url, expires_at = await storage.sign_blob(blob_name, self.signed_url_expiration)
+                state['output_blob_name'] = blob_name
+                state['signed_url'] = signed_url
+                state['signed_url_expires_at'] = expires_at
+                self.logger.info(f"Text layered image uploaded to: {blob_name}")
                 self.logger.info("Text layering completed successfully")
                 
                 logger.info("\n" + "="*80)
@@ -187,4 +213,22 @@ class TextLayeringProcess(BaseProcessNode):
             for key, value in state.items():
                 logger.error(f"  - {key}: {value}")
             logger.error("="*80 + "\n")
-            raise 
\ No newline at end of file
+            raise 
+
+    def _render_locally(self, image: Image.Image, mask: Image.Image, headline: str, subheadline: str, cta: str) -> bytes:
+        """Draw the text with Pillow; deterministic and without network calls"""
+        output = self.renderer.render(image, mask, headline, subheadline, cta)
+        buffer = io.BytesIO()
+        output.save(buffer, format="JPEG", quality=95)
+        return buffer.getvalue()
+
+    async def _render_with_ideogram(self, store, image_path: str, mask_path: str, headline: str, subheadline: str, cta: str) -> bytes:
+        """Ask the Ideogram edit API to paint the text into the masked region"""
+        # Format the text overlay prompt
+        overlay_prompt = f"Add only the following text within the double quotes, directly onto the image, with no background, no box, no shadow, and no extra design elements:\nHeadline: \"{headline}\"\nSubheadline: \"{subheadline or ''}\"\nCTA: \"{cta}\"\nOnly include this text. Do not add any other characters, words, or symbols, Leave the rest of the space blank."
+        self.logger.info(f"Generated overlay prompt: {overlay_prompt}")
+
+        image, mask = await asyncio.gather(store.aget_bytes(image_path), store.aget_bytes(mask_path))
+
+        # Apply text overlay using Ideogram API
+        return await asyncio.to_thread(generate_image, overlay_prompt, image, mask)
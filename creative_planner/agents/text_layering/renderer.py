@@ -0,0 +1,265 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+import logging
+
+logger = logging.getLogger("creative_planner.agents.text_layering.renderer")
+
+# Fonts tried when FONT_PATH is not set; Pillow's own font is the last resort
+DEFAULT_FONTS = ("DejaVuSans-Bold.ttf", "Arial Bold.ttf", "arialbd.ttf")
+
+# Columns of the grid the free region is searched on
+GRID_COLUMNS = 64
+
+Box = Tuple[int, int, int, int]
+Color = Tuple[int, int, int]
+
+
+@lru_cache(maxsize=256)
+def _load_font(path: Optional[str], size: int) -> ImageFont.FreeTypeFont:
+    for candidate in ([path] if path else []) + list(DEFAULT_FONTS):
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+def _relative_luminance(color: Color) -> float:
+    channels = []
+    for value in color:
+        value = value / 255
+        channels.append(value / 12.92 if value <= 0.03928 else ((value + 0.055) / 1.055) ** 2.4)
+    return 0.2126 * channels[0] + 0.7152 * channels[1] + 0.0722 * channels[2]
+
+
+def contrast_ratio(first: Color, second: Color) -> float:
+    """WCAG contrast ratio of two colors, from 1 (none) to 21"""
+    lighter, darker = sorted((_relative_luminance(first), _relative_luminance(second)), reverse=True)
+    return (lighter + 0.05) / (darker + 0.05)
+
+
+def largest_free_box(free: np.ndarray, columns: int = GRID_COLUMNS) -> Optional[Box]:
+    """
+    Largest axis-aligned rectangle of free pixels.
+
+    The mask is reduced to a grid of square cells, a cell being free when
+    all of its pixels are, and the maximal rectangle is found row by row
+    with the histogram method.
+
+    Args:
+        free (np.ndarray): Boolean array, True where text may go
+        columns (int): Grid columns
+
+    Returns:
+        Optional[Box]: (left, top, right, bottom) in pixels, or None if nothing is free
+    """
+    height, width = free.shape
+    cell = max(1, width // columns)
+    rows, columns = height // cell, width // cell
+    if rows == 0 or columns == 0:
+        return None
+    cells = free[:rows * cell, :columns * cell].reshape(rows, cell, columns, cell).all(axis=(1, 3))
+
+    best, best_area = None, 0
+    heights = np.zeros(columns, dtype=int)
+    for row in range(rows):
+        heights = np.where(cells[row], heights + 1, 0)
+        stack: List[int] = []
+        for column in range(columns + 1):
+            current = heights[column] if column < columns else 0
+            while stack and heights[stack[-1]] >= current:
+                top = heights[stack.pop()]
+                left = stack[-1] + 1 if stack else 0
+                area = top * (column - left)
+                if area > best_area:
+                    best_area = area
+                    best = (left, row - top + 1, column, row + 1)
+            stack.append(column)
+
+    if best is None:
+        return None
+    left, top, right, bottom = best
+    return (left * cell, top * cell, right * cell, bottom * cell)
+
+
+def _wrap(text: str, font: ImageFont.FreeTypeFont, width: int) -> Optional[List[str]]:
+    """Greedy word wrap; None when a single word is wider than the box"""
+    lines: List[str] = []
+    for word in text.split():
+        if font.getlength(word) > width:
+            return None
+        if lines and font.getlength(f"{lines[-1]} {word}") <= width:
+            lines[-1] = f"{lines[-1]} {word}"
+        else:
+            lines.append(word)
+    return lines
+
+
+@dataclass
+class _Block:
+    """One text element laid out at a font size"""
+
+    lines: List[str]
+    font: ImageFont.FreeTypeFont
+    line_height: int
+    padding: Tuple[int, int] = (0, 0)
+
+    @property
+    def width(self) -> int:
+        return int(max(self.font.getlength(line) for line in self.lines)) + 2 * self.padding[0]
+
+    @property
+    def height(self) -> int:
+        return self.line_height * len(self.lines) + 2 * self.padding[1]
+
+
+class TextOverlayRenderer:
+    """
+    Draws the headline, subheadline and CTA button onto a creative with Pillow.
+
+    The text goes into the largest rectangle that the mask leaves free (black
+    mask pixels, as sent to the Ideogram edit API). The headline size is the
+    largest that lets the whole stack fit, found by binary search; the
+    subheadline and CTA scale with it. Text and button colors are chosen for
+    contrast with the pixels they are drawn on. When the free region is too
+    small, the text goes on a translucent band at the bottom of the image.
+    """
+
+    def __init__(self, options: Dict[str, Any]) -> None:
+        """
+        Args:
+            options (Dict[str, Any]): The TEXT_LAYERING configuration section
+        """
+        self.font_path = options.get("FONT_PATH")
+        self.min_font_size = int(options.get("MIN_FONT_SIZE", 14))
+        self.max_font_size = int(options.get("MAX_FONT_SIZE", 160))
+        self.subheadline_scale = float(options.get("SUBHEADLINE_SCALE", 0.5))
+        self.cta_scale = float(options.get("CTA_SCALE", 0.45))
+        self.margin = float(options.get("MARGIN", 0.04))
+        self.min_free_fraction = float(options.get("MIN_FREE_FRACTION", 0.08))
+
+    def _layout(self, headline: str, subheadline: str, cta: str, size: int, width: int) -> Optional[List[_Block]]:
+        blocks = []
+        for text, scale in ((headline, 1.0), (subheadline, self.subheadline_scale)):
+            if not text:
+                continue
+            font = _load_font(self.font_path, max(1, int(size * scale)))
+            lines = _wrap(text, font, width)
+            if lines is None:
+                return None
+            blocks.append(_Block(lines, font, int(font.size * 1.2)))
+        if cta:
+            font = _load_font(self.font_path, max(1, int(size * self.cta_scale)))
+            padding = (font.size, font.size // 2)
+            lines = _wrap(cta, font, width - 2 * padding[0])
+            if lines is None:
+                return None
+            blocks.append(_Block(lines, font, int(font.size * 1.2), padding))
+        return blocks
+
+    def _fit(self, headline: str, subheadline: str, cta: str, box: Box) -> Tuple[List[_Block], int]:
+        """Largest font size whose layout fits the box, with the gap between blocks"""
+        width, height = box[2] - box[0], box[3] - box[1]
+        low, high = self.min_font_size, self.max_font_size
+        best = None
+        while low <= high:
+            size = (low + high) // 2
+            blocks = self._layout(headline, subheadline, cta, size, width)
+            gap = size // 2
+            if blocks is not None and sum(block.height for block in blocks) + gap * (len(blocks) - 1) <= height:
+                best = (blocks, gap)
+                low = size + 1
+            else:
+                high = size - 1
+        if best is None:
+            # Nothing fits: draw at the minimum size and let it overflow the box
+            size = self.min_font_size
+            blocks = self._layout(headline, subheadline, cta, size, 10 ** 6)
+            best = (blocks, size // 2)
+        return best
+
+    def _text_box(self, image: Image.Image, mask: Image.Image) -> Tuple[Box, bool]:
+        """The box text goes into, and whether it needs a backing band"""
+        free = np.asarray(mask.convert("L").resize(image.size, Image.NEAREST)) < 128
+        width, height = image.size
+        box = largest_free_box(free)
+        if box is not None:
+            area = (box[2] - box[0]) * (box[3] - box[1])
+            if area >= self.min_free_fraction * width * height:
+                return box, False
+        logger.info("Mask leaves too little free space, using a bottom band")
+        return (0, int(height * 0.7), width, height), True
+
+    def render(self, image: Image.Image, mask: Image.Image, headline: str, subheadline: str, cta: str) -> Image.Image:
+        """
+        Args:
+            image (Image.Image): The creative; not modified
+            mask (Image.Image): Its mask, black where text may go
+            headline (str): Headline text
+            subheadline (str): Subheadline text
+            cta (str): Call-to-action button label
+
+        Returns:
+            Image.Image: A new RGB image with the text drawn on it
+        """
+        canvas = image.convert("RGB")
+        box, banded = self._text_box(canvas, mask)
+        inset_x = int((box[2] - box[0]) * self.margin) + 1
+        inset_y = int((box[3] - box[1]) * self.margin) + 1
+        box = (box[0] + inset_x, box[1] + inset_y, box[2] - inset_x, box[3] - inset_y)
+
+        background = tuple(int(value) for value in np.asarray(canvas.crop(box)).reshape(-1, 3).mean(axis=0))
+        if banded:
+            # Darken the band so light text reads on any image
+            band = Image.new("RGB", canvas.size, (0, 0, 0))
+            band_mask = Image.new("L", canvas.size, 0)
+            ImageDraw.Draw(band_mask).rectangle((0, box[1] - inset_y, canvas.width, canvas.height), fill=140)
+            canvas = Image.composite(band, canvas, band_mask)
+            background = tuple(int(value * 0.45) for value in background)
+
+        text_color = max(((255, 255, 255), (20, 20, 20)), key=lambda color: contrast_ratio(color, background))
+        button_color = self._button_color(canvas.crop(box), background, text_color)
+        button_text_color = max(((255, 255, 255), (20, 20, 20)), key=lambda color: contrast_ratio(color, button_color))
+
+        blocks, gap = self._fit(headline, subheadline, cta, box)
+        draw = ImageDraw.Draw(canvas)
+        total_height = sum(block.height for block in blocks) + gap * (len(blocks) - 1)
+        top = box[1] + max(0, (box[3] - box[1] - total_height) // 2)
+        center = (box[0] + box[2]) // 2
+        for index, block in enumerate(blocks):
+            is_button = bool(cta) and index == len(blocks) - 1
+            if is_button:
+                left = center - block.width // 2
+                radius = block.height // 4
+                draw.rounded_rectangle(
+                    (left, top, left + block.width, top + block.height), radius=radius, fill=button_color
+                )
+            y = top + block.padding[1]
+            for line in block.lines:
+                draw.text(
+                    (center, y),
+                    line,
+                    font=block.font,
+                    fill=button_text_color if is_button else text_color,
+                    anchor="ma",
+                )
+                y += block.line_height
+            top += block.height + gap
+        return canvas
+
+    @staticmethod
+    def _button_color(region: Image.Image, background: Color, text_color: Color) -> Color:
+        """The most saturated of the region's dominant colors, when it stands out; else the text color"""
+        palette = region.convert("RGB").resize((64, 64)).quantize(colors=6).convert("RGB")
+        colors = [color for _, color in sorted(palette.getcolors(), reverse=True)]
+        candidates = [
+            color for color in colors
+            if contrast_ratio(color, background) >= 3 and max(color) - min(color) > 60
+        ]
+        if candidates:
+            return max(candidates, key=lambda color: max(color) - min(color))
+        return text_color
@@ -1,4 +1,9 @@
-from langgraph.graph import StateGraph
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Tuple
+from langchain_core.runnables import RunnableConfig
+from langgraph.constants import Send
+from langgraph.graph import END, StateGraph
 from creative_planner.agents.base.graph import BaseGraph
 from creative_planner.agents.prompt_generator.graph import PromptGeneratorGraph
 from creative_planner.agents.image_generator.graph import ImageGeneratorGraph
@@ -7,15 +12,106 @@ from creative_planner.agents.mask_generator.graph import MaskGeneratorGraph
 from creative_planner.agents.cta_generator.graph import CTAGeneratorGraph
 from creative_planner.agents.text_layering.graph import TextLayeringGraph
 from creative_planner.state import State
+from creative_planner.utils.artifacts import request_id_of
+
+# Fields of a finished variant kept in the plan state
+VARIANT_FIELDS = (
+    "variant_index",
+    "image_prompt",
+    "generated_image_path",
+    "generated_mask_path",
+    "output_image_path",
+    "output_blob_name",
+    "signed_url",
+    "signed_url_expires_at",
+)
+
+
+class _RequestSlots:
+    """Per-request semaphores, dropped when the last variant of the request finishes"""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._slots: Dict[str, Tuple[asyncio.Semaphore, int]] = {}
+
+    @asynccontextmanager
+    async def acquire(self, request_id: str):
+        semaphore, users = self._slots.get(request_id, (asyncio.Semaphore(self.limit), 0))
+        self._slots[request_id] = (semaphore, users + 1)
+        try:
+            async with semaphore:
+                yield
+        finally:
+            semaphore, users = self._slots[request_id]
+            if users == 1:
+                del self._slots[request_id]
+            else:
+                self._slots[request_id] = (semaphore, users - 1)
+
+
+class CreativeVariantGraph(BaseGraph):
+    """Graph generating one creative variant: image, analysis, mask and text"""
+
+    def _build_graph(self) -> StateGraph:
+        """
+        Build the graph structure of one variant.
+
+        Returns:
+            StateGraph: Configured graph for one variant
+        """
+        graph = StateGraph(State)
+
+        graph.add_node("image_generator", ImageGeneratorGraph(self.config).get_compiled_graph())
+        graph.add_node("image_analyzer", ImageAnalyzerGraph(self.config).get_compiled_graph())
+        graph.add_node("mask_generator", MaskGeneratorGraph(self.config).get_compiled_graph())
+        graph.add_node("text_layering", TextLayeringGraph(self.config).get_compiled_graph())
+
+        graph.set_entry_point("image_generator")
+        graph.add_edge("image_generator", "image_analyzer")
+        graph.add_edge("image_analyzer", "mask_generator")
+        graph.add_edge("mask_generator", "text_layering")
+        graph.set_finish_point("text_layering")
+
+        return graph
+
+    def get_input_schema(self) -> type:
+        """
+        Get the input schema for the graph.
+
+        Returns:
+            type: The State class
+        """
+        return State
+
+    def get_output_schema(self) -> type:
+        """
+        Get the output schema for the graph.
+
+        Returns:
+            type: The State class
+        """
+        return State
 
 
 class CreativePlanner(BaseGraph):
     """Main graph implementation for creative planner workflow"""
 
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self.variant_slots = _RequestSlots(
+            int(config.get("CREATIVE_VARIANTS", {}).get("MAX_CONCURRENCY", 4))
+        )
+        self.variant_graph = None
+
     def _build_graph(self) -> StateGraph:
         """
         Build the graph structure for creative planning.
 
+        The prompt and the headline, subheadline and CTA are generated once
+        per request. The request then fans out into num_variants concurrent
+        branches, each generating, analyzing, masking and layering its own
+        image, at most CREATIVE_VARIANTS.MAX_CONCURRENCY at a time.
+
         Returns:
             StateGraph: Configured graph for creative planning
         """
@@ -24,76 +120,44 @@ class CreativePlanner(BaseGraph):
 
         # Create the nodes
         prompt_generator = PromptGeneratorGraph(self.config)
-        image_generator = ImageGeneratorGraph(self.config)
-        image_analyzer = ImageAnalyzerGraph(self.config)
-        mask_generator = MaskGeneratorGraph(self.config)
         cta_generator = CTAGeneratorGraph(self.config)
-        text_layering = TextLayeringGraph(self.config)
+        self.variant_graph = CreativeVariantGraph(self.config).get_compiled_graph()
 
         # Add the nodes to the graph
         graph.add_node(
             "prompt_generator",
             prompt_generator.get_compiled_graph()
         )
-        graph.add_node(
-            "image_generator",
-            image_generator.get_compiled_graph()
-        )
-        graph.add_node(
-            "image_analyzer",
-            image_analyzer.get_compiled_graph()
-        )
-        graph.add_node(
-            "mask_generator",
-            mask_generator.get_compiled_graph()
-        )
         graph.add_node(
             "cta_generator",
             cta_generator.get_compiled_graph()
         )
         graph.add_node(
-            "text_layering",
-            text_layering.get_compiled_graph()
+            "creative_variant",
+            self._generate_variant
         )
 
         # Set the entry point
         graph.set_entry_point("prompt_generator")
 
         # Add edges
-        graph.add_edge("prompt_generator", "image_generator")
-        graph.add_edge("image_generator", "image_analyzer")
-        graph.add_edge("image_analyzer", "mask_generator")
-        graph.add_edge("mask_generator", "cta_generator")
-        graph.add_edge("cta_generator", "text_layering")
-
-        # Set the finish point
-        graph.set_finish_point("text_layering")
+        graph.add_edge("prompt_generator", "cta_generator")
+        graph.add_conditional_edges("cta_generator", self._fan_out, ["creative_variant"])
+        graph.add_edge("creative_variant", END)
 
         # Configure state passing using the correct method
         graph.config = {
             "recursion_limit": 1,
             "state_updates": {
                 "prompt_generator": {
-                    "next": "image_generator",
-                    "state": lambda x: x
-                },
-                "image_generator": {
-                    "next": "image_analyzer",
-                    "state": lambda x: x
-                },
-                "image_analyzer": {
-                    "next": "mask_generator",
-                    "state": lambda x: x
-                },
-                "mask_generator": {
                     "next": "cta_generator",
                     "state": lambda x: x
                 },
                 "cta_generator": {
-                    "next": "text_layering",
+                    "next": "creative_variant",
                     "state": lambda x: x
                 },
-                "text_layering": {
+                "creative_variant": {
                     "next": None,
                     "state": lambda x: x
                 }
@@ -102,6 +166,21 @@ class CreativePlanner(BaseGraph):
 
         return graph
 
+    @staticmethod
+    def _fan_out(state: Dict[str, Any]) -> List[Send]:
+        """Start one branch per requested variant"""
+        shared = {key: value for key, value in state.items() if key != "variants"}
+        return [
+            Send("creative_variant", {**shared, "variant_index": index})
+            for index in range(max(1, int(state.get("num_variants") or 1)))
+        ]
+
+    async def _generate_variant(self, state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+        """Run one variant branch; only its summary is merged into the plan state"""
+        async with self.variant_slots.acquire(request_id_of(config)):
+            result = await self.variant_graph.ainvoke(state, config)
+        return {"variants": [{field: result.get(field) for field in VARIANT_FIELDS}]}
+
     def get_input_schema(self) -> type:
         """
         Get the input schema for the graph.
@@ -1,4 +1,5 @@
-from typing import Annotated, Dict, List
+import operator
+from typing import Annotated, Any, Dict, List
 from langgraph.graph import MessagesState
 
 
@@ -25,12 +26,20 @@ class State(MessagesState):
     total_budget: Annotated[float, "The total daily budget predicted to run a campaign based on the previous outputs"]
     channel_budget_allocation: Annotated[Dict[str, float], "A dictionary with the recommended channel names as keys and their respective daily budget allocations"]
     system_prompt: Annotated[str, "Generated creative prompts for the campaign"]
-    generated_image_path: Annotated[str, "Path to the generated image file"]
+    generated_image_path: Annotated[str, "Artifact reference of the generated image"]
     initial_prompt: Annotated[str, "Initial prompt used for image generation"]
     image_prompt: Annotated[str, "Final prompt used for image generation"]
     image_analysis: Annotated[str, "Analysis of the generated image"]
-    generated_mask_path: Annotated[str, "Path to the generated mask file"]
+    generated_mask_path: Annotated[str, "Artifact reference of the generated mask"]
     headline: Annotated[str, "Generated headline for the ad"]
     subheadline: Annotated[str, "Generated subheadline for the ad"]
     cta: Annotated[str, "Generated call-to-action text"]
-    user_prompt: Annotated[str, "Optional user-provided creative direction or specific requirements for the campaign"] 
\ No newline at end of file
+    output_image_path: Annotated[str, "Artifact reference of the final text-layered image"]
+    output_blob_name: Annotated[str, "Storage blob the final image was uploaded to"]
+    signed_url: Annotated[str, "Signed URL of the uploaded final image"]
+    signed_url_expires_at: Annotated[float, "Expiry of the signed URL as a Unix timestamp"]
+    user_prompt: Annotated[str, "Optional user-provided creative direction or specific requirements for the campaign"] 
+    num_variants: Annotated[int, "Number of creatives generated concurrently for the request"]
+    variant_index: Annotated[int, "Index of the variant a branch generates, from 0"]
+    # One entry per finished variant, appended by the concurrent branches
+    variants: Annotated[List[Dict[str, Any]], operator.add]
@@ -0,0 +1,449 @@
+import asyncio
+import io
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+from PIL import Image
+from langchain_core.runnables import RunnableConfig
+from campaign_planner.utils.metrics import metrics
+from creative_planner.utils.error_handler import NyxAIException
+from creative_planner.utils.storage import StorageBackend, get_storage_backend
+import logging
+
+logger = logging.getLogger("creative_planner.utils.artifacts")
+
+ARTIFACT_SCHEME = "artifact://"
+
+
+@dataclass
+class _Artifact:
+    data: Optional[bytes]
+    image: Optional[Image.Image]
+    image_format: str
+    expires_at: float
+
+    @property
+    def size(self) -> int:
+        size = len(self.data) if self.data is not None else 0
+        if self.image is not None:
+            size += self.image.width * self.image.height * len(self.image.getbands())
+        return size
+
+
+class ArtifactStore:
+    """
+    Images passed between creative stages, keyed by request.
+
+    Stages keep a reference such as "artifact://<request_id>/mask" in the
+    graph state instead of a temp file path. Encoded bytes and decoded
+    images are both kept, so a stage that needs pixels never decodes the
+    same bytes twice and one that needs bytes never re-encodes.
+
+    Entries expire after TTL_SECONDS. When MAX_MEMORY_MB is exceeded the
+    least recently used entries are spilled to SPILL_DIR and read back on
+    demand. Artifacts that another process must read can be written through
+    to disk as well.
+
+    With a storage backend, the async methods also upload durable artifacts
+    under DURABLE_PREFIX in the background, and read them back when they are
+    in neither memory nor SPILL_DIR. A stage awaits flush before it returns,
+    so a checkpoint never refers to an artifact that is not uploaded yet,
+    and a job resumed from it, after a restart or on another worker, finds
+    the artifacts its earlier stages produced.
+    """
+
+    def __init__(self, options: Dict[str, Any], backend: Optional[StorageBackend] = None) -> None:
+        """
+        Args:
+            options (Dict[str, Any]): The ARTIFACTS configuration section
+            backend (Optional[StorageBackend]): Durable storage for artifacts; None keeps them local
+        """
+        self.ttl_seconds = float(options.get("TTL_SECONDS", 3600))
+        self.max_memory_bytes = int(options.get("MAX_MEMORY_MB", 512)) * 1024 * 1024
+        self.spill_to_disk = bool(options.get("SPILL_TO_DISK", True))
+        self.spill_dir = Path(options.get("SPILL_DIR", "datastore/artifacts"))
+        self.sweep_interval_seconds = float(options.get("SWEEP_INTERVAL_SECONDS", 60))
+        self.durable_prefix = options.get("DURABLE_PREFIX", "artifacts")
+        self.backend = backend
+
+        self._entries: "OrderedDict[str, _Artifact]" = OrderedDict()
+        self._memory_bytes = 0
+        self._swept_at = time.monotonic()
+        self._lock = threading.RLock()
+        self._uploads: Dict[str, Set[asyncio.Task]] = {}
+
+    @staticmethod
+    def key(request_id: str, name: str) -> str:
+        return f"{ARTIFACT_SCHEME}{request_id}/{name}"
+
+    @staticmethod
+    def is_artifact(reference: Optional[str]) -> bool:
+        return bool(reference) and reference.startswith(ARTIFACT_SCHEME)
+
+    def _spill_path(self, key: str) -> Path:
+        return self.spill_dir / key[len(ARTIFACT_SCHEME):]
+
+    def _blob_name(self, key: str) -> str:
+        return f"{self.durable_prefix}/{key[len(ARTIFACT_SCHEME):]}"
+
+    def put_bytes(
+        self,
+        request_id: str,
+        name: str,
+        data: bytes,
+        persist: bool = False,
+    ) -> str:
+        """
+        Store encoded image bytes.
+
+        Args:
+            request_id (str): Request (thread) the artifact belongs to
+            name (str): Artifact name within the request, e.g. "image"
+            data (bytes): Encoded image
+            persist (bool): Also write through to SPILL_DIR, for artifacts
+                read by other processes
+
+        Returns:
+            str: Reference to keep in the graph state
+        """
+        key = self.key(request_id, name)
+        self._put(key, _Artifact(data, None, "PNG", time.monotonic() + self.ttl_seconds))
+        if persist:
+            self._write(key, data)
+        return key
+
+    def put_image(
+        self,
+        request_id: str,
+        name: str,
+        image: Image.Image,
+        image_format: str = "PNG",
+        persist: bool = False,
+    ) -> str:
+        """
+        Store a decoded image; it is encoded only if a stage asks for bytes.
+
+        Returns:
+            str: Reference to keep in the graph state
+        """
+        key = self.key(request_id, name)
+        artifact = _Artifact(None, image, image_format, time.monotonic() + self.ttl_seconds)
+        self._put(key, artifact)
+        if persist:
+            self._write(key, self.get_bytes(key))
+        return key
+
+    def get_bytes(self, reference: str) -> bytes:
+        """
+        Get the encoded bytes of an artifact.
+
+        Plain file paths, as found in checkpoints written before artifacts,
+        are read from disk.
+
+        Raises:
+            NyxAIException: If the artifact expired or does not exist
+        """
+        if not self.is_artifact(reference):
+            return self._read(Path(reference), reference)
+
+        with self._lock:
+            artifact = self._get(reference)
+            if artifact is None:
+                return self._read(self._spill_path(reference), reference)
+            if artifact.data is None:
+                buffer = io.BytesIO()
+                artifact.image.save(buffer, format=artifact.image_format)
+                self._resize(artifact, lambda: setattr(artifact, "data", buffer.getvalue()))
+            return artifact.data
+
+    def get_image(self, reference: str) -> Image.Image:
+        """
+        Get an artifact as a decoded RGB or mask image, decoding it at most once.
+
+        Callers must not modify the returned image; copy it first.
+
+        Raises:
+            NyxAIException: If the artifact expired or does not exist
+        """
+        if not self.is_artifact(reference):
+            return self._decode(self.get_bytes(reference))
+
+        with self._lock:
+            artifact = self._get(reference)
+            if artifact is None:
+                data = self.get_bytes(reference)
+                artifact = _Artifact(data, None, "PNG", time.monotonic() + self.ttl_seconds)
+                self._put(reference, artifact)
+            if artifact.image is None:
+                image = self._decode(artifact.data)
+                self._resize(artifact, lambda: setattr(artifact, "image", image))
+            return artifact.image
+
+    async def aput_bytes(self, request_id: str, name: str, data: bytes, durable: bool = True) -> str:
+        """
+        Store encoded image bytes, and start uploading them to the storage backend.
+
+        Args:
+            durable (bool): Upload the artifact; False for artifacts no later
+                stage reads, such as the final creative
+
+        Returns:
+            str: Reference to keep in the graph state
+        """
+        key = self.put_bytes(request_id, name, data)
+        if durable:
+            self._start_upload(request_id, key, data)
+        return key
+
+    async def aput_image(
+        self,
+        request_id: str,
+        name: str,
+        image: Image.Image,
+        image_format: str = "PNG",
+    ) -> str:
+        """
+        Store a decoded image, and start uploading it to the storage backend encoded.
+
+        Returns:
+            str: Reference to keep in the graph state
+        """
+        key = self.put_image(request_id, name, image, image_format)
+        self._start_upload(request_id, key)
+        return key
+
+    async def flush(self, request_id: str) -> None:
+        """
+        Wait for the uploads of a request started so far.
+
+        Stages call this before returning, so the checkpoint LangGraph then
+        commits only refers to artifacts a resumed job can read back.
+
+        Raises:
+            NyxAIException: If an upload failed
+        """
+        tasks = list(self._uploads.get(request_id, ()))
+        if not tasks:
+            return
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        pending = self._uploads.get(request_id)
+        if pending is not None:
+            pending.difference_update(tasks)
+            if not pending:
+                del self._uploads[request_id]
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def aget_bytes(self, reference: str) -> bytes:
+        """
+        Get the encoded bytes of an artifact, reading it back from the storage backend if needed.
+
+        Raises:
+            NyxAIException: If the artifact expired or does not exist
+        """
+        await self._restore(reference)
+        return await asyncio.to_thread(self.get_bytes, reference)
+
+    async def aget_image(self, reference: str) -> Image.Image:
+        """
+        Get an artifact as a decoded image, reading it back from the storage backend if needed.
+
+        Callers must not modify the returned image; copy it first.
+
+        Raises:
+            NyxAIException: If the artifact expired or does not exist
+        """
+        await self._restore(reference)
+        return await asyncio.to_thread(self.get_image, reference)
+
+    def delete_request(self, request_id: str) -> None:
+        """Drop every artifact of a request, in memory and on disk"""
+        prefix = self.key(request_id, "")
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                self._memory_bytes -= self._entries.pop(key).size
+        shutil.rmtree(self.spill_dir / request_id, ignore_errors=True)
+
+    async def adelete_request(self, request_id: str) -> None:
+        """Drop every artifact of a finished request, in memory, on disk and in the storage backend"""
+        uploads = self._uploads.pop(request_id, set())
+        for task in uploads:
+            task.cancel()
+        await asyncio.gather(*uploads, return_exceptions=True)
+        await asyncio.to_thread(self.delete_request, request_id)
+        if self.backend is None:
+            return
+        try:
+            await self.backend.delete_prefix(self._blob_name(self.key(request_id, "")))
+        except Exception as e:
+            # Left to the bucket lifecycle rule
+            logger.warning(f"Could not delete the stored artifacts of {request_id}: {str(e)}")
+
+    def sweep(self) -> None:
+        """Drop expired artifacts, in memory and on disk"""
+        now = time.monotonic()
+        with self._lock:
+            for key in [key for key, artifact in self._entries.items() if artifact.expires_at < now]:
+                self._memory_bytes -= self._entries.pop(key).size
+            self._swept_at = now
+            self._report()
+
+        if not self.spill_dir.exists():
+            return
+        cutoff = time.time() - self.ttl_seconds
+        for request_dir in self.spill_dir.iterdir():
+            try:
+                if request_dir.stat().st_mtime < cutoff:
+                    shutil.rmtree(request_dir, ignore_errors=True)
+            except FileNotFoundError:
+                continue
+
+    def _start_upload(self, request_id: str, key: str, data: Optional[bytes] = None) -> None:
+        if self.backend is None:
+            return
+        task = asyncio.create_task(self._upload(key, data))
+        self._uploads.setdefault(request_id, set()).add(task)
+
+    async def _upload(self, key: str, data: Optional[bytes]) -> None:
+        if data is None:
+            data = await asyncio.to_thread(self.get_bytes, key)
+        await self.backend.upload(data, self._blob_name(key))
+
+    def _is_local(self, reference: str) -> bool:
+        if not self.is_artifact(reference):
+            return True
+        with self._lock:
+            if self._get(reference) is not None:
+                return True
+        return self._spill_path(reference).exists()
+
+    async def _restore(self, reference: str) -> None:
+        """Read an artifact missing locally back from the storage backend into memory"""
+        if self.backend is None or self._is_local(reference):
+            return
+        try:
+            data = await self.backend.download(self._blob_name(reference))
+        except Exception as e:
+            # Reading it then fails as not found
+            logger.warning(f"Could not restore {reference}: {str(e)}")
+            return
+        self._put(reference, _Artifact(data, None, "PNG", time.monotonic() + self.ttl_seconds))
+        metrics.increment("artifact_restores_total")
+        logger.info(f"Restored {reference} from storage")
+
+    @staticmethod
+    def _decode(data: bytes) -> Image.Image:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        return image
+
+    def _get(self, key: str) -> Optional[_Artifact]:
+        artifact = self._entries.get(key)
+        if artifact is None:
+            return None
+        if artifact.expires_at < time.monotonic():
+            self._memory_bytes -= self._entries.pop(key).size
+            return None
+        self._entries.move_to_end(key)
+        return artifact
+
+    def _put(self, key: str, artifact: _Artifact) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= previous.size
+            self._entries[key] = artifact
+            self._memory_bytes += artifact.size
+            self._evict()
+        if time.monotonic() - self._swept_at > self.sweep_interval_seconds:
+            self.sweep()
+
+    def _resize(self, artifact: _Artifact, update) -> None:
+        """Apply an update that changes an artifact's size, keeping the total in step"""
+        self._memory_bytes -= artifact.size
+        update()
+        self._memory_bytes += artifact.size
+        self._evict()
+
+    def _evict(self) -> None:
+        """Spill least recently used artifacts while over the memory budget"""
+        if self.spill_to_disk:
+            while self._memory_bytes > self.max_memory_bytes and len(self._entries) > 1:
+                key, artifact = self._entries.popitem(last=False)
+                self._memory_bytes -= artifact.size
+                if not self._spill_path(key).exists():
+                    if artifact.data is None:
+                        buffer = io.BytesIO()
+                        artifact.image.save(buffer, format=artifact.image_format)
+                        artifact.data = buffer.getvalue()
+                    self._write(key, artifact.data)
+                metrics.increment("artifact_spills_total")
+        self._report()
+
+    def _report(self) -> None:
+        metrics.set_gauge("artifact_memory_bytes", self._memory_bytes)
+        metrics.set_gauge("artifact_entries", len(self._entries))
+
+    def _write(self, key: str, data: bytes) -> None:
+        path = self._spill_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_bytes(data)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _read(path: Path, reference: str) -> bytes:
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            raise NyxAIException(
+                internal_code=7113,
+                message="Image artifact not found",
+                detail=f"7113: {reference} expired or was never stored",
+                http_status_code=404
+            )
+
+
+def request_id_of(config: Optional[RunnableConfig]) -> str:
+    """The thread id of a graph run, which artifacts of that run are keyed by"""
+    configurable = (config or {}).get("configurable", {})
+    return str(configurable.get("thread_id") or uuid.uuid4())
+
+
+def artifact_name(state: Dict[str, Any], name: str) -> str:
+    """Name of an artifact of the current variant, so concurrent variants do not overwrite each other"""
+    variant_index = state.get("variant_index")
+    return name if variant_index is None else f"{name}_{variant_index}"
+
+
+_store: Optional[ArtifactStore] = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store(config: Dict[str, Any]) -> ArtifactStore:
+    """
+    Get the process-wide artifact store, creating it on first use.
+
+    When ARTIFACTS.DURABLE is set, the store uploads artifacts to the
+    shared storage backend, so jobs can resume on another worker.
+
+    Args:
+        config (Dict[str, Any]): Configuration containing the ARTIFACTS section
+
+    Returns:
+        ArtifactStore: The shared store
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            options = config.get("ARTIFACTS", {})
+            backend = get_storage_backend(config) if options.get("DURABLE", False) else None
+            _store = ArtifactStore(options, backend)
+        return _store
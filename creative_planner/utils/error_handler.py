@@ -6,4 +6,11 @@ class NyxAIException(Exception):
         self.message = message
         self.detail = detail
         self.http_status_code = http_status_code
-        super().__init__(f"[{internal_code}] {message} - {detail}") 
\ No newline at end of file
+        super().__init__(f"[{internal_code}] {message} - {detail}")
+
+    def __reduce__(self):
+        # Keep the fields when raised in a worker process
+        return (
+            self.__class__,
+            (self.internal_code, self.message, self.detail, self.http_status_code),
+        )
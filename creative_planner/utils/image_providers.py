@@ -0,0 +1,321 @@
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+import httpx
+from campaign_planner.utils.metrics import metrics
+from creative_planner.utils.error_handler import NyxAIException
+from creative_planner.utils.utils import get_required_env_var
+import logging
+
+logger = logging.getLogger("creative_planner.utils.image_providers")
+
+IDEOGRAM_NEGATIVE_PROMPT = "logos, lowres, bad anatomy, bad hands, text, error, missing fingers, extra digit, fewer digits, cropped, worst quality, low quality, normal quality, jpeg artifacts,signature, watermark, username, blurry"
+
+
+@dataclass
+class ImageResult:
+    """A generated image and where it came from"""
+
+    data: bytes
+    model_name: str
+    provider: str
+    prompt: str
+    source_url: str
+    content_type: str = "application/octet-stream"
+    elapsed_seconds: float = 0.0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class ImageProvider(ABC):
+    """
+    Backend for one image generation API.
+
+    Backends only turn a prompt into an image URL; connections, concurrency,
+    timeouts and downloads are handled by the ImageProviderEngine.
+    """
+
+    name: str
+    model_name: str
+
+    @abstractmethod
+    async def generate_image_url(self, engine: "ImageProviderEngine", prompt: str) -> Optional[str]:
+        """Start a generation and return the URL of the finished image"""
+        pass
+
+
+class FluxProProvider(ImageProvider):
+    """Flux Pro 1.1; generations are asynchronous and polled until ready"""
+
+    name = "flux"
+    model_name = "Flux pro 1.1"
+
+    async def generate_image_url(self, engine: "ImageProviderEngine", prompt: str) -> Optional[str]:
+        url_post = get_required_env_var("FLUX_API_HOST_POST")
+        url_get = get_required_env_var("FLUX_API_HOST_GET")
+        headers = {
+            "Content-Type": "application/json",
+            "x-key": get_required_env_var("NYX_BFL_FLUX_KEY")
+        }
+        payload = {
+            "prompt": prompt,
+            "width": 1024,
+            "height": 768
+        }
+
+        response = await engine.http_client.post(url_post, headers=headers, json=payload)
+        response.raise_for_status()
+        image_id = response.json().get("id")
+
+        if not image_id:
+            raise Exception("Missing image ID in Flux Pro response")
+
+        result = await engine.poll(url_get, headers, {"id": image_id})
+        status = result.get("status")
+        if status != "Ready":
+            raise Exception(f"Unexpected status: {status}")
+        return result["result"].get("sample")
+
+
+class ReveProvider(ImageProvider):
+    """Reve 1.0"""
+
+    name = "reve"
+    model_name = "Reve 1.0"
+
+    async def generate_image_url(self, engine: "ImageProviderEngine", prompt: str) -> Optional[str]:
+        url = get_required_env_var("REVE_API_URL")
+        payload = {"prompt": prompt, "negative_prompt": "..."}
+        response = await engine.http_client.post(url, json=payload)
+        response.raise_for_status()
+        return response.json().get("result")
+
+
+class IdeogramProvider(ImageProvider):
+    """Ideogram v2"""
+
+    name = "ideogram"
+    model_name = "Ideogram v2"
+
+    async def generate_image_url(self, engine: "ImageProviderEngine", prompt: str) -> Optional[str]:
+        url = get_required_env_var("IDEOGRAM_GENERATE_URL")
+        headers = {
+            "Api-Key": get_required_env_var("IDEOGRAM_KEY"),
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "image_request": {
+                "prompt": prompt,
+                "model": "V_2",
+                "style_type": "REALISTIC",
+                "aspect_ratio": "ASPECT_16_9",
+                "negative_prompt": IDEOGRAM_NEGATIVE_PROMPT
+            }
+        }
+        response = await engine.http_client.post(url, headers=headers, json=payload)
+        response.raise_for_status()
+        return response.json()["data"][0].get("url")
+
+
+DEFAULT_PROVIDERS = (FluxProProvider, ReveProvider, IdeogramProvider)
+
+
+class ImageProviderEngine:
+    """
+    Runs image generations against a registry of provider backends.
+
+    Every backend shares one httpx.AsyncClient, so connections are reused
+    across creative jobs. Each provider has its own concurrency limit and an
+    overall timeout covering generation, polling and download, so one slow
+    API cannot hold every slot. Asynchronous generations are polled with
+    exponential backoff until a deadline.
+    """
+
+    def __init__(self, options: Dict[str, Any]) -> None:
+        """
+        Args:
+            options (Dict[str, Any]): The IMAGE_PROVIDERS configuration section
+        """
+        self.options = options
+        poll_options = options.get("POLL", {})
+        self.poll_initial_seconds = float(poll_options.get("INITIAL_INTERVAL_SECONDS", 0.5))
+        self.poll_max_seconds = float(poll_options.get("MAX_INTERVAL_SECONDS", 5))
+        self.poll_deadline_seconds = float(poll_options.get("DEADLINE_SECONDS", 120))
+        self.chunk_size = int(options.get("DOWNLOAD_CHUNK_BYTES", 65536))
+
+        self.http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(options.get("TIMEOUT_SECONDS", 60), connect=10),
+            limits=httpx.Limits(
+                max_connections=options.get("MAX_CONNECTIONS", 20),
+                max_keepalive_connections=options.get("MAX_KEEPALIVE_CONNECTIONS", 10),
+            ),
+            follow_redirects=True,
+        )
+        self._providers: Dict[str, ImageProvider] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._timeouts: Dict[str, float] = {}
+        for provider_class in DEFAULT_PROVIDERS:
+            self.register(provider_class())
+
+    def register(self, provider: ImageProvider) -> None:
+        """
+        Make a backend available under its model name.
+
+        Limits come from IMAGE_PROVIDERS.PROVIDERS[provider.name].
+
+        Args:
+            provider (ImageProvider): Backend to register
+        """
+        provider_options = (self.options.get("PROVIDERS") or {}).get(provider.name, {})
+        self._providers[provider.model_name] = provider
+        self._semaphores[provider.name] = asyncio.Semaphore(
+            int(provider_options.get("MAX_CONCURRENCY", 4))
+        )
+        self._timeouts[provider.name] = float(provider_options.get("TIMEOUT_SECONDS", 180))
+
+    def get_provider(self, model_name: str) -> ImageProvider:
+        """
+        Raises:
+            NyxAIException: If no backend serves the model
+        """
+        provider = self._providers.get(model_name)
+        if provider is None:
+            raise NyxAIException(
+                internal_code=7201,
+                message=f"Unsupported model: {model_name}",
+                http_status_code=400
+            )
+        return provider
+
+    async def generate(self, model_name: str, prompt: str) -> ImageResult:
+        """
+        Generate an image and download it into memory.
+
+        Args:
+            model_name (str): Registered model, e.g. "Flux pro 1.1"
+            prompt (str): Image prompt
+
+        Returns:
+            ImageResult: Image bytes and metadata
+
+        Raises:
+            NyxAIException: If the model is unsupported, or generation fails or times out
+        """
+        provider = self.get_provider(model_name)
+        timeout = self._timeouts[provider.name]
+        logger.info(f"Generating image with model: {model_name}")
+
+        async with self._semaphores[provider.name]:
+            started_at = time.monotonic()
+            try:
+                result = await asyncio.wait_for(
+                    self._generate(provider, prompt), timeout=timeout
+                )
+            except NyxAIException:
+                metrics.increment("image_generation_failures_total", provider=provider.name)
+                raise
+            except asyncio.TimeoutError:
+                metrics.increment("image_generation_failures_total", provider=provider.name)
+                raise NyxAIException(
+                    internal_code=7204,
+                    message="Image generation timed out",
+                    detail=f"{model_name} did not finish within {timeout:.0f}s"
+                )
+            except Exception as e:
+                metrics.increment("image_generation_failures_total", provider=provider.name)
+                logger.error(f"7202: {model_name} image generation failed: {str(e)}")
+                raise NyxAIException(
+                    internal_code=7202,
+                    message=f"{model_name} image generation failed",
+                    detail=str(e)
+                )
+
+        result.elapsed_seconds = time.monotonic() - started_at
+        metrics.observe("image_generation_seconds", result.elapsed_seconds, provider=provider.name)
+        logger.info(f"Generated {len(result.data)} bytes with {model_name} in {result.elapsed_seconds:.1f}s")
+        return result
+
+    async def _generate(self, provider: ImageProvider, prompt: str) -> ImageResult:
+        image_url = await provider.generate_image_url(self, prompt)
+        if not image_url:
+            raise Exception("Missing image URL in response")
+
+        data, content_type = await self._download(image_url)
+        return ImageResult(
+            data=data,
+            model_name=provider.model_name,
+            provider=provider.name,
+            prompt=prompt,
+            source_url=image_url,
+            content_type=content_type,
+        )
+
+    async def _download(self, url: str) -> Tuple[bytes, str]:
+        async with self.http_client.stream("GET", url) as response:
+            response.raise_for_status()
+            data = b"".join(
+                [chunk async for chunk in response.aiter_bytes(self.chunk_size)]
+            )
+            return data, response.headers.get("content-type", "application/octet-stream")
+
+    async def poll(self, url: str, headers: Dict[str, str], params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Poll a generation until it leaves the pending states, backing off exponentially.
+
+        Raises:
+            NyxAIException: If the generation is still pending at the poll deadline
+        """
+        deadline = time.monotonic() + self.poll_deadline_seconds
+        interval = self.poll_initial_seconds
+        while True:
+            response = await self.http_client.get(url, headers=headers, params=params)
+            response.raise_for_status()
+            result = response.json()
+            if result.get("status") not in ["Pending", "InProgress"]:
+                return result
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise NyxAIException(
+                    internal_code=7204,
+                    message="Image generation timed out",
+                    detail=f"Still {result.get('status')} after {self.poll_deadline_seconds:.0f}s"
+                )
+            await asyncio.sleep(min(interval, remaining))
+            interval = min(interval * 2, self.poll_max_seconds)
+
+    async def aclose(self) -> None:
+        """Close the shared connection pool"""
+        await self.http_client.aclose()
+
+
+_engine: Optional[ImageProviderEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_image_provider_engine(config: Dict[str, Any]) -> ImageProviderEngine:
+    """
+    Get the process-wide image provider engine, creating it on first use.
+
+    Args:
+        config (Dict[str, Any]): Configuration containing the IMAGE_PROVIDERS section
+
+    Returns:
+        ImageProviderEngine: The shared engine
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = ImageProviderEngine(config.get("IMAGE_PROVIDERS", {}))
+        return _engine
+
+
+async def close_image_provider_engine() -> None:
+    """Close the shared engine, if one was created"""
+    global _engine
+    with _engine_lock:
+        engine, _engine = _engine, None
+    if engine is not None:
+        await engine.aclose()
@@ -1,93 +1,25 @@
-import os
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
 from google.cloud import storage
+from google.oauth2 import service_account
 from google.auth.exceptions import DefaultCredentialsError
-from azure.storage.blob import BlobServiceClient, BlobClient, ContainerClient, generate_blob_sas, BlobSasPermissions
-from datetime import datetime, timedelta
+from azure.storage.blob import generate_blob_sas, BlobSasPermissions
+from azure.storage.blob.aio import BlobServiceClient
 from creative_planner.utils.error_handler import NyxAIException
 from creative_planner.utils.utils import get_required_env_var
-
-from google.auth import exceptions
-from google import auth
-from google.auth.transport import requests
 import logging
 
 logger = logging.getLogger("creative_planner.utils.storage")
 
-def save_image_to_azure(image_data, blob_name):
-    """Save image to Azure Blob Storage."""
-    logger.info(f"Attempting to save image to Azure: {blob_name}")
-    try:
-        connection_string = get_required_env_var("AZURE_STORAGE_CONNECTION_STRING")
-        container_name = get_required_env_var("AZURE_CONTAINER_NAME")
-        
-        blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-        container_client = blob_service_client.get_container_client(container_name)
-        blob_client = container_client.get_blob_client(blob_name)
-        
-        blob_client.upload_blob(image_data, overwrite=True)
-        
-        account_name = get_required_env_var("AZURE_STORAGE_ACCOUNT")
-        azure_image_url = f'https://{account_name}.blob.core.windows.net/{container_name}/{blob_name}'
-        logger.info(f"Image successfully saved to Azure: {azure_image_url}")
-        return azure_image_url
-    
-    except Exception as e:
-        logger.error(f"3001: Failed to save image to Azure: {str(e)}")
-        raise NyxAIException(
-            internal_code=3001,
-            message=f"Failed to save image to Azure: {str(e)}",
-            http_status_code=500
-        )
-
-def save_image_to_gcp(image_data, gcp_blob_name):
-    """Save image to Google Cloud Storage."""
-    logger.info(f"Attempting to save image to GCP: {gcp_blob_name}")
-    try:
-        credentials = get_gcp_credentials()
-        storage_client = storage.Client.from_service_account_info(credentials)
-        gcp_bucket_name = get_required_env_var("BRAND_GCP_BUCKET_NAME")
-        bucket = storage_client.get_bucket(gcp_bucket_name)
-        blob = bucket.blob(gcp_blob_name)
-        
-        logger.debug("Uploading image data to GCP")
-        blob.upload_from_string(image_data)
-        
-        gcp_image_url = f'https://storage.googleapis.com/{gcp_bucket_name}/{gcp_blob_name}'
-        logger.info(f"Image successfully saved to GCP: {gcp_image_url}")
-        return gcp_image_url
-    
-    except DefaultCredentialsError:
-        logger.critical("2009: GCP credentials not available")
-        raise NyxAIException(
-            internal_code=2009,
-            message="GCP credentials not available",
-            http_status_code=500
-        )
-    except Exception as e:
-        logger.error(f"2010: Failed to save image to GCP: {str(e)}")
-        raise NyxAIException(
-            internal_code=2010,
-            message=f"Failed to save image to GCP: {str(e)}",
-            http_status_code=500
-        )
+# Azure SAS URLs are always issued for 30 days
+AZURE_SAS_EXPIRATION_SECONDS = 2592000
+AZURE_DELETE_BATCH_SIZE = 256
 
-def save_image(image_data, blob_name):
-    """Save image to the configured storage provider."""
-    storage_provider = get_required_env_var("STORAGE_PROVIDER", "GCP").upper()
-    print(f"the platform to save the image is : {storage_provider}")
-    logger.info(f"the platform to save the image is : {storage_provider}")
-    
-    if storage_provider == "AZURE":
-        return save_image_to_azure(image_data, blob_name)
-    elif storage_provider == "GCP":
-        return save_image_to_gcp(image_data, blob_name)
-    else:
-        logger.error(f"3002: Invalid storage provider: {storage_provider}")
-        raise NyxAIException(
-            internal_code=3002,
-            message=f"Invalid storage provider: {storage_provider}. Must be either 'GCP' or 'AZURE'",
-            http_status_code=500
-        )
 
 def get_gcp_credentials():
     """Get GCP credentials from environment variables."""
@@ -97,7 +29,7 @@ def get_gcp_credentials():
             "type": get_required_env_var("GCP_TYPE"),
             "project_id": get_required_env_var("GCP_PROJECT_ID"),
             "private_key_id": get_required_env_var("GCP_PRI_KEY_ID"),
-            "private_key": get_required_env_var("GCP_PRI_KEY").replace('\\n', '\n'),  
+            "private_key": get_required_env_var("GCP_PRI_KEY").replace('\\n', '\n'),
             "client_email": get_required_env_var("GCP_CLIENT_EMAIL"),
             "client_id": get_required_env_var("GCP_CLIENT_ID"),
             "auth_uri": get_required_env_var("GCP_AUTH_URI"),
@@ -128,92 +60,371 @@ def get_gcp_credentials():
             http_status_code=500
         )
 
-def generate_signed_url_gcp(bucket_name, object_key, expiration_time=3600):
-    """Generate a signed URL for GCP storage object."""
-    logger.info(f"Generating signed URL for {bucket_name}/{object_key}")
-    try:
-        credentials = get_gcp_credentials()
-        client = storage.Client.from_service_account_info(credentials)
-        bucket = client.get_bucket(bucket_name)
-        blob = bucket.blob(object_key)
 
+class StorageBackend(ABC):
+    """
+    Uploads creatives to a storage provider, reads them back and signs them.
+
+    A backend holds its client, credentials and connections for the life of
+    the process, so an upload pays neither auth nor connection setup. URLs
+    re-signed for blobs whose stored URL is close to expiry are cached by
+    blob name.
+    """
+
+    name: str
+
+    def __init__(self) -> None:
+        self._signed_urls: Dict[str, Tuple[str, float]] = {}
+
+    @abstractmethod
+    async def upload(self, data: bytes, blob_name: str) -> str:
+        """
+        Upload data, overwriting any blob of the same name.
+
+        Returns:
+            str: The unsigned URL of the blob
+        """
+        pass
+
+    @abstractmethod
+    async def download(self, blob_name: str) -> bytes:
+        """Read an uploaded blob"""
+        pass
+
+    @abstractmethod
+    async def delete_prefix(self, prefix: str) -> None:
+        """Delete every blob whose name starts with prefix"""
+        pass
+
+    @abstractmethod
+    async def generate_signed_url(self, blob_name: str, expiration_time: int) -> str:
+        """Sign an uploaded blob for reading"""
+        pass
+
+    def signed_url_lifetime(self, expiration_time: int) -> int:
+        """Seconds a URL requested for expiration_time is actually valid"""
+        return expiration_time
+
+    async def sign_blob(self, blob_name: str, expiration_time: int = 3600) -> Tuple[str, float]:
+        """
+        Sign a blob that is already uploaded.
+
+        Returns:
+            Tuple[str, float]: The signed URL and its expiry as a Unix timestamp
+        """
+        # Taken before signing, so the recorded expiry is never later than the real one
+        expires_at = time.time() + self.signed_url_lifetime(expiration_time)
+        return await self.generate_signed_url(blob_name, expiration_time), expires_at
+
+    async def get_fresh_signed_url(
+        self,
+        blob_name: str,
+        signed_url: Optional[str] = None,
+        expires_at: Optional[float] = None,
+        expiration_time: int = 3600,
+        refresh_margin: int = 300,
+    ) -> str:
+        """
+        Get a signed URL for an uploaded blob without uploading it again.
+
+        The given URL is returned while it is valid for more than refresh_margin
+        seconds. After that the blob is re-signed, and the new URL is reused by
+        this process until it nears expiry in turn.
+
+        Args:
+            blob_name (str): Uploaded blob
+            signed_url (Optional[str]): URL issued when the blob was uploaded
+            expires_at (Optional[float]): Its expiry as a Unix timestamp
+            expiration_time (int): Lifetime of a new URL in seconds
+            refresh_margin (int): Remaining lifetime below which a URL is re-signed
+        """
+        now = time.time()
+        if signed_url and expires_at and expires_at - now > refresh_margin:
+            return signed_url
+
+        cached = self._signed_urls.get(blob_name)
+        if cached and cached[1] - now > refresh_margin:
+            return cached[0]
+
+        logger.info(f"Re-signing {blob_name}")
+        signed_url, expires_at = await self.sign_blob(blob_name, expiration_time)
+        # Drop URLs that expired, so the cache only holds recently read blobs
+        for name in [name for name, (_, expiry) in self._signed_urls.items() if expiry <= now]:
+            del self._signed_urls[name]
+        self._signed_urls[blob_name] = (signed_url, expires_at)
+        return signed_url
+
+    async def aclose(self) -> None:
+        """Release the backend's connections"""
+        pass
+
+
+class GCSBackend(StorageBackend):
+    """
+    Google Cloud Storage through one long-lived client.
+
+    The client is synchronous, so uploads and signing run in a small thread
+    pool of MAX_WORKERS. The bucket handle is built locally, without the
+    metadata request of get_bucket.
+    """
+
+    name = "GCP"
+
+    def __init__(self, options: Dict[str, Any]) -> None:
+        """
+        Args:
+            options (Dict[str, Any]): The STORAGE configuration section
+        """
+        super().__init__()
         try:
-            url = blob.generate_signed_url(version="v4", expiration=expiration_time, method="GET")
+            info = get_gcp_credentials()
+            credentials = service_account.Credentials.from_service_account_info(info)
+            self.client = storage.Client(project=info["project_id"], credentials=credentials)
+        except NyxAIException:
+            raise
+        except DefaultCredentialsError:
+            logger.critical("2009: GCP credentials not available")
+            raise NyxAIException(
+                internal_code=2009,
+                message="GCP credentials not available",
+                http_status_code=500
+            )
+        self.bucket_name = get_required_env_var("BRAND_GCP_BUCKET_NAME")
+        self.bucket = self.client.bucket(self.bucket_name)
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(options.get("MAX_WORKERS", 8)),
+            thread_name_prefix="gcs",
+        )
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: func(*args, **kwargs))
+
+    async def upload(self, data: bytes, blob_name: str) -> str:
+        logger.info(f"Attempting to save image to GCP: {blob_name}")
+        try:
+            blob = self.bucket.blob(blob_name)
+            logger.debug("Uploading image data to GCP")
+            await self._run(blob.upload_from_string, data)
+        except Exception as e:
+            logger.error(f"2010: Failed to save image to GCP: {str(e)}")
+            raise NyxAIException(
+                internal_code=2010,
+                message=f"Failed to save image to GCP: {str(e)}",
+                http_status_code=500
+            )
+
+        gcp_image_url = f'https://storage.googleapis.com/{self.bucket_name}/{blob_name}'
+        logger.info(f"Image successfully saved to GCP: {gcp_image_url}")
+        return gcp_image_url
+
+    async def download(self, blob_name: str) -> bytes:
+        logger.info(f"Reading image from GCP: {blob_name}")
+        try:
+            return await self._run(self.bucket.blob(blob_name).download_as_bytes)
+        except Exception as e:
+            logger.error(f"2014: Failed to read image from GCP: {str(e)}")
+            raise NyxAIException(
+                internal_code=2014,
+                message=f"Failed to read image from GCP: {str(e)}",
+                http_status_code=500
+            )
+
+    async def delete_prefix(self, prefix: str) -> None:
+        logger.info(f"Deleting blobs under {self.bucket_name}/{prefix}")
+
+        def delete():
+            blobs = list(self.client.list_blobs(self.bucket, prefix=prefix))
+            # Blobs removed concurrently, e.g. by a lifecycle rule, are not an error
+            self.bucket.delete_blobs(blobs, on_error=lambda blob: None)
+
+        try:
+            await self._run(delete)
+        except Exception as e:
+            logger.error(f"2015: Failed to delete blobs from GCP: {str(e)}")
+            raise NyxAIException(
+                internal_code=2015,
+                message=f"Failed to delete blobs from GCP: {str(e)}",
+                http_status_code=500
+            )
+
+    async def generate_signed_url(self, blob_name: str, expiration_time: int) -> str:
+        logger.info(f"Generating signed URL for {self.bucket_name}/{blob_name}")
+        try:
+            # Signed locally with the service account key; no request is made
+            url = await self._run(
+                self.bucket.blob(blob_name).generate_signed_url,
+                version="v4",
+                expiration=expiration_time,
+                method="GET",
+            )
             logger.info("Signed URL generated successfully")
             return url
-        except exceptions.RefreshError:
-            logger.warning("Token refresh required, attempting to refresh credentials")
-            credentials, project_id = auth.default()
-            credentials.refresh(requests.Request())
-            url = blob.generate_signed_url(expiration=expiration_time)
-            logger.info("Signed URL generated after credential refresh")
-            return url
+        except Exception as e:
+            logger.error(f"2013: Failed to generate signed URL: {str(e)}")
+            raise NyxAIException(
+                internal_code=2013,
+                message=f"Failed to generate signed URL: {str(e)}",
+                http_status_code=500
+            )
 
-    except DefaultCredentialsError:
-        logger.critical("2011: Failed to generate signed URL: Credentials not available")
-        raise NyxAIException(
-            internal_code=2011,
-            message="Failed to generate signed URL: Credentials not available",
-            http_status_code=500
-        )
-    except Exception as e:
-        logger.error(f"2013: Failed to generate signed URL: {str(e)}")
-        raise NyxAIException(
-            internal_code=2013,
-            message=f"Failed to generate signed URL: {str(e)}",
-            http_status_code=500
-        )
+    async def aclose(self) -> None:
+        self.executor.shutdown(wait=False)
+        await asyncio.to_thread(self.client.close)
 
-def generate_signed_url_azure(blob_name, expiration_time=3600):
-    """Generate a SAS token URL for Azure Blob Storage."""
-    logger.info(f"Generating SAS token URL for blob: {blob_name}")
-    try:
-        account_name = get_required_env_var("AZURE_STORAGE_ACCOUNT")
-        account_key = get_required_env_var("AZURE_STORAGE_KEY")
-        container_name = get_required_env_var("AZURE_CONTAINER_NAME")
-
-        # Calculate start and expiry times
-        start_time = datetime.utcnow()
-        expiry_time = start_time + timedelta(seconds=expiration_time)
-
-        # Create SAS token with read permission
-        sas_token = generate_blob_sas(
-            account_name=account_name,
-            container_name=container_name,
-            blob_name=blob_name,
-            account_key=account_key,
-            permission=BlobSasPermissions(read=True),
-            start=start_time,
-            expiry=expiry_time
-        )
 
-        # Construct the full URL with SAS token
-        sas_url = f"https://{account_name}.blob.core.windows.net/{container_name}/{blob_name}?{sas_token}"
-        logger.info("SAS token URL generated successfully")
-        return sas_url
+class AzureBackend(StorageBackend):
+    """Azure Blob Storage through one long-lived asynchronous client"""
 
-    except Exception as e:
-        logger.error(f"3003: Failed to generate Azure SAS token: {str(e)}")
-        raise NyxAIException(
-            internal_code=3003,
-            message=f"Failed to generate Azure SAS token: {str(e)}",
-            http_status_code=500
+    name = "AZURE"
+
+    def __init__(self, options: Dict[str, Any]) -> None:
+        """
+        Args:
+            options (Dict[str, Any]): The STORAGE configuration section
+        """
+        super().__init__()
+        self.account_name = get_required_env_var("AZURE_STORAGE_ACCOUNT")
+        self.container_name = get_required_env_var("AZURE_CONTAINER_NAME")
+        self.service_client = BlobServiceClient.from_connection_string(
+            get_required_env_var("AZURE_STORAGE_CONNECTION_STRING")
         )
+        self.container_client = self.service_client.get_container_client(self.container_name)
+
+    def _url(self, blob_name: str) -> str:
+        return f'https://{self.account_name}.blob.core.windows.net/{self.container_name}/{blob_name}'
+
+    async def upload(self, data: bytes, blob_name: str) -> str:
+        logger.info(f"Attempting to save image to Azure: {blob_name}")
+        try:
+            await self.container_client.upload_blob(blob_name, data, overwrite=True)
+        except Exception as e:
+            logger.error(f"3001: Failed to save image to Azure: {str(e)}")
+            raise NyxAIException(
+                internal_code=3001,
+                message=f"Failed to save image to Azure: {str(e)}",
+                http_status_code=500
+            )
+
+        azure_image_url = self._url(blob_name)
+        logger.info(f"Image successfully saved to Azure: {azure_image_url}")
+        return azure_image_url
+
+    async def download(self, blob_name: str) -> bytes:
+        logger.info(f"Reading image from Azure: {blob_name}")
+        try:
+            stream = await self.container_client.download_blob(blob_name)
+            return await stream.readall()
+        except Exception as e:
+            logger.error(f"3004: Failed to read image from Azure: {str(e)}")
+            raise NyxAIException(
+                internal_code=3004,
+                message=f"Failed to read image from Azure: {str(e)}",
+                http_status_code=500
+            )
+
+    async def delete_prefix(self, prefix: str) -> None:
+        logger.info(f"Deleting blobs under {self.container_name}/{prefix}")
+        try:
+            names = [
+                blob.name async for blob in self.container_client.list_blobs(name_starts_with=prefix)
+            ]
+            # A batch request deletes at most AZURE_DELETE_BATCH_SIZE blobs
+            for start in range(0, len(names), AZURE_DELETE_BATCH_SIZE):
+                await self.container_client.delete_blobs(
+                    *names[start:start + AZURE_DELETE_BATCH_SIZE], raise_on_any_failure=False
+                )
+        except Exception as e:
+            logger.error(f"3005: Failed to delete blobs from Azure: {str(e)}")
+            raise NyxAIException(
+                internal_code=3005,
+                message=f"Failed to delete blobs from Azure: {str(e)}",
+                http_status_code=500
+            )
+
+    def signed_url_lifetime(self, expiration_time: int) -> int:
+        return AZURE_SAS_EXPIRATION_SECONDS
+
+    async def generate_signed_url(self, blob_name: str, expiration_time: int) -> str:
+        """Generate a SAS token URL; computed locally from the account key"""
+        logger.info(f"Generating SAS token URL for blob: {blob_name}")
+        try:
+            # Calculate start and expiry times
+            start_time = datetime.utcnow()
+            expiry_time = start_time + timedelta(seconds=self.signed_url_lifetime(expiration_time))
+
+            # Create SAS token with read permission
+            sas_token = generate_blob_sas(
+                account_name=self.account_name,
+                container_name=self.container_name,
+                blob_name=blob_name,
+                account_key=get_required_env_var("AZURE_STORAGE_KEY"),
+                permission=BlobSasPermissions(read=True),
+                start=start_time,
+                expiry=expiry_time
+            )
+
+            # Construct the full URL with SAS token
+            sas_url = f"{self._url(blob_name)}?{sas_token}"
+            logger.info("SAS token URL generated successfully")
+            return sas_url
+
+        except Exception as e:
+            logger.error(f"3003: Failed to generate Azure SAS token: {str(e)}")
+            raise NyxAIException(
+                internal_code=3003,
+                message=f"Failed to generate Azure SAS token: {str(e)}",
+                http_status_code=500
+            )
+
+    async def aclose(self) -> None:
+        await self.service_client.close()
+
+
+BACKENDS = {
+    GCSBackend.name: GCSBackend,
+    AzureBackend.name: AzureBackend,
+}
+
+_backend: Optional[StorageBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_storage_backend(config: Dict[str, Any]) -> StorageBackend:
+    """
+    Get the process-wide backend of the configured STORAGE_PROVIDER, creating it on first use.
+
+    Args:
+        config (Dict[str, Any]): Configuration containing the STORAGE section
+
+    Returns:
+        StorageBackend: The shared backend
+
+    Raises:
+        NyxAIException: If the provider is unknown or its credentials are missing
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            storage_provider = get_required_env_var("STORAGE_PROVIDER", "GCP").upper()
+            logger.info(f"the platform to save the image is : {storage_provider}")
+            backend_class = BACKENDS.get(storage_provider)
+            if backend_class is None:
+                logger.error(f"3002: Invalid storage provider: {storage_provider}")
+                raise NyxAIException(
+                    internal_code=3002,
+                    message=f"Invalid storage provider: {storage_provider}. Must be either 'GCP' or 'AZURE'",
+                    http_status_code=500
+                )
+            _backend = backend_class(config.get("STORAGE", {}))
+        return _backend
+
+
+async def close_storage_backend() -> None:
+    """Close the shared backend, if one was created"""
+    global _backend
+    with _backend_lock:
+        backend, _backend = _backend, None
+    if backend is not None:
+        await backend.aclose()
 
-def get_signed_url(blob_name, expiration_time=3600):
-    """Get a signed URL for the blob based on the configured storage provider."""
-    storage_provider = get_required_env_var("STORAGE_PROVIDER", "GCP").upper()
-    logger.info(f"the platform to save the signed url is: {storage_provider}")
-    
-    if storage_provider == "AZURE":
-        return generate_signed_url_azure(blob_name, 2592000)#30 days
-    elif storage_provider == "GCP":
-        bucket_name = get_required_env_var("BRAND_GCP_BUCKET_NAME")
-        return generate_signed_url_gcp(bucket_name, blob_name, expiration_time)
-    else:
-        logger.error(f"3002: Invalid storage provider: {storage_provider}")
-        raise NyxAIException(
-            internal_code=3002,
-            message=f"Invalid storage provider: {storage_provider}. Must be either 'GCP' or 'AZURE'",
-            http_status_code=500
-        ) 
\ No newline at end of file
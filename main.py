@@ -1,28 +1,55 @@
 import os
+import json
 import logging
 from typing import List, Literal, Optional, Dict
 import uuid
-from fastapi import BackgroundTasks, FastAPI
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from langgraph.checkpoint.memory import MemorySaver
 from psycopg_pool import AsyncConnectionPool
 from pydantic import BaseModel, Field
-from campaign_planner.utils import load_config, draw_mermaid_graph
-from creative_planner.graph import CreativePlanner
+from campaign_planner.utils import (
+    load_config,
+    draw_mermaid_graph,
+    ProcessingStatus,
+    InMemoryJobQueue,
+    PostgresJobQueue,
+    ProgressBroker,
+    PostgresProgressBroker,
+    ProgressEvent,
+    ProgressEventType,
+    format_sse,
+    event_data,
+    build_llm_cache,
+    metrics,
+    get_category_retriever,
+    llm_priority,
+    Priority,
+)
 from contextlib import asynccontextmanager
-from campaign_planner.graph import CampaignPlanner
 from enum import Enum
 from fastapi import HTTPException
 from creative_planner.utils.logging_config import configure_logging
-from creative_planner.utils.storage import get_signed_url, save_image
+from creative_planner.utils.storage import get_storage_backend
 from dotenv import load_dotenv
-from campaign_objective_planner.graph import CampaignObjectiveGraph
+from app_setup import (
+    CAMPAIGN_PIPELINE,
+    CREATIVE_PIPELINE,
+    build_startup,
+    build_worker_pool,
+    close_shared_clients,
+    get_database_url,
+)
 
 
 workflow = None
 creative_workflow = None
 objective_workflow = None
+worker_pool = None
+progress_broker = None
+startup_timings = {}
 
 class ChannelType(str, Enum):
     META = "Meta"
@@ -44,18 +71,14 @@ HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", "8000"))
 ROOT_PATH = os.getenv("ROOT_PATH", "/nyx-campaign-agent")
 
-class ProcessingStatus(str, Enum):
-    QUEUED = "QUEUED"
-    BUILDING = "BUILDING"
-    COMPLETE = "COMPLETE"
-    FAILED = "FAILED"
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global workflow
     global creative_workflow
     global objective_workflow
+    global worker_pool
+    global progress_broker
+    global startup_timings
     global config
 
     config = load_config()
@@ -63,33 +86,67 @@ async def lifespan(app: FastAPI):
     
     if config["LOG_LEVEL"].lower() == "debug":
         config["checkpointer"] = MemorySaver()
-        workflow = CampaignPlanner(config).get_compiled_graph()
-        creative_workflow = CreativePlanner(config).get_compiled_graph()
-        objective_workflow = CampaignObjectiveGraph(config).get_compiled_graph()
+        config["db_pool"] = None
+        config["llm_cache"] = build_llm_cache(config)
+        orchestrator = build_startup(config)
+        components = await orchestrator.run()
+        startup_timings = orchestrator.timings
+        workflow = components[CAMPAIGN_PIPELINE]
+        creative_workflow = components[CREATIVE_PIPELINE]
+        objective_workflow = components["objective_plan"]
         # draw_mermaid_graph(workflow)
         # draw_mermaid_graph(creative_workflow)
+
+        # The in-memory queue is only visible to this process, so it always
+        # needs workers running next to the API
+        progress_broker = ProgressBroker(config["PROGRESS"]["HISTORY_SECONDS"])
+        worker_pool = build_worker_pool(
+            config, InMemoryJobQueue(), progress_broker, workflow, creative_workflow
+        )
+        worker_pool.start()
+        logger.info("Workflow initialized successfully")
         yield
+        await worker_pool.stop()
+        await close_shared_clients(config)
     else:
         async with AsyncConnectionPool(
-            "postgresql://{username}:{password}@{host}:5432/{database_name}".format(
-                host=os.getenv("PGSQL_HOST"),
-                database_name=os.getenv("PGSQL_DATABASE_NAME"),
-                username=os.getenv("PGSQL_USERNAME"),
-                password=os.getenv("PGSQL_PASSWORD"),
-            ),
+            get_database_url(),
             kwargs={"autocommit": True},
             max_size=20,
         ) as pool:
             checkpointer = AsyncPostgresSaver(pool)
-            await checkpointer.setup()
             config["checkpointer"] = checkpointer
-
-            workflow = CampaignPlanner(config).get_compiled_graph()
-            creative_workflow = CreativePlanner(config).get_compiled_graph()
-            objective_workflow = CampaignObjectiveGraph(config).get_compiled_graph()
+            config["db_pool"] = pool
+            config["llm_cache"] = build_llm_cache(config)
+            job_queue = PostgresJobQueue(pool)
+            progress_broker = PostgresProgressBroker(
+                pool, get_database_url(), config["PROGRESS"]["HISTORY_SECONDS"]
+            )
+
+            # Table setup runs next to graph compilation; nothing is
+            # served before all of it has finished
+            orchestrator = build_startup(config)
+            orchestrator.add("checkpointer", checkpointer.setup)
+            if config["llm_cache"] is not None:
+                orchestrator.add("llm_cache", config["llm_cache"].setup)
+            orchestrator.add("job_queue", job_queue.setup)
+            orchestrator.add("progress_broker", progress_broker.start)
+            components = await orchestrator.run()
+            startup_timings = orchestrator.timings
+            workflow = components[CAMPAIGN_PIPELINE]
+            creative_workflow = components[CREATIVE_PIPELINE]
+            objective_workflow = components["objective_plan"]
+
+            worker_pool = build_worker_pool(
+                config, job_queue, progress_broker, workflow, creative_workflow
+            )
+            if config["JOBS"]["RUN_WORKERS_IN_API"]:
+                worker_pool.start()
+            logger.info("Workflow initialized successfully")
             yield
-
-    logger.info("Workflow initialized successfully")
+            await worker_pool.stop()
+            await progress_broker.stop()
+            await close_shared_clients(config)
 
 
 class CampaignSubmitRequest(BaseModel):
@@ -155,6 +212,7 @@ class CreativeSubmitRequest(BaseModel):
     total_budget: Optional[float] = Field(default=None, description="The total daily budget predicted to run a campaign based on the previous outputs")
     channel_budget_allocation: Optional[Dict[str, float]] = Field(default=None, description="A dictionary with the recommended channel names as keys and their respective daily budget allocations")
     user_prompt: Optional[str] = Field(default=None, description="Optional user-provided creative direction or specific requirements for the campaign")
+    num_variants: int = Field(default=1, ge=1, le=8, description="Number of creatives to generate concurrently from the same prompt and copy")
 
     class Config:
         json_schema_extra = {
@@ -261,7 +319,8 @@ class CampaignResultResponse(BaseModel):
 
 class CreativeResultResponse(BaseModel):
     """Response model for getting creative plan results"""
-    signed_url: str = Field(..., description="Signed URL for the final creative image")
+    signed_url: str = Field(..., description="Signed URL for the final creative image (the first variant)")
+    signed_urls: List[str] = Field(default_factory=list, description="Signed URLs of every variant, in variant order")
 
 
 class CampaignObjectiveRequest(BaseModel):
@@ -341,26 +400,33 @@ async def get_openapi_schema():
     return app.openapi()
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics() -> dict:
+    return metrics.snapshot()
+
+
+@app.get("/ready", include_in_schema=False)
+async def get_readiness() -> JSONResponse:
+    """Readiness probe: 200 once every workflow is compiled; reads no more than the index manifest"""
+    if workflow is None or creative_workflow is None or objective_workflow is None:
+        return JSONResponse({"ready": False}, status_code=503)
+    category_index = get_category_retriever(config).index_status()
+    return JSONResponse(
+        {"ready": True, "category_index": category_index, "startup_seconds": startup_timings}
+    )
+
+
 @app.post("/request_campaign_plan", 
     response_model=SubmitResponse,
     summary="Submit a new campaign planning request",
     description="Initiates the process of generating a comprehensive marketing campaign plan based on provided brand and target audience information.",
     response_description="Returns a unique request ID to track the campaign planning progress"
 )
-async def request_campaign_plan(
-    request: CampaignSubmitRequest, 
-    background_tasks: BackgroundTasks
-) -> SubmitResponse:
+async def request_campaign_plan(request: CampaignSubmitRequest) -> SubmitResponse:
     response = SubmitResponse(request_id=str(uuid.uuid4()))
 
-    thread_config = {
-        "configurable": {
-            "thread_id": response.request_id,
-        }
-    }
-
-    background_tasks.add_task(
-        workflow.ainvoke, request.model_dump(), config=thread_config
+    await worker_pool.submit(
+        CAMPAIGN_PIPELINE, response.request_id, request.model_dump(mode="json")
     )
 
     return response
@@ -375,6 +441,12 @@ async def request_campaign_plan(
 async def status_campaign_plan(request_id: str) -> StatusResponse:
     # Clean the thread ID by removing any newline characters
     request_id = request_id.strip()
+
+    # The job row answers every state except BUILDING without loading the checkpoint
+    job = await worker_pool.queue.get(request_id)
+    if job is not None and job.status != ProcessingStatus.BUILDING:
+        return StatusResponse(processing_status=job.status)
+
     thread_config = {
         "configurable": {
             "thread_id": request_id,
@@ -388,12 +460,40 @@ async def status_campaign_plan(request_id: str) -> StatusResponse:
             processing_status=ProcessingStatus.BUILDING,
             processing_node=current_state.next[0],
         )
+    elif job is not None:
+        # Claimed by a worker but no checkpoint written yet
+        response = StatusResponse(processing_status=ProcessingStatus.BUILDING)
     else:
         response = StatusResponse(processing_status=ProcessingStatus.COMPLETE)
 
     return response
 
 
+async def build_campaign_result(values: dict) -> CampaignResultResponse:
+    """Shape the final campaign state into the public result"""
+    return CampaignResultResponse(
+        age_group=values.get("age_group", "").split(", ")[0] if values.get("age_group") else "",
+        brand_description=values.get("brand_description", ""),
+        brand_name=values.get("brand_name", ""),
+        campaign_objective=values.get("campaign_objective", ""),
+        gender=values.get("gender", ""),
+        industry=values.get("industry", ""),
+        interests=values.get("interests", []),
+        locations=values.get("locations", [])[0] if values.get("locations") and len(values.get("locations", [])) > 0 else "",
+        product_description=values.get("product_description", ""),
+        product_name=values.get("product_name", ""),
+        psychographic_traits=values.get("psychographic_traits", []),
+        website=values.get("website", ""),
+        integrated_ad_platforms=values.get("integrated_ad_platforms", []),
+        recommended_ad_platforms=values.get("recommended_ad_platforms", []),
+        campaign_name=values.get("campaign_name", ""),
+        campaign_start_date=values.get("campaign_start_date", ""),
+        campaign_end_date=values.get("campaign_end_date", ""),
+        total_budget=values.get("total_budget", 0.0),
+        channel_budget_allocation=values.get("channel_budget_allocation", {})
+    )
+
+
 @app.get("/get_campaign_plan/{request_id}", 
     response_model=CampaignResultResponse,
     summary="Get completed campaign plan",
@@ -414,27 +514,7 @@ async def get_campaign_plan(request_id: str) -> CampaignResultResponse:
     if current_state.next:
         raise HTTPException(status_code=404, detail="Campaign plan not ready yet")
 
-    return CampaignResultResponse(
-        age_group=current_state.values.get("age_group", "").split(", ")[0] if current_state.values.get("age_group") else "",
-        brand_description=current_state.values.get("brand_description", ""),
-        brand_name=current_state.values.get("brand_name", ""),
-        campaign_objective=current_state.values.get("campaign_objective", ""),
-        gender=current_state.values.get("gender", ""),
-        industry=current_state.values.get("industry", ""),
-        interests=current_state.values.get("interests", []),
-        locations=current_state.values.get("locations", [])[0] if current_state.values.get("locations") and len(current_state.values.get("locations", [])) > 0 else "",
-        product_description=current_state.values.get("product_description", ""),
-        product_name=current_state.values.get("product_name", ""),
-        psychographic_traits=current_state.values.get("psychographic_traits", []),
-        website=current_state.values.get("website", ""),
-        integrated_ad_platforms=current_state.values.get("integrated_ad_platforms", []),
-        recommended_ad_platforms=current_state.values.get("recommended_ad_platforms", []),
-        campaign_name=current_state.values.get("campaign_name", ""),
-        campaign_start_date=current_state.values.get("campaign_start_date", ""),
-        campaign_end_date=current_state.values.get("campaign_end_date", ""),
-        total_budget=current_state.values.get("total_budget", 0.0),
-        channel_budget_allocation=current_state.values.get("channel_budget_allocation", {})
-    )
+    return await build_campaign_result(current_state.values)
 
 
 @app.post("/request_creative_plan", 
@@ -443,20 +523,11 @@ async def get_campaign_plan(request_id: str) -> CampaignResultResponse:
     description="Initiates the process of generating creative assets for a marketing campaign based on the provided campaign details.",
     response_description="Returns a unique request ID to track the creative planning progress"
 )
-async def request_creative_plan(
-    request: CreativeSubmitRequest, 
-    background_tasks: BackgroundTasks
-) -> SubmitResponse:
+async def request_creative_plan(request: CreativeSubmitRequest) -> SubmitResponse:
     response = SubmitResponse(request_id=str(uuid.uuid4()))
 
-    thread_config = {
-        "configurable": {
-            "thread_id": response.request_id,
-        }
-    }
-
-    background_tasks.add_task(
-        creative_workflow.ainvoke, request.model_dump(), config=thread_config
+    await worker_pool.submit(
+        CREATIVE_PIPELINE, response.request_id, request.model_dump(mode="json")
     )
 
     return response
@@ -471,6 +542,12 @@ async def request_creative_plan(
 async def status_creative_plan(request_id: str) -> StatusResponse:
     # Clean the thread ID by removing any newline characters
     request_id = request_id.strip()
+
+    # The job row answers every state except BUILDING without loading the checkpoint
+    job = await worker_pool.queue.get(request_id)
+    if job is not None and job.status != ProcessingStatus.BUILDING:
+        return StatusResponse(processing_status=job.status)
+
     thread_config = {
         "configurable": {
             "thread_id": request_id,
@@ -484,12 +561,70 @@ async def status_creative_plan(request_id: str) -> StatusResponse:
             processing_status=ProcessingStatus.BUILDING,
             processing_node=current_state.next[0],
         )
+    elif job is not None:
+        # Claimed by a worker but no checkpoint written yet
+        response = StatusResponse(processing_status=ProcessingStatus.BUILDING)
     else:
         response = StatusResponse(processing_status=ProcessingStatus.COMPLETE)
 
     return response
 
 
+async def build_creative_result(values: dict) -> CreativeResultResponse:
+    """Return the signed URLs of the final creatives, uploaded when text layering completed"""
+    storage = get_storage_backend(config)
+    storage_config = config.get("STORAGE", {})
+    expiration_time = int(storage_config.get("SIGNED_URL_EXPIRATION_SECONDS", 3600))
+    refresh_margin = int(storage_config.get("SIGNED_URL_REFRESH_MARGIN_SECONDS", 300))
+
+    variants = sorted(
+        (variant for variant in values.get("variants") or [] if variant.get("output_blob_name")),
+        key=lambda variant: variant["variant_index"],
+    )
+    if not variants and values.get("output_blob_name"):
+        # Plans checkpointed before variants kept a single output at the top level
+        variants = [values]
+    if variants:
+        signed_urls = [
+            await storage.get_fresh_signed_url(
+                variant["output_blob_name"],
+                variant.get("signed_url"),
+                variant.get("signed_url_expires_at"),
+                expiration_time=expiration_time,
+                refresh_margin=refresh_margin,
+            )
+            for variant in variants
+        ]
+        return CreativeResultResponse(signed_url=signed_urls[0], signed_urls=signed_urls)
+
+    # Plans checkpointed before uploads moved into text layering keep the
+    # output next to the generated image and are uploaded here
+    image_path = values.get("generated_image_path")
+    if not image_path:
+        raise HTTPException(status_code=404, detail="Creative plan not ready yet")
+    output_path = os.path.join(os.path.dirname(image_path), "output.png")
+    if not os.path.exists(output_path):
+        raise HTTPException(status_code=404, detail="Creative plan not ready yet")
+
+    # Read the image file
+    with open(output_path, 'rb') as f:
+        image_data = f.read()
+        
+    # Generate a unique blob name
+    generation_id = f"{uuid.uuid4()}"
+    blob_name = f"image_gen_agents/{generation_id}/output.jpeg"
+    
+    # Save the image to storage and get the URL
+    image_url = await storage.upload(image_data, blob_name)
+    
+    # Generate signed URL
+    signed_url = await storage.generate_signed_url(blob_name, expiration_time)
+    if not signed_url:
+        raise HTTPException(status_code=500, detail="Failed to generate signed URL")
+        
+    return CreativeResultResponse(signed_url=signed_url, signed_urls=[signed_url])
+
+
 @app.get("/get_creative_plan/{request_id}", 
     response_model=CreativeResultResponse,
     summary="Get completed creative plan",
@@ -509,37 +644,86 @@ async def get_creative_plan(request_id: str):
         if not state:
             raise HTTPException(status_code=404, detail="Request ID not found")
         
-        # Get the text-layered image path from the state
-        image_path = state.values.get("generated_image_path")
-        if not image_path:
-            raise HTTPException(status_code=404, detail="Creative plan not ready yet")
-            
-        # Get the output image path from the same directory
-        output_path = os.path.join(os.path.dirname(image_path), "output.png")
-        if not os.path.exists(output_path):
-            raise HTTPException(status_code=404, detail="Creative plan not ready yet")
-            
-        # Read the image file
-        with open(output_path, 'rb') as f:
-            image_data = f.read()
-            
-        # Generate a unique blob name
-        generation_id = f"{uuid.uuid4()}"
-        blob_name = f"image_gen_agents/{generation_id}/output.jpeg"
-        
-        # Save the image to storage and get the URL
-        image_url = save_image(image_data, blob_name)
-        
-        # Generate signed URL
-        signed_url = get_signed_url(blob_name)
-        if not signed_url:
-            raise HTTPException(status_code=500, detail="Failed to generate signed URL")
-            
-        return CreativeResultResponse(signed_url=signed_url)
+        return await build_creative_result(state.values)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def stream_job_progress(request_id: str, pipeline_workflow, build_result):
+    """
+    Stream a job's progress as Server-Sent Events.
+
+    The first event is the job's current status. Node start and finish events
+    follow as workers publish them, and the final state is loaded once when
+    the job completes and sent as a `result` event.
+    """
+    job = await worker_pool.queue.get(request_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Request ID not found")
+
+    keepalive_seconds = config["PROGRESS"]["KEEPALIVE_SECONDS"]
+    thread_config = {
+        "configurable": {
+            "thread_id": request_id,
+        }
+    }
+
+    async def finished():
+        # The job ended before the client connected; no further events will come
+        if job.status == ProcessingStatus.COMPLETE:
+            yield ProgressEvent(request_id=request_id, type=ProgressEventType.COMPLETE)
+        else:
+            yield ProgressEvent(
+                request_id=request_id, type=ProgressEventType.FAILED, error=job.error
+            )
+
+    async def events():
+        yield format_sse("status", json.dumps({"processing_status": job.status.value}))
+
+        if job.status in (ProcessingStatus.COMPLETE, ProcessingStatus.FAILED):
+            progress = finished()
+        else:
+            progress = progress_broker.subscribe(request_id, keepalive_seconds)
+
+        async for event in progress:
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(event.type.value, event_data(event))
+            if event.type == ProgressEventType.COMPLETE:
+                try:
+                    state = await pipeline_workflow.aget_state(thread_config)
+                    result = await build_result(state.values)
+                    yield format_sse("result", result.model_dump_json())
+                except Exception as e:
+                    logger.error(f"{request_id} failed to build result: {str(e)}")
+                    yield format_sse("error", json.dumps({"detail": str(e)}))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/stream_campaign_plan/{request_id}",
+    summary="Stream campaign planning progress",
+    description="Pushes the status, node start and finish events and, once complete, the campaign plan as Server-Sent Events.",
+    response_description="A text/event-stream of progress events"
+)
+async def stream_campaign_plan(request_id: str) -> StreamingResponse:
+    return await stream_job_progress(request_id.strip(), workflow, build_campaign_result)
+
+
+@app.get("/stream_creative_plan/{request_id}",
+    summary="Stream creative planning progress",
+    description="Pushes the status, node start and finish events and, once complete, the creative result as Server-Sent Events.",
+    response_description="A text/event-stream of progress events"
+)
+async def stream_creative_plan(request_id: str) -> StreamingResponse:
+    return await stream_job_progress(request_id.strip(), creative_workflow, build_creative_result)
+
+
 @app.post("/determine_objective", 
     response_model=CampaignObjectiveResponse,
     summary="Determine campaign objective",
@@ -547,6 +731,8 @@ async def get_creative_plan(request_id: str):
     response_description="Returns the selected campaign objective and reasoning"
 )
 async def determine_objective(request: CampaignObjectiveRequest) -> CampaignObjectiveResponse:
+    # A user is waiting on this call; let it overtake queued background plans
+    llm_priority.set(Priority.INTERACTIVE)
     try:
         # Convert Pydantic model to dict and log the data
         input_data = request.model_dump()
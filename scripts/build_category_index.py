@@ -0,0 +1,51 @@
+"""
+Build the industry category index used by the brand industry classifier.
+
+The API only loads the index, so run this after changing the categories
+file or the embedding model, and as part of every deploy. Without --force
+the build is skipped when the current index matches both, and otherwise
+only new categories are described and embedded.
+
+Usage:
+    python scripts/build_category_index.py [--force] [--check] [--concurrency 8] [--batch-size 64]
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv  # noqa: E402
+
+from campaign_planner.utils import get_model_registry, load_config  # noqa: E402
+from campaign_planner.utils.category_index_builder import CategoryIndexBuilder  # noqa: E402
+
+
+async def main(args: argparse.Namespace) -> int:
+    config = load_config()
+    builder = CategoryIndexBuilder(config, args.concurrency, args.batch_size)
+    try:
+        fresh = builder.is_fresh()
+        if args.check:
+            print(f"Category index at {builder.index_path} is {'fresh' if fresh else 'stale'}")
+            return 0 if fresh else 1
+        if fresh and not args.force:
+            print(f"Category index at {builder.index_path} is up to date")
+            return 0
+
+        index = await builder.build(force=args.force)
+        print(f"Built category index of {len(index)} categories at {builder.index_path}")
+        return 0
+    finally:
+        await get_model_registry(config).aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--force", action="store_true", help="Regenerate every description and embedding")
+    parser.add_argument("--check", action="store_true", help="Only report whether the index is fresh; exit 1 if stale")
+    parser.add_argument("--concurrency", type=int, default=None, help="Concurrent description calls")
+    parser.add_argument("--batch-size", type=int, default=None, help="Texts per embedding request")
+    load_dotenv()
+    sys.exit(asyncio.run(main(parser.parse_args())))
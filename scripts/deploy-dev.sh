@@ -22,6 +22,9 @@ sudo bash -c '
 
   uv pip install -r requirements.txt
 
+  # Build the industry category index if the categories changed; the API only loads it
+  python3 scripts/build_category_index.py
+
 
   #Restart or start
   nohup python3 main.py > campaign_agent.log 2>&1 &
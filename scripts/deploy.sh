@@ -25,6 +25,9 @@ sudo bash -c '
   # Install Python dependencies from requirements.txt inside the virtual environment
   uv pip install -r requirements.txt
 
+  # Build the industry category index if the categories changed; the API only loads it
+  python3 scripts/build_category_index.py
+
   # Start FastAPI server using nohup to keep it running in background,
   # redirect stdout and stderr to campaign_agent.log file
   nohup python3 main.py > campaign_agent.log 2>&1 &
@@ -0,0 +1,153 @@
+"""
+Benchmark the CLIPSeg mask backends and check them against full-precision torch.
+
+Each backend runs in a fresh process, so the reported peak resident memory
+is its own. Masks of every backend are compared with the torch masks by IoU.
+
+Usage:
+    python scripts/mask_benchmark.py images/*.jpg --backends torch torch_int8 onnx
+"""
+import argparse
+import multiprocessing
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from campaign_planner.utils import load_config  # noqa: E402
+from creative_planner.agents.mask_generator.backends import (  # noqa: E402
+    BACKENDS,
+    MaskModelSpec,
+    mask_iou,
+)
+
+
+def run_backend(
+    spec: MaskModelSpec,
+    image_paths: List[str],
+    runs: int,
+    batch_size: int,
+    threshold: float,
+    torch_threads: int,
+    results: multiprocessing.Queue,
+) -> None:
+    """Measure one backend; runs in its own process"""
+    import numpy as np
+    import torch
+    from PIL import Image
+    from transformers import AutoProcessor
+    from creative_planner.agents.mask_generator.backends import build_backend
+
+    if torch_threads > 0:
+        torch.set_num_threads(torch_threads)
+
+    started_at = time.perf_counter()
+    processor = AutoProcessor.from_pretrained(spec.model_name)
+    backend = build_backend(spec)
+    load_seconds = time.perf_counter() - started_at
+
+    images = [Image.open(path).convert("RGB") for path in image_paths]
+    batches = [images[i:i + batch_size] for i in range(0, len(images), batch_size)]
+    inputs = [
+        processor(text=["background"] * len(batch), images=batch, padding=True, return_tensors="pt")
+        for batch in batches
+    ]
+
+    # Warm up once so one-off allocations do not count as latency
+    backend.predict(inputs[0])
+
+    latencies = []
+    masks = []
+    for run in range(runs):
+        for batch, batch_inputs in zip(batches, inputs):
+            started_at = time.perf_counter()
+            logits = backend.predict(batch_inputs)
+            latencies.append((time.perf_counter() - started_at) / len(batch))
+            if run == 0:
+                masks.extend(1 / (1 + np.exp(-logits)) < threshold)
+
+    results.put({
+        "backend": spec.backend,
+        "load_seconds": load_seconds,
+        "latencies": latencies,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "masks": masks,
+    })
+
+
+def benchmark(spec: MaskModelSpec, args: argparse.Namespace) -> Dict[str, Any]:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(
+        target=run_backend,
+        args=(spec, args.images, args.runs, args.batch_size, args.threshold, args.torch_threads, results),
+    )
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main() -> int:
+    options = load_config().get("MASK_GENERATOR", {})
+    defaults = MaskModelSpec.from_options(options)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", nargs="+", help="Sample images")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--runs", type=int, default=5, help="Passes over the images per backend")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--threshold", type=float, default=0.3, help="Mask threshold (MASK_THRESHOLD)")
+    parser.add_argument("--torch-threads", type=int, default=int(options.get("TORCH_THREADS", 0)))
+    parser.add_argument("--min-iou", type=float, default=float(options.get("PARITY_MIN_IOU", 0.9)))
+    parser.add_argument("--onnx-path", default=defaults.onnx_path)
+    args = parser.parse_args()
+
+    # The full-precision masks are the reference for every other backend
+    backends = ["torch"] + [name for name in args.backends if name != "torch"]
+    results = {}
+    for name in backends:
+        spec = MaskModelSpec(
+            model_name=defaults.model_name,
+            backend=name,
+            onnx_path=args.onnx_path,
+            onnx_threads=args.torch_threads,
+        )
+        print(f"Benchmarking {name}...", flush=True)
+        results[name] = benchmark(spec, args)
+
+    reference = results["torch"]["masks"]
+    header = f"{'backend':<12}{'load s':>8}{'mean ms':>10}{'p50 ms':>9}{'p95 ms':>9}{'peak MB':>10}{'min IoU':>9}{'mean IoU':>10}  parity"
+    print("\n" + header)
+    print("-" * len(header))
+
+    failed = False
+    for name in backends:
+        result = results[name]
+        latencies = [latency * 1000 for latency in result["latencies"]]
+        ious = [mask_iou(mask, ref) for mask, ref in zip(result["masks"], reference)]
+        passed = min(ious) >= args.min_iou
+        failed = failed or not passed
+        print(
+            f"{name:<12}{result['load_seconds']:>8.1f}{statistics.mean(latencies):>10.1f}"
+            f"{percentile(latencies, 0.5):>9.1f}{percentile(latencies, 0.95):>9.1f}"
+            f"{result['peak_rss_mb']:>10.0f}{min(ious):>9.3f}{statistics.mean(ious):>10.3f}"
+            f"  {'ok' if passed else 'FAIL'}"
+        )
+
+    print(f"\nLatency is per image at batch size {args.batch_size}; parity requires IoU >= {args.min_iou}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
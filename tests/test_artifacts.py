@@ -0,0 +1,188 @@
+import asyncio
+import io
+import pytest
+from PIL import Image
+from creative_planner.utils.artifacts import ArtifactStore, artifact_name, request_id_of
+from creative_planner.utils.error_handler import NyxAIException
+from creative_planner.utils.storage import StorageBackend
+
+
+class MemoryBackend(StorageBackend):
+    name = "MEMORY"
+
+    def __init__(self, upload_started=None, release_upload=None) -> None:
+        super().__init__()
+        self.blobs = {}
+        self.upload_started = upload_started
+        self.release_upload = release_upload
+
+    async def upload(self, data: bytes, blob_name: str) -> str:
+        if self.upload_started is not None:
+            self.upload_started.set()
+        if self.release_upload is not None:
+            await self.release_upload.wait()
+        if blob_name.endswith("broken"):
+            raise NyxAIException(internal_code=2010, message="Failed to save image")
+        self.blobs[blob_name] = data
+        return f"memory://{blob_name}"
+
+    async def download(self, blob_name: str) -> bytes:
+        if blob_name not in self.blobs:
+            raise NyxAIException(internal_code=404, message=f"No blob {blob_name}")
+        return self.blobs[blob_name]
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for name in [name for name in self.blobs if name.startswith(prefix)]:
+            del self.blobs[name]
+
+    async def generate_signed_url(self, blob_name: str, expiration_time: int) -> str:
+        return f"memory://{blob_name}?signed"
+
+
+def store(tmp_path, backend=None, **options) -> ArtifactStore:
+    return ArtifactStore({"SPILL_DIR": str(tmp_path / "spill"), **options}, backend)
+
+
+def png(color=(255, 0, 0), size=(8, 8)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_references():
+    assert ArtifactStore.key("req-1", "mask") == "artifact://req-1/mask"
+    assert ArtifactStore.is_artifact("artifact://req-1/mask")
+    assert not ArtifactStore.is_artifact("/tmp/mask.png")
+    assert not ArtifactStore.is_artifact(None)
+    assert request_id_of({"configurable": {"thread_id": "req-1"}}) == "req-1"
+    assert artifact_name({}, "image") == "image"
+    assert artifact_name({"variant_index": 2}, "image") == "image_2"
+
+
+def test_image_is_encoded_and_decoded_once(tmp_path):
+    artifacts = store(tmp_path)
+    reference = artifacts.put_image("req-1", "mask", Image.new("L", (4, 4), 255))
+
+    data = artifacts.get_bytes(reference)
+    assert data is artifacts.get_bytes(reference)
+    assert Image.open(io.BytesIO(data)).size == (4, 4)
+
+    reference = artifacts.put_bytes("req-1", "image", png())
+    assert artifacts.get_image(reference) is artifacts.get_image(reference)
+
+
+def test_least_recently_used_artifacts_are_spilled(tmp_path):
+    artifacts = store(tmp_path, MAX_MEMORY_MB=0)
+    first = artifacts.put_bytes("req-1", "image", png((1, 2, 3)))
+    artifacts.put_bytes("req-1", "mask", png((4, 5, 6)))
+
+    assert (tmp_path / "spill" / "req-1" / "image").exists()
+    assert artifacts.get_image(first).getpixel((0, 0)) == (1, 2, 3)
+
+
+def test_expired_artifact_is_not_found(tmp_path):
+    artifacts = store(tmp_path, TTL_SECONDS=-1, SPILL_TO_DISK=False)
+    reference = artifacts.put_bytes("req-1", "image", png())
+    with pytest.raises(NyxAIException) as error:
+        artifacts.get_bytes(reference)
+    assert error.value.internal_code == 7113
+
+
+def test_delete_request(tmp_path):
+    artifacts = store(tmp_path)
+    reference = artifacts.put_bytes("req-1", "image", png(), persist=True)
+    kept = artifacts.put_bytes("req-2", "image", png())
+
+    artifacts.delete_request("req-1")
+    with pytest.raises(NyxAIException):
+        artifacts.get_bytes(reference)
+    assert artifacts.get_bytes(kept)
+
+
+def test_resumed_job_reads_artifacts_back_from_storage(tmp_path):
+    backend = MemoryBackend()
+
+    async def run():
+        # The worker that ran the first stages
+        producer = store(tmp_path / "producer", backend)
+        image = await producer.aput_bytes("req-1", "image", png((7, 8, 9)))
+        mask = await producer.aput_image("req-1", "mask", Image.new("L", (8, 8), 255))
+        await producer.flush("req-1")
+
+        # A fresh process resuming the job from its checkpoint
+        consumer = store(tmp_path / "consumer", backend)
+        return image, mask, await consumer.aget_image(image), await consumer.aget_bytes(mask)
+
+    image, mask, restored_image, restored_mask = asyncio.run(run())
+    assert set(backend.blobs) == {"artifacts/req-1/image", "artifacts/req-1/mask"}
+    assert restored_image.getpixel((0, 0)) == (7, 8, 9)
+    assert Image.open(io.BytesIO(restored_mask)).getpixel((0, 0)) == 255
+
+
+def test_artifact_missing_everywhere_is_not_found(tmp_path):
+    artifacts = store(tmp_path, MemoryBackend())
+    with pytest.raises(NyxAIException) as error:
+        asyncio.run(artifacts.aget_bytes("artifact://req-1/image"))
+    assert error.value.internal_code == 7113
+
+
+def test_uploads_run_in_the_background_until_flushed(tmp_path):
+    async def run():
+        backend = MemoryBackend(asyncio.Event(), asyncio.Event())
+        artifacts = store(tmp_path, backend)
+        reference = await artifacts.aput_bytes("req-1", "image", png())
+        await artifacts.aput_bytes("req-1", "output", png(), durable=False)
+        # The reference is usable before the upload finished
+        local = artifacts.get_bytes(reference)
+        await backend.upload_started.wait()
+        uploaded_before_flush = set(backend.blobs)
+
+        flush = asyncio.create_task(artifacts.flush("req-1"))
+        await asyncio.sleep(0.01)
+        flushed_early = flush.done()
+        backend.release_upload.set()
+        await flush
+        return local, uploaded_before_flush, flushed_early, set(backend.blobs), artifacts._uploads
+
+    local, uploaded_before_flush, flushed_early, blobs, pending = asyncio.run(run())
+    assert local == png()
+    assert uploaded_before_flush == set()
+    assert not flushed_early
+    assert blobs == {"artifacts/req-1/image"}
+    assert pending == {}
+
+
+def test_flush_raises_a_failed_upload(tmp_path):
+    artifacts = store(tmp_path, MemoryBackend())
+
+    async def run():
+        await artifacts.aput_bytes("req-1", "broken", png())
+        await artifacts.aput_bytes("req-2", "image", png())
+        with pytest.raises(NyxAIException) as error:
+            await artifacts.flush("req-1")
+        # Uploads of other requests are not affected
+        await artifacts.flush("req-2")
+        return error.value
+
+    assert asyncio.run(run()).internal_code == 2010
+
+
+def test_finished_request_is_deleted_everywhere(tmp_path):
+    backend = MemoryBackend()
+    artifacts = store(tmp_path, backend)
+
+    async def run():
+        reference = await artifacts.aput_bytes("req-1", "image", png())
+        kept = await artifacts.aput_bytes("req-10", "image", png())
+        await artifacts.flush("req-1")
+        await artifacts.flush("req-10")
+        await artifacts.aput_bytes("req-1", "mask", png())
+        await artifacts.adelete_request("req-1")
+        return reference, kept
+
+    reference, kept = asyncio.run(run())
+    assert set(backend.blobs) == {"artifacts/req-10/image"}
+    assert artifacts._uploads == {}
+    with pytest.raises(NyxAIException):
+        artifacts.get_bytes(reference)
+    assert artifacts.get_bytes(kept)
@@ -0,0 +1,94 @@
+import pytest
+from pydantic import BaseModel
+from campaign_planner.agents.ad_channel_recommender import input as ad_channel_input
+from campaign_planner.agents.ad_channel_recommender import output as ad_channel_output
+from campaign_planner.agents.audience_segment_analyzer import input as audience_input
+from campaign_planner.agents.audience_segment_analyzer import output as audience_output
+from campaign_planner.agents.brand_industry_classifier import input as industry_input
+from campaign_planner.agents.brand_industry_classifier import output as industry_output
+from campaign_planner.agents.campaign_name_generator import input as name_input
+from campaign_planner.agents.campaign_name_generator import output as name_output
+from campaign_planner.agents.campaign_schedule_recommender import input as schedule_input
+from campaign_planner.agents.campaign_schedule_recommender import output as schedule_output
+from campaign_planner.agents.marketing_budget_allocator import input as budget_input
+from campaign_planner.agents.marketing_budget_allocator import output as budget_output
+from campaign_planner.graph import derive_stage_dependencies, execution_levels
+from campaign_planner.state import output_state
+
+
+class Stage:
+    """Only the schema accessors of an agent graph, without building its models"""
+
+    def __init__(self, input_schema: type, output_schema: type) -> None:
+        self.input_schema = input_schema
+        self.output_schema = output_schema
+
+    def get_input_schema(self) -> type:
+        return self.input_schema
+
+    def get_output_schema(self) -> type:
+        return self.output_schema
+
+
+def campaign_stages():
+    """The stages of CampaignPlanner, in the same data-flow order"""
+    return {
+        "brand_industry_classifier": Stage(industry_input.InputSchema, industry_output.OutputSchema),
+        "audience_segment_analyzer": Stage(audience_input.InputSchema, audience_output.OutputSchema),
+        "ad_channel_recommender": Stage(ad_channel_input.InputSchema, ad_channel_output.OutputSchema),
+        "campaign_schedule_recommender": Stage(schedule_input.InputSchema, schedule_output.OutputSchema),
+        "marketing_budget_allocator": Stage(budget_input.InputSchema, budget_output.OutputSchema),
+        "campaign_name_generator": Stage(name_input.InputSchema, name_output.OutputSchema),
+    }
+
+
+def test_campaign_schedule():
+    dependencies = derive_stage_dependencies(campaign_stages())
+    assert execution_levels(dependencies) == [
+        ["brand_industry_classifier"],
+        ["audience_segment_analyzer"],
+        ["ad_channel_recommender"],
+        ["campaign_schedule_recommender"],
+        ["marketing_budget_allocator", "campaign_name_generator"],
+    ]
+
+
+def test_only_direct_predecessors_are_kept():
+    dependencies = derive_stage_dependencies(campaign_stages())
+    assert dependencies["brand_industry_classifier"] == []
+    # Both read fields of earlier stages, but only wait for the schedule
+    assert dependencies["marketing_budget_allocator"] == ["campaign_schedule_recommender"]
+    assert dependencies["campaign_name_generator"] == ["campaign_schedule_recommender"]
+
+
+class Source(BaseModel):
+    brand_name: str
+
+
+class Summary(BaseModel):
+    summary: str
+
+
+def test_concurrent_stages_writing_the_same_field_are_rejected():
+    stages = {
+        "first": Stage(Source, Summary),
+        "second": Stage(Source, Summary),
+    }
+    with pytest.raises(ValueError, match="first and second"):
+        derive_stage_dependencies(stages)
+
+
+def test_sequential_stages_may_rewrite_a_field():
+    class Rewrite(BaseModel):
+        summary: str
+
+    stages = {
+        "first": Stage(Source, Summary),
+        "second": Stage(Rewrite, Summary),
+    }
+    assert execution_levels(derive_stage_dependencies(stages)) == [["first"], ["second"]]
+
+
+def test_output_state_keeps_messages_flowing():
+    fields = output_state(ad_channel_output.OutputSchema).__annotations__
+    assert set(fields) == {"messages", *ad_channel_output.OutputSchema.model_fields}
@@ -0,0 +1,97 @@
+import json
+import numpy as np
+import pytest
+from campaign_planner.utils.category_index import (
+    INDEX_FORMAT_VERSION,
+    MANIFEST_FILE,
+    CategoryIndex,
+    categories_hash,
+    read_manifest,
+)
+
+CATEGORIES = ["Shoes", "Sneakers", "Banking", "Insurance"]
+VECTORS = [
+    [1.0, 0.0, 0.0],
+    [0.95, 0.05, 0.0],
+    [0.0, 1.0, 0.0],
+    [0.0, 0.8, 0.6],
+]
+
+
+@pytest.fixture
+def index():
+    return CategoryIndex.from_embeddings(
+        VECTORS,
+        CATEGORIES,
+        [f"{category} description" for category in CATEGORIES],
+        metadata={"categories_hash": categories_hash(CATEGORIES), "embedding_model": "small"},
+    )
+
+
+def test_search_ranks_by_cosine_similarity(index):
+    ranked = index.search([1.0, 0.0, 0.1], k=3)
+    assert [index.categories[position] for position, _ in ranked] == ["Shoes", "Sneakers", "Insurance"]
+    assert ranked[0][1] == pytest.approx(0.995, abs=1e-3)
+    assert len(index.search([1.0, 0.0, 0.0], k=10)) == len(CATEGORIES)
+
+
+def test_max_marginal_relevance_prefers_diverse_categories(index):
+    query = [1.0, 0.0, 0.1]
+    similar = index.search(query, k=2)
+    diverse = index.max_marginal_relevance_search(query, k=2, fetch_k=4, lambda_mult=0.5)
+
+    assert [index.categories[position] for position, _ in similar] == ["Shoes", "Sneakers"]
+    assert [index.categories[position] for position, _ in diverse] == ["Shoes", "Insurance"]
+    # Scores stay the similarity to the query
+    assert diverse[0][1] == pytest.approx(similar[0][1])
+
+
+def test_saves_in_the_same_second_are_separate_versions(index, tmp_path):
+    path = tmp_path / "category_index"
+    first = index.save(str(path))
+    second = index.save(str(path))
+
+    assert first != second
+    assert read_manifest(str(path))["version"] == second
+    assert not [entry for entry in path.iterdir() if entry.name.startswith(".")]
+
+    loaded = CategoryIndex.load(str(path))
+    assert loaded.categories == CATEGORIES
+    assert loaded.is_fresh(categories_hash(CATEGORIES), "small")
+    assert not loaded.is_fresh(categories_hash(CATEGORIES), "large")
+    np.testing.assert_allclose(loaded.matrix, index.matrix)
+
+
+def test_old_versions_are_pruned(index, tmp_path):
+    path = tmp_path / "category_index"
+    versions = [index.save(str(path), keep=2) for _ in range(4)]
+
+    kept = sorted(entry.name for entry in path.iterdir() if entry.is_dir())
+    assert len(kept) == 2
+    assert versions[-1] in kept
+
+
+def test_failed_save_leaves_no_temporary_files(tmp_path):
+    broken = CategoryIndex(np.array([["not a vector"]]), ["Shoes"], ["Shoes description"])
+    path = tmp_path / "category_index"
+    with pytest.raises(ValueError):
+        broken.save(str(path))
+    assert list(path.iterdir()) == []
+
+
+def test_manifest_of_an_unversioned_index(index, tmp_path):
+    # Indexes saved before versioning keep their files at the top level
+    metadata = {
+        **index.metadata,
+        "format_version": INDEX_FORMAT_VERSION,
+        "categories": CATEGORIES,
+        "descriptions": index.descriptions,
+    }
+    (tmp_path / "metadata.json").write_text(json.dumps(metadata))
+    np.save(tmp_path / "embeddings.npy", index.matrix)
+
+    manifest = read_manifest(str(tmp_path))
+    assert manifest["version"] is None
+    assert manifest["count"] == len(CATEGORIES)
+    assert not (tmp_path / MANIFEST_FILE).exists()
+    assert CategoryIndex.load(str(tmp_path)).categories == CATEGORIES
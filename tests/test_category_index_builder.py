@@ -0,0 +1,119 @@
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from langchain_core.messages import AIMessage
+from campaign_planner.utils import category_index_builder
+from campaign_planner.utils.category_index import CategoryIndex
+from campaign_planner.utils.category_index_builder import CategoryIndexBuilder
+
+
+class FakeEmbeddings:
+    def __init__(self, model) -> None:
+        self.model = model
+        self.batches = []
+
+    async def aembed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text)), 1.0 if self.model == "small" else -1.0, 0.5] for text in texts]
+
+
+class FakeRateLimiter:
+    """Describes categories like a chat model; some fail or come back empty"""
+
+    def __init__(self, failing=(), empty=()) -> None:
+        self.failing = failing
+        self.empty = empty
+        self.described = []
+
+    async def ainvoke(self, model, messages, **kwargs):
+        category = re.search(r"industry category: (.+?)\.\n", messages[0].content).group(1)
+        self.described.append(category)
+        if category in self.failing:
+            raise RuntimeError("rate limited")
+        return AIMessage(content="" if category in self.empty else f" {category} businesses \n")
+
+
+@pytest.fixture
+def build(tmp_path, monkeypatch):
+    categories_path = tmp_path / "categories.json"
+    limiter = FakeRateLimiter()
+    monkeypatch.setattr(category_index_builder, "get_rate_limiter", lambda config, model_name: limiter)
+    monkeypatch.setattr(
+        category_index_builder,
+        "get_model_registry",
+        lambda config: SimpleNamespace(embeddings=lambda model: FakeEmbeddings(model)),
+    )
+    monkeypatch.setattr(
+        category_index_builder,
+        "Generator",
+        lambda config: SimpleNamespace(
+            get_model=lambda: SimpleNamespace(model_name="fake-model", max_tokens=256)
+        ),
+    )
+
+    def run(categories, embedding_model="small", force=False, batch_size=64):
+        categories_path.write_text(json.dumps({"categories": categories}))
+        config = {
+            "DATASTORE": {"PATH": str(tmp_path / "datastore"), "INDEX_PATH": str(tmp_path / "index")},
+            "DATA": {"CATEGORIES_PATH": str(categories_path)},
+            "OPENAI": {"EMBEDDINGS": {"MODEL_NAME": embedding_model}},
+        }
+        limiter.described = []
+        builder = CategoryIndexBuilder(config, concurrency=2, batch_size=batch_size)
+        index = asyncio.run(builder.build(force=force))
+        return index, builder.embeddings.batches, list(limiter.described)
+
+    run.limiter = limiter
+    run.index_path = str(tmp_path / "index")
+    return run
+
+
+def test_descriptions_are_embedded_in_batches(build):
+    categories = ["Footwear", "Apparel", "Banking", "Insurance", "Beverages"]
+    index, batches, described = build(categories, batch_size=2)
+
+    assert sorted(described) == sorted(categories)
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert index.descriptions[0] == "Footwear businesses"
+    loaded = CategoryIndex.load(build.index_path)
+    assert loaded.categories == categories
+    assert loaded.metadata["embedding_model"] == "small"
+
+
+def test_unchanged_categories_reuse_their_description_and_vector(build):
+    first, _, _ = build(["Footwear", "Apparel"])
+    second, batches, described = build(["Footwear", "Apparel", "Banking"])
+
+    assert described == ["Banking"]
+    assert batches == [["Banking businesses"]]
+    np.testing.assert_allclose(second.matrix[:2], first.matrix)
+
+    _, _, described = build(["Footwear", "Apparel", "Banking"], force=True)
+    assert sorted(described) == ["Apparel", "Banking", "Footwear"]
+
+
+def test_another_embedding_model_re_embeds_every_description(build):
+    first, _, _ = build(["Footwear", "Apparel"])
+    second, batches, described = build(["Footwear", "Apparel"], embedding_model="large")
+
+    # The descriptions are kept; only the vectors are recomputed
+    assert described == []
+    assert batches == [["Footwear businesses", "Apparel businesses"]]
+    assert second.descriptions == first.descriptions
+    assert not np.allclose(second.matrix, first.matrix)
+    assert CategoryIndex.load(build.index_path).metadata["embedding_model"] == "large"
+
+
+def test_failed_descriptions_abort_the_build(build):
+    build(["Footwear"])
+    build.limiter.failing = ("Banking",)
+    build.limiter.empty = ("Insurance",)
+
+    with pytest.raises(RuntimeError, match="Could not describe 2 categories") as error:
+        build(["Footwear", "Banking", "Insurance", "Apparel"])
+    assert "Banking" in str(error.value) and "Insurance" in str(error.value)
+    # The previous index stays current
+    assert CategoryIndex.load(build.index_path).categories == ["Footwear"]
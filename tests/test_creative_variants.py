@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from creative_planner.graph import CreativePlanner, _RequestSlots
+
+
+def test_variants_of_a_request_share_its_limit():
+    async def run():
+        slots = _RequestSlots(2)
+        active = {"req-1": 0, "req-2": 0}
+        peak = {"req-1": 0, "req-2": 0}
+
+        async def variant(request_id):
+            async with slots.acquire(request_id):
+                active[request_id] += 1
+                peak[request_id] = max(peak[request_id], active[request_id])
+                await asyncio.sleep(0.01)
+                active[request_id] -= 1
+
+        await asyncio.gather(*(variant(request_id) for request_id in ["req-1", "req-2"] * 4))
+        return peak, slots._slots
+
+    peak, remaining = asyncio.run(run())
+    # Each request is limited on its own, not by the other's variants
+    assert peak == {"req-1": 2, "req-2": 2}
+    assert remaining == {}
+
+
+def test_slot_is_released_when_a_variant_fails():
+    async def run():
+        slots = _RequestSlots(1)
+        with pytest.raises(RuntimeError):
+            async with slots.acquire("req-1"):
+                raise RuntimeError("image provider failed")
+        async with slots.acquire("req-1"):
+            pass
+        return slots._slots
+
+    assert asyncio.run(run()) == {}
+
+
+def test_fan_out_sends_one_branch_per_variant():
+    state = {"prompt": "a beach", "num_variants": 3, "variants": [{"variant_index": 0}]}
+    sends = CreativePlanner._fan_out(state)
+
+    assert [send.node for send in sends] == ["creative_variant"] * 3
+    assert [send.arg["variant_index"] for send in sends] == [0, 1, 2]
+    assert all("variants" not in send.arg and send.arg["prompt"] == "a beach" for send in sends)
+
+
+def test_fan_out_sends_at_least_one_branch():
+    assert len(CreativePlanner._fan_out({"num_variants": None})) == 1
@@ -0,0 +1,117 @@
+import asyncio
+from typing import List
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+from campaign_planner.utils.embedding_cache import (
+    CachedEmbeddings,
+    EmbeddingCache,
+    embedding_key,
+)
+
+
+class CountingEmbeddings(Embeddings):
+    """Embeds a text as [length, number of words], recording every request"""
+
+    def __init__(self) -> None:
+        self.requests: List[List[str]] = []
+        self.release = asyncio.Event()
+        self.release.set()
+        self.error = None
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.requests.append(list(texts))
+        return [[float(len(text)), float(len(text.split()))] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.requests.append(list(texts))
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return [[float(len(text)), float(len(text.split()))] for text in texts]
+
+
+@pytest.fixture
+def embeddings():
+    return CountingEmbeddings()
+
+
+def cached(embeddings, cache=None) -> CachedEmbeddings:
+    return CachedEmbeddings(embeddings, cache or EmbeddingCache(), "small", batch_window_seconds=0.01)
+
+
+def test_keys_ignore_whitespace_and_unicode_forms():
+    assert embedding_key("Organic  skin\ncare", "small") == embedding_key("Organic skin care", "small")
+    assert embedding_key("ｃａｆé", "small") == embedding_key("café", "small")
+    assert embedding_key("Shoes", "small") != embedding_key("shoes", "small")
+    assert embedding_key("Shoes", "small") != embedding_key("Shoes", "large")
+
+
+def test_memory_layer_is_bounded_and_disk_layer_persists(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    cache = EmbeddingCache(path, max_entries=2)
+    cache.set_many({key: np.array([i], dtype=np.float32) for i, key in enumerate("abc")})
+    assert list(cache._entries) == ["b", "c"]
+    cache.close()
+
+    reopened = EmbeddingCache(path, max_entries=2)
+    assert reopened.get_many(["a", "c", "d"], "small").keys() == {"a", "c"}
+    reopened.close()
+
+
+def test_repeated_texts_are_embedded_once(embeddings):
+    client = cached(embeddings)
+    first = client.embed_documents(["Shoes", "Banking", "Shoes"])
+    second = client.embed_documents(["Banking", "Shoes"])
+
+    assert embeddings.requests == [["Shoes", "Banking"]]
+    assert first == [[5.0, 1.0], [7.0, 1.0], [5.0, 1.0]]
+    assert second == first[1:]
+
+
+def test_concurrent_misses_share_one_request(embeddings):
+    client = cached(embeddings)
+
+    async def run():
+        return await asyncio.gather(*(client.aembed_query(text) for text in ["a", "bb", "a", "ccc"]))
+
+    assert asyncio.run(run()) == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0], [3.0, 1.0]]
+    assert embeddings.requests == [["a", "bb", "ccc"]]
+    assert client._pending == {} and client._flush_tasks == set()
+
+
+def test_text_in_flight_is_not_embedded_again(embeddings):
+    client = cached(embeddings)
+    embeddings.release.clear()
+
+    async def run():
+        first = asyncio.create_task(client.aembed_query("Shoes"))
+        # Wait until the first request is sent and still unanswered
+        while not embeddings.requests:
+            await asyncio.sleep(0.005)
+        second = asyncio.create_task(client.aembed_query("Shoes"))
+        await asyncio.sleep(0.05)
+        embeddings.release.set()
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(run()) == [[5.0, 1.0], [5.0, 1.0]]
+    assert embeddings.requests == [["Shoes"]]
+
+
+def test_failed_request_fails_every_waiter(embeddings):
+    client = cached(embeddings)
+    embeddings.error = RuntimeError("embedding API down")
+
+    async def run():
+        return await asyncio.gather(
+            client.aembed_query("Shoes"), client.aembed_query("Shoes"), return_exceptions=True
+        )
+
+    assert [str(result) for result in asyncio.run(run())] == ["embedding API down"] * 2
+    assert client._pending == {}
+
+    embeddings.error = None
+    assert asyncio.run(client.aembed_query("Shoes")) == [5.0, 1.0]
@@ -0,0 +1,112 @@
+import asyncio
+import sqlite3
+import pytest
+from campaign_planner.agents.audience_segment_analyzer import fabric, goals
+from campaign_planner.agents.audience_segment_analyzer.fabric import SQLiteFabricClient
+from campaign_planner.agents.audience_segment_analyzer.goals import (
+    GoalsCache,
+    get_goals_from_fabric,
+)
+
+ROWS = [
+    # account_id, campaign_objective, video_views, cost, impressions, clicks, conversions
+    ("acc-1", "Awareness", 100, 10.0, 1000, 50, 5),
+    ("acc-2", "Awareness", 300, 30.0, 3000, 70, 7),
+    ("acc-3", "Traffic", 900, 90.0, 9000, 90, 9),
+]
+
+
+class CountingClient(SQLiteFabricClient):
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self.queries = 0
+
+    async def fetch_one(self, query, params=None):
+        self.queries += 1
+        return await super().fetch_one(query, params)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    path = tmp_path / "fabric.sqlite3"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE merged_ads_final (
+                account_id TEXT, campaign_objective TEXT, video_views REAL,
+                cost REAL, impressions REAL, clicks REAL, conversions REAL
+            )
+            """
+        )
+        conn.executemany("INSERT INTO merged_ads_final VALUES (?, ?, ?, ?, ?, ?, ?)", ROWS)
+
+    client = CountingClient(str(path))
+    monkeypatch.setattr(fabric, "_client", client)
+    monkeypatch.setattr(goals, "goals_cache", GoalsCache())
+    yield client
+    client.close()
+
+
+def test_account_level_wins(client):
+    result = asyncio.run(get_goals_from_fabric(["acc-1"], "Brand Awareness"))
+    assert result == {
+        "views": 100.0,
+        "spend": 10.0,
+        "impressions": 1000.0,
+        "clicks": 50.0,
+        "conversions": 5.0,
+    }
+    assert client.queries == 1
+
+
+def test_falls_back_to_objective_then_global(client):
+    # No row of acc-3 has the Awareness objective
+    assert asyncio.run(get_goals_from_fabric(["acc-3"], "Brand Awareness"))["views"] == 300.0
+    # No row at all has the Conversions objective
+    assert asyncio.run(get_goals_from_fabric([], "Website Conversion"))["views"] == 900.0
+
+
+def test_warm_cache_needs_no_query_without_accounts(client):
+    async def run():
+        first = await get_goals_from_fabric(["acc-1", "acc-2"], "Brand Awareness")
+        queries = client.queries
+        second = await get_goals_from_fabric([], "Brand Awareness")
+        return first, second, client.queries - queries
+
+    first, second, queries = asyncio.run(run())
+    assert first["views"] == 300.0
+    assert second["views"] == 300.0
+    assert queries == 0
+
+
+def test_warm_cache_queries_only_the_account_level(client):
+    async def run():
+        await get_goals_from_fabric([], "Brand Awareness")
+        queries = client.queries
+        result = await get_goals_from_fabric(["acc-2"], "Brand Awareness")
+        return result, client.queries - queries
+
+    result, queries = asyncio.run(run())
+    assert result["views"] == 300.0
+    assert queries == 1
+
+
+def test_stale_entry_is_served_and_refreshed(client):
+    cache = GoalsCache(ttl_seconds=60, refresh_after_seconds=0)
+    cache.put("Awareness", {"objective": {"views": 1.0}, "global": {}})
+
+    async def run():
+        served = cache.get("Awareness", client)
+        await asyncio.gather(*cache._refreshing.values())
+        return served, cache._entries["Awareness"][1]
+
+    served, refreshed = asyncio.run(run())
+    assert served["objective"] == {"views": 1.0}
+    assert refreshed["objective"]["views"] == 300.0
+    assert refreshed["global"]["views"] == 900.0
+
+
+def test_expired_entry_is_missing(client):
+    cache = GoalsCache(ttl_seconds=0, refresh_after_seconds=0)
+    cache.put("Awareness", {"objective": {"views": 1.0}, "global": {}})
+    assert cache.get("Awareness", client) is None
@@ -0,0 +1,133 @@
+import asyncio
+import time
+import httpx
+import pytest
+from creative_planner.utils.error_handler import NyxAIException
+from creative_planner.utils.image_providers import ImageProvider, ImageProviderEngine
+
+POLL_URL = "https://flux.test/get_result"
+
+
+def engine(handler, **options) -> ImageProviderEngine:
+    providers = ImageProviderEngine(options)
+    providers.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return providers
+
+
+def flux_api(statuses, requests):
+    """A Flux API whose generation goes through the given statuses, then is Ready"""
+    pending = list(statuses)
+
+    def handle(request):
+        requests.append((request.method, str(request.url), time.monotonic()))
+        if request.method == "POST":
+            return httpx.Response(200, json={"id": "gen-1"})
+        if request.url.path == "/get_result":
+            assert request.url.params["id"] == "gen-1"
+            if pending:
+                return httpx.Response(200, json={"status": pending.pop(0)})
+            return httpx.Response(
+                200, json={"status": "Ready", "result": {"sample": "https://cdn.test/gen-1.jpg"}}
+            )
+        return httpx.Response(200, content=b"jpeg bytes", headers={"content-type": "image/jpeg"})
+
+    return handle
+
+
+@pytest.fixture
+def flux_env(monkeypatch):
+    monkeypatch.setenv("FLUX_API_HOST_POST", "https://flux.test/flux-pro-1.1")
+    monkeypatch.setenv("FLUX_API_HOST_GET", POLL_URL)
+    monkeypatch.setenv("NYX_BFL_FLUX_KEY", "key")
+
+
+def test_generation_is_polled_with_exponential_backoff(flux_env, monkeypatch):
+    requests, sleeps = [], []
+    real_sleep = asyncio.sleep
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    providers = engine(
+        flux_api(["Pending", "InProgress", "Pending", "Pending", "Pending"], requests),
+        POLL={"INITIAL_INTERVAL_SECONDS": 0.5, "MAX_INTERVAL_SECONDS": 3},
+    )
+    result = asyncio.run(providers.generate("Flux pro 1.1", "red shoes"))
+
+    assert sleeps == [0.5, 1.0, 2.0, 3, 3]
+    assert [method for method, _, _ in requests] == ["POST"] + ["GET"] * 7
+    assert result.data == b"jpeg bytes"
+    assert (result.provider, result.content_type) == ("flux", "image/jpeg")
+    assert result.source_url == "https://cdn.test/gen-1.jpg"
+
+
+def test_generation_pending_past_the_deadline_times_out(flux_env):
+    requests = []
+    providers = engine(
+        flux_api(["Pending"] * 1000, requests),
+        POLL={"INITIAL_INTERVAL_SECONDS": 0.01, "MAX_INTERVAL_SECONDS": 0.02, "DEADLINE_SECONDS": 0.1},
+    )
+    started_at = time.monotonic()
+    with pytest.raises(NyxAIException) as error:
+        asyncio.run(providers.generate("Flux pro 1.1", "red shoes"))
+
+    assert error.value.internal_code == 7204
+    assert "Still Pending" in error.value.detail
+    # The last wait is cut short at the deadline
+    assert time.monotonic() - started_at < 0.5
+    polls = [at for method, url, at in requests if url.startswith(POLL_URL)]
+    assert 4 <= len(polls) <= 12
+
+
+class SlowProvider(ImageProvider):
+    """A provider whose generations take a while; counts those in flight"""
+
+    def __init__(self, name, model_name) -> None:
+        self.name = name
+        self.model_name = model_name
+        self.active = 0
+        self.peak = 0
+
+    async def generate_image_url(self, engine, prompt):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            response = await engine.http_client.post(f"https://{self.name}.test/generate")
+            return response.json()["url"]
+        finally:
+            self.active -= 1
+
+
+def test_each_provider_runs_at_most_its_concurrency():
+    async def handle(request):
+        if request.method == "POST":
+            await asyncio.sleep(0.02)
+            return httpx.Response(200, json={"url": f"https://cdn.test/{request.url.host}.jpg"})
+        return httpx.Response(200, content=b"image")
+
+    async def run():
+        providers = engine(
+            handle, PROVIDERS={"slow": {"MAX_CONCURRENCY": 2}, "other": {"MAX_CONCURRENCY": 4}}
+        )
+        slow = SlowProvider("slow", "Slow 1.0")
+        other = SlowProvider("other", "Other 1.0")
+        providers.register(slow)
+        providers.register(other)
+        await asyncio.gather(
+            *[providers.generate("Slow 1.0", "shoes") for _ in range(6)],
+            *[providers.generate("Other 1.0", "shoes") for _ in range(4)],
+        )
+        await providers.aclose()
+        return slow.peak, other.peak
+
+    # A saturated provider does not hold the slots of another
+    assert asyncio.run(run()) == (2, 4)
+
+
+def test_unsupported_model_is_rejected():
+    providers = engine(lambda request: httpx.Response(500))
+    with pytest.raises(NyxAIException) as error:
+        asyncio.run(providers.generate("Midjourney", "shoes"))
+    assert (error.value.internal_code, error.value.http_status_code) == (7201, 400)
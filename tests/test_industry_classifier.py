@@ -0,0 +1,139 @@
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage
+from campaign_planner.agents.base import process
+from campaign_planner.agents.brand_industry_classifier.output import OutputNode
+from campaign_planner.agents.brand_industry_classifier.single_shot import SingleShotProcessNode
+
+
+def node(decisive_margin):
+    # Only the margin is needed; the model and retriever are not
+    process_node = SingleShotProcessNode.__new__(SingleShotProcessNode)
+    process_node.decisive_margin = decisive_margin
+    return process_node
+
+
+@pytest.mark.parametrize(
+    "candidates, decisive",
+    [
+        ([("Footwear", 0.875), ("Apparel", 0.5)], True),
+        # A lead of exactly the margin is decisive
+        ([("Footwear", 0.75), ("Apparel", 0.5)], True),
+        ([("Footwear", 0.75), ("Apparel", 0.625)], False),
+        ([("Footwear", 0.375)], True),
+    ],
+)
+def test_best_category_is_taken_when_it_leads_by_the_margin(candidates, decisive):
+    assert node(0.25)._is_decisive(candidates) is decisive
+
+
+def test_without_a_margin_the_model_always_decides():
+    assert node(None)._is_decisive([("Footwear", 0.9), ("Apparel", 0.1)]) is False
+    assert node(None)._is_decisive([("Footwear", 0.9)]) is False
+
+
+def test_query_joins_the_brand_and_product_fields():
+    state = {"brand_name": "Nimbus", "brand_description": "", "product_name": "Runner 2"}
+    assert SingleShotProcessNode._query(state) == "Nimbus\nRunner 2"
+
+
+class FakeChatModel(FakeListChatModel):
+    model_name: str = "fake-model"
+    max_tokens: int = 64
+
+
+class FakeIndex:
+    """Scores every category by its position in the query vector"""
+
+    categories = ["Footwear", "Apparel", "Beverages", "Banking"]
+
+    def search(self, query_vector, top_k):
+        ranked = sorted(enumerate(query_vector), key=lambda item: item[1], reverse=True)
+        return ranked[:top_k]
+
+
+class FakeEmbeddings:
+    def __init__(self, vector) -> None:
+        self.vector = vector
+        self.queries = []
+
+    async def aembed_query(self, text):
+        self.queries.append(text)
+        return self.vector
+
+
+class FakeRateLimiter:
+    def __init__(self) -> None:
+        self.agents = []
+        self.inputs = []
+
+    async def ainvoke(self, agent, inputs, **kwargs):
+        self.agents.append(agent)
+        self.inputs.append(inputs)
+        return await agent.ainvoke(inputs)
+
+
+STATE = {
+    "brand_name": "Nimbus",
+    "website": "nimbus.test",
+    "brand_description": "Running shoes",
+    "product_name": "Runner 2",
+    "product_description": "A trail running shoe",
+    "messages": [],
+}
+CONFIG = {"configurable": {"thread_id": "thread-1"}}
+
+
+@pytest.fixture
+def classifier(monkeypatch):
+    limiter = FakeRateLimiter()
+    monkeypatch.setattr(process, "get_rate_limiter", lambda config, model_name: limiter)
+
+    def build(vector, response='{"industry": "Apparel"}'):
+        # The constructor needs a model registry; the attributes are set directly
+        classifier_node = SingleShotProcessNode.__new__(SingleShotProcessNode)
+        classifier_node.config = {}
+        classifier_node.llm = FakeChatModel(responses=[response])
+        classifier_node.prompt = SingleShotProcessNode._load_prompt(
+            Path(process.__file__).parents[1] / "brand_industry_classifier" / "single_shot_prompt.yaml"
+        )
+        classifier_node.prompt.partial_variables["format_instructions"] = (
+            OutputNode.output_parser.get_format_instructions()
+        )
+        classifier_node.agent_name = "brand_industry_classifier"
+        classifier_node.llm_cache = None
+        classifier_node.retriever = SimpleNamespace(index=FakeIndex(), embeddings=FakeEmbeddings(vector))
+        classifier_node.top_k = 3
+        classifier_node.decisive_margin = 0.25
+        return classifier_node, limiter
+
+    return build
+
+
+def test_decisive_retrieval_answers_without_the_model(classifier):
+    classifier_node, limiter = classifier([0.875, 0.5, 0.25, 0.0])
+    result = asyncio.run(classifier_node.process(STATE, CONFIG))
+
+    message = result["messages"][0]
+    assert isinstance(message, AIMessage)
+    assert OutputNode.output_parser.invoke(message).industry == "Footwear"
+    assert limiter.agents == []
+    assert classifier_node.retriever.embeddings.queries == [
+        "Nimbus\nRunning shoes\nRunner 2\nA trail running shoe"
+    ]
+
+
+def test_close_candidates_are_left_to_the_constrained_model(classifier):
+    classifier_node, limiter = classifier([0.75, 0.625, 0.5, 0.0])
+    result = asyncio.run(classifier_node.process(STATE, CONFIG))
+
+    assert OutputNode.output_parser.invoke(result["messages"][0]).industry == "Apparel"
+    (agent,) = limiter.agents
+    response_format = agent.last.kwargs["response_format"]
+    schema = response_format["json_schema"]["schema"]
+    assert response_format["json_schema"]["strict"] is True
+    assert schema["properties"]["industry"]["enum"] == ["Footwear", "Apparel", "Beverages"]
+    assert limiter.inputs[0]["candidates"] == "- Footwear\n- Apparel\n- Beverages"
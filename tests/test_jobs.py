@@ -0,0 +1,200 @@
+import asyncio
+from typing import TypedDict
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, StateGraph
+from campaign_planner.utils.jobs import (
+    InMemoryJobQueue,
+    Job,
+    ProcessingStatus,
+    WorkerPool,
+    graph_job_handler,
+)
+from campaign_planner.utils.progress import ProgressBroker, ProgressEventType
+
+
+def jobs_config(**concurrency):
+    return {
+        "JOBS": {
+            "POLL_INTERVAL_SECONDS": 0.01,
+            "LEASE_SECONDS": 30,
+            "MAX_ATTEMPTS": 2,
+            "CONCURRENCY": concurrency,
+        }
+    }
+
+
+async def wait_until_finished(queue, job_ids, timeout=2.0):
+    async def finished():
+        while True:
+            jobs = [await queue.get(job_id) for job_id in job_ids]
+            if all(job.status in (ProcessingStatus.COMPLETE, ProcessingStatus.FAILED) for job in jobs):
+                return jobs
+            await asyncio.sleep(0.005)
+
+    return await asyncio.wait_for(finished(), timeout)
+
+
+def test_in_memory_queue_claims_jobs_in_order():
+    async def run():
+        queue = InMemoryJobQueue()
+        await queue.enqueue(Job(id="first", pipeline="campaign_plan", payload={}))
+        await queue.enqueue(Job(id="second", pipeline="campaign_plan", payload={}))
+        await queue.enqueue(Job(id="other", pipeline="creative_plan", payload={}))
+        depth = await queue.depth("campaign_plan")
+
+        claimed = await queue.dequeue("campaign_plan", 30)
+        await queue.mark_failed(claimed.id, "boom")
+        return depth, claimed, await queue.get("first"), await queue.depth("campaign_plan")
+
+    depth, claimed, stored, remaining = asyncio.run(run())
+    assert depth == 2 and remaining == 1
+    assert claimed.id == "first"
+    assert claimed.status == ProcessingStatus.BUILDING and claimed.attempts == 1
+    assert stored.status == ProcessingStatus.FAILED and stored.error == "boom"
+
+
+def test_jobs_complete_or_fail_with_their_handler():
+    async def run():
+        queue = InMemoryJobQueue()
+        broker = ProgressBroker()
+        pool = WorkerPool(queue, jobs_config(plan=1), broker)
+
+        async def handler(job):
+            if job.payload.get("fail"):
+                raise ValueError("bad input")
+
+        pool.register("plan", handler)
+        pool.start()
+        try:
+            await pool.submit("plan", "good", {})
+            await pool.submit("plan", "bad", {"fail": True})
+            jobs = await wait_until_finished(queue, ["good", "bad"])
+        finally:
+            await pool.stop()
+        events = {
+            job_id: [event.type for event in broker._history[job_id]] for job_id in ["good", "bad"]
+        }
+        return jobs, events
+
+    (good, bad), events = asyncio.run(run())
+    assert good.status == ProcessingStatus.COMPLETE
+    assert bad.status == ProcessingStatus.FAILED and bad.error == "bad input"
+    assert events["good"] == [ProgressEventType.QUEUED, ProgressEventType.STARTED, ProgressEventType.COMPLETE]
+    assert events["bad"][-1] == ProgressEventType.FAILED
+
+
+def test_each_pipeline_runs_at_most_its_concurrency():
+    async def run():
+        queue = InMemoryJobQueue()
+        pool = WorkerPool(queue, jobs_config(campaign_plan=2, creative_plan=1))
+        active = {"campaign_plan": 0, "creative_plan": 0}
+        peak = dict(active)
+
+        def handler(pipeline):
+            async def handle(job):
+                active[pipeline] += 1
+                peak[pipeline] = max(peak[pipeline], active[pipeline])
+                await asyncio.sleep(0.02)
+                active[pipeline] -= 1
+            return handle
+
+        for pipeline in active:
+            pool.register(pipeline, handler(pipeline))
+        pool.start()
+        try:
+            job_ids = []
+            for index in range(4):
+                for pipeline in active:
+                    job_ids.append(f"{pipeline}-{index}")
+                    await pool.submit(pipeline, job_ids[-1], {})
+            await wait_until_finished(queue, job_ids)
+        finally:
+            await pool.stop()
+        return peak
+
+    assert asyncio.run(run()) == {"campaign_plan": 2, "creative_plan": 1}
+
+
+def test_job_over_max_attempts_fails_without_running():
+    async def run():
+        queue = InMemoryJobQueue()
+        pool = WorkerPool(queue, jobs_config(plan=1))
+        calls = []
+
+        async def handler(job):
+            calls.append(job.id)
+
+        await queue.enqueue(Job(id="retried", pipeline="plan", payload={}))
+        for _ in range(3):
+            job = await queue.dequeue("plan", 30)
+            await pool._run(job, handler)
+            # Simulate the lease expiring before the job was marked complete
+            queue._pending["plan"].append(job.id)
+        return calls, await queue.get("retried")
+
+    calls, job = asyncio.run(run())
+    assert calls == ["retried", "retried"]
+    assert job.status == ProcessingStatus.FAILED
+    assert job.error == "Exceeded maximum number of attempts"
+
+
+class StageState(TypedDict, total=False):
+    topic: str
+    draft: str
+    final: str
+
+
+def build_graph(calls, fail_second):
+    def first(state):
+        calls.append("first")
+        return {"draft": f"draft of {state['topic']}"}
+
+    def second(state):
+        calls.append("second")
+        if fail_second:
+            fail_second.pop()
+            raise RuntimeError("worker crashed")
+        return {"final": state["draft"].upper()}
+
+    graph = StateGraph(StageState)
+    graph.add_node("first", first)
+    graph.add_node("second", second)
+    graph.set_entry_point("first")
+    graph.add_edge("first", "second")
+    graph.add_edge("second", END)
+    return graph.compile(checkpointer=MemorySaver())
+
+
+def test_retried_job_resumes_from_its_checkpoint():
+    calls = []
+    workflow = build_graph(calls, fail_second=[True])
+    handle = graph_job_handler(workflow)
+    job = Job(id="job-1", pipeline="plan", payload={"topic": "shoes"}, attempts=1)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await handle(job)
+        await handle(job.model_copy(update={"attempts": 2}))
+        return await workflow.aget_state({"configurable": {"thread_id": "job-1"}})
+
+    snapshot = asyncio.run(run())
+    # The first stage is not run again
+    assert calls == ["first", "second", "second"]
+    assert snapshot.values["final"] == "DRAFT OF SHOES"
+
+
+def test_retried_job_without_pending_nodes_starts_over():
+    calls = []
+    workflow = build_graph(calls, fail_second=[])
+    handle = graph_job_handler(workflow, ProgressBroker())
+    job = Job(id="job-2", pipeline="plan", payload={"topic": "shoes"}, attempts=1)
+
+    async def run():
+        await handle(job)
+        await handle(job.model_copy(update={"attempts": 2, "payload": {"topic": "bags"}}))
+        return await workflow.aget_state({"configurable": {"thread_id": "job-2"}})
+
+    snapshot = asyncio.run(run())
+    assert calls == ["first", "second", "first", "second"]
+    assert snapshot.values["final"] == "DRAFT OF BAGS"
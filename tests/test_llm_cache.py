@@ -0,0 +1,144 @@
+import asyncio
+import time
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain.prompts import PromptTemplate
+from campaign_planner.agents.base.process import BaseProcessNode
+from campaign_planner.utils.llm_cache import (
+    InMemoryLLMCache,
+    SQLiteLLMCache,
+    build_llm_cache,
+)
+
+CONFIG = {"configurable": {"thread_id": "thread-1"}}
+
+
+class EchoNode(BaseProcessNode):
+    """A node with a fake model; calls skip the rate limiter and are counted"""
+
+    def __init__(self, llm_cache=None, agent_name="brand_industry_classifier") -> None:
+        self.config = {}
+        self.llm = FakeListChatModel(responses=["Footwear", "Apparel"])
+        self.prompt = PromptTemplate.from_template("Classify {brand_name}: {messages}")
+        self.agent = self.prompt | self.llm
+        self.agent_name = agent_name
+        self.llm_cache = llm_cache
+        self.calls = 0
+
+    async def _call_agent(self, inputs, agent):
+        self.calls += 1
+        return await agent.ainvoke(inputs)
+
+    async def process(self, state, config):
+        return {"messages": [await self._ainvoke_agent(state, config)]}
+
+
+def conversation(message_id, call_id):
+    return [
+        HumanMessage(content="Nimbus running shoes", id=f"human-{message_id}"),
+        AIMessage(
+            content="",
+            id=f"ai-{message_id}",
+            tool_calls=[{"name": "search", "args": {"query": "shoes"}, "id": call_id}],
+        ),
+        ToolMessage(content="Footwear", tool_call_id=call_id, id=f"tool-{message_id}"),
+    ]
+
+
+def test_key_ignores_message_and_tool_call_ids():
+    node = EchoNode()
+    first = node._cache_key({"brand_name": "Nimbus", "messages": conversation(1, "call_a")}, node.agent)
+    second = node._cache_key({"brand_name": "Nimbus", "messages": conversation(2, "call_b")}, node.agent)
+    other = node._cache_key({"brand_name": "Acme", "messages": conversation(1, "call_a")}, node.agent)
+    assert first == second
+    assert first != other
+
+
+def test_key_depends_on_bound_model_parameters():
+    node = EchoNode()
+    inputs = {"brand_name": "Nimbus", "messages": []}
+
+    def bound(names):
+        return node.prompt | node.llm.bind(response_format={"enum": names})
+
+    assert node._cache_key(inputs, bound(["Footwear"])) == node._cache_key(inputs, bound(["Footwear"]))
+    assert node._cache_key(inputs, bound(["Footwear"])) != node._cache_key(inputs, bound(["Apparel"]))
+    assert node._cache_key(inputs, bound(["Footwear"])) != node._cache_key(inputs, node.agent)
+
+
+def test_repeated_call_is_answered_from_the_cache():
+    node = EchoNode(InMemoryLLMCache())
+    state = {"brand_name": "Nimbus", "messages": conversation(1, "call_a")}
+
+    async def run():
+        first = await node._ainvoke_agent(state, CONFIG)
+        second = await node._ainvoke_agent(
+            state | {"messages": conversation(2, "call_b")}, CONFIG
+        )
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert node.calls == 1
+    assert isinstance(second, AIMessage)
+    assert second.content == first.content == "Footwear"
+    # Cached messages get a fresh id from the graph
+    assert second.id is None
+
+
+def test_agents_can_opt_out():
+    cache = InMemoryLLMCache(disabled_agents=["campaign_name_generator"])
+    node = EchoNode(cache, agent_name="campaign_name_generator")
+    state = {"brand_name": "Nimbus", "messages": []}
+
+    async def run():
+        return [await node._ainvoke_agent(state, CONFIG) for _ in range(2)]
+
+    assert [message.content for message in asyncio.run(run())] == ["Footwear", "Apparel"]
+    assert node.calls == 2
+    assert cache._entries == {}
+
+
+def test_in_memory_entries_expire_and_are_bounded():
+    async def run():
+        expiring = InMemoryLLMCache(ttl_seconds=0.01)
+        await expiring.aset("key", {"content": "Footwear"})
+        fresh = await expiring.aget("key")
+        await asyncio.sleep(0.02)
+        expired = await expiring.aget("key")
+
+        bounded = InMemoryLLMCache(max_entries=2)
+        for key in ["a", "b", "c"]:
+            await bounded.aset(key, {"content": key})
+        return fresh, expired, [await bounded.aget(key) for key in ["a", "b", "c"]]
+
+    fresh, expired, bounded = asyncio.run(run())
+    assert fresh == {"content": "Footwear"}
+    assert expired is None
+    assert bounded == [None, {"content": "b"}, {"content": "c"}]
+
+
+def test_sqlite_entries_persist_and_expire(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite3")
+
+    async def run():
+        await SQLiteLLMCache(path).aset("kept", {"content": "Footwear"})
+        await SQLiteLLMCache(path, ttl_seconds=0.01).aset("expiring", {"content": "Apparel"})
+        time.sleep(0.02)
+        reopened = SQLiteLLMCache(path)
+        return await reopened.aget("kept"), await reopened.aget("expiring"), await reopened.aget("missing")
+
+    assert asyncio.run(run()) == ({"content": "Footwear"}, None, None)
+
+
+def test_backend_selection(tmp_path):
+    def config(**section):
+        return {"LLM_CACHE": {"ENABLED": True, **section}, "db_pool": None}
+
+    assert build_llm_cache({"LLM_CACHE": {"ENABLED": False}}) is None
+    # Without a database pool, as in debug mode
+    assert isinstance(build_llm_cache(config(BACKEND="postgres")), InMemoryLLMCache)
+    sqlite_cache = build_llm_cache(
+        config(BACKEND="sqlite", SQLITE_PATH=str(tmp_path / "cache.sqlite3"), TTL_SECONDS=60)
+    )
+    assert isinstance(sqlite_cache, SQLiteLLMCache)
+    assert sqlite_cache.ttl_seconds == 60
@@ -0,0 +1,176 @@
+import asyncio
+import threading
+import numpy as np
+import pytest
+from PIL import Image
+from creative_planner.agents.mask_generator import inference
+from creative_planner.agents.mask_generator.backends import MaskBackend, MaskModelSpec, mask_iou
+from creative_planner.agents.mask_generator.inference import MaskInferenceExecutor
+from creative_planner.utils.error_handler import NyxAIException
+
+OPTIONS = {"MODEL_NAME": "stub/clipseg", "MAX_WORKERS": 1, "MAX_WAIT_MS": 50}
+
+
+class StubProcessor:
+    def __call__(self, text, images, padding, return_tensors):
+        return {"text": text, "images": images}
+
+
+class StubBackend(MaskBackend):
+    """Masks the black pixels of an image; a batch can be held or made to fail"""
+
+    def __init__(self) -> None:
+        super().__init__(MaskModelSpec.from_options(OPTIONS))
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+        self.error = None
+
+    def predict(self, inputs):
+        self.batches.append(len(inputs["images"]))
+        self.release.wait(timeout=2)
+        if self.error is not None:
+            raise self.error
+        return np.stack([
+            np.where(np.asarray(image.convert("L").resize((4, 4))) > 0, 10.0, -10.0)
+            for image in inputs["images"]
+        ])
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = StubBackend()
+    # No torch: workers skip their setup and use the stub as the loaded model
+    monkeypatch.setattr(inference, "_init_worker", lambda *args: None)
+    monkeypatch.setitem(inference._models, backend.spec, (StubProcessor(), backend))
+    return backend
+
+
+def executor(**options):
+    return MaskInferenceExecutor({**OPTIONS, **options})
+
+
+def test_concurrent_masks_are_batched_up_to_the_maximum(backend):
+    async def run():
+        masks = executor(MAX_BATCH_SIZE=3)
+        try:
+            return await asyncio.gather(*[
+                masks.generate_mask(Image.new("RGB", (8, 8)), 0.5) for _ in range(5)
+            ])
+        finally:
+            masks.shutdown()
+
+    assert len(asyncio.run(run())) == 5
+    assert backend.batches == [3, 2]
+
+
+def test_each_caller_gets_its_own_mask(backend):
+    async def run():
+        masks = executor()
+        try:
+            return await asyncio.gather(
+                masks.generate_mask(Image.new("RGB", (8, 8), (0, 0, 0)), 0.5),
+                masks.generate_mask(Image.new("RGB", (6, 4), (255, 255, 255)), 0.5),
+            )
+        finally:
+            masks.shutdown()
+
+    black, white = asyncio.run(run())
+    assert backend.batches == [2]
+    assert (black.mode, black.size, black.getpixel((0, 0))) == ("L", (8, 8), 255)
+    assert (white.mode, white.size, white.getpixel((0, 0))) == ("L", (6, 4), 0)
+
+
+def test_failed_batch_reaches_every_caller(backend):
+    backend.error = RuntimeError("out of memory")
+
+    async def run():
+        masks = executor()
+        try:
+            return await asyncio.gather(
+                *[masks.generate_mask(Image.new("RGB", (8, 8)), 0.5) for _ in range(3)],
+                return_exceptions=True,
+            )
+        finally:
+            masks.shutdown()
+
+    errors = asyncio.run(run())
+    assert backend.batches == [3]
+    assert [error.internal_code for error in errors] == [7104] * 3
+
+
+def test_full_queue_rejects_new_masks(backend):
+    backend.release.clear()
+
+    async def run():
+        masks = executor(MAX_BATCH_SIZE=1, MAX_QUEUE=0, QUEUE_TIMEOUT_SECONDS=0.01)
+        try:
+            admitted = asyncio.create_task(masks.generate_mask(Image.new("RGB", (8, 8)), 0.5))
+            await asyncio.sleep(0.01)
+            with pytest.raises(NyxAIException) as error:
+                await masks.generate_mask(Image.new("RGB", (8, 8)), 0.5)
+            backend.release.set()
+            await admitted
+            return error.value
+        finally:
+            backend.release.set()
+            masks.shutdown()
+
+    error = asyncio.run(run())
+    assert error.internal_code == 7112
+    assert error.http_status_code == 503
+
+
+def test_cancelled_masks_are_not_computed(backend):
+    backend.release.clear()
+
+    async def run():
+        masks = executor(MAX_BATCH_SIZE=4)
+        try:
+            running = asyncio.create_task(masks.generate_mask(Image.new("RGB", (8, 8)), 0.5))
+            await asyncio.sleep(0.1)
+            # Queued while the only worker is busy
+            cancelled = asyncio.create_task(masks.generate_mask(Image.new("RGB", (8, 8)), 0.5))
+            waiting = asyncio.create_task(masks.generate_mask(Image.new("RGB", (8, 8)), 0.5))
+            await asyncio.sleep(0.01)
+            cancelled.cancel()
+            backend.release.set()
+            await asyncio.gather(running, waiting)
+        finally:
+            backend.release.set()
+            masks.shutdown()
+
+    asyncio.run(run())
+    assert backend.batches == [1, 1]
+
+
+def test_shutdown_fails_queued_masks(backend):
+    backend.release.clear()
+
+    async def run():
+        masks = executor()
+        try:
+            running = asyncio.create_task(masks.generate_mask(Image.new("RGB", (8, 8)), 0.5))
+            await asyncio.sleep(0.1)
+            queued = asyncio.create_task(masks.generate_mask(Image.new("RGB", (8, 8)), 0.5))
+            await asyncio.sleep(0.01)
+            masks.shutdown()
+            with pytest.raises(NyxAIException) as error:
+                await asyncio.wait_for(queued, 1)
+            running.cancel()
+            return error.value
+        finally:
+            backend.release.set()
+
+    assert asyncio.run(run()).internal_code == 7104
+
+
+def test_mask_iou():
+    empty = np.zeros((4, 4), dtype=np.uint8)
+    full = np.ones((4, 4), dtype=np.uint8)
+    half = np.vstack([np.ones((2, 4)), np.zeros((2, 4))])
+
+    assert mask_iou(empty, empty) == 1.0
+    assert mask_iou(empty, full) == 0.0
+    assert mask_iou(full, full) == 1.0
+    assert mask_iou(half, full) == 0.5
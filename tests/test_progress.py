@@ -0,0 +1,161 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+import main
+from campaign_planner.utils.jobs import InMemoryJobQueue, Job, ProcessingStatus
+from campaign_planner.utils.progress import (
+    ProgressBroker,
+    ProgressEvent,
+    ProgressEventType,
+    format_sse,
+)
+
+
+def event(request_id, event_type, **fields):
+    return ProgressEvent(request_id=request_id, type=event_type, **fields)
+
+
+async def collect(subscription, limit=10):
+    events = []
+    async for item in subscription:
+        events.append(item)
+        if len(events) == limit:
+            break
+    return events
+
+
+def test_late_subscriber_gets_the_history_and_stops_at_the_end():
+    async def run():
+        broker = ProgressBroker()
+        await broker.publish(event("job-1", ProgressEventType.QUEUED))
+        await broker.publish(event("job-1", ProgressEventType.NODE_START, node="first"))
+        subscription = asyncio.create_task(collect(broker.subscribe("job-1", idle_seconds=1)))
+        await asyncio.sleep(0.01)
+        await broker.publish(event("job-2", ProgressEventType.QUEUED))
+        await broker.publish(event("job-1", ProgressEventType.COMPLETE))
+        return await subscription, broker._subscribers
+
+    events, subscribers = asyncio.run(run())
+    assert [item.type for item in events] == [
+        ProgressEventType.QUEUED,
+        ProgressEventType.NODE_START,
+        ProgressEventType.COMPLETE,
+    ]
+    assert subscribers == {}
+
+
+def test_idle_subscription_yields_keepalives():
+    async def run():
+        broker = ProgressBroker()
+        return await collect(broker.subscribe("job-1", idle_seconds=0.01), limit=2)
+
+    assert asyncio.run(run()) == [None, None]
+
+
+def test_history_of_idle_jobs_expires():
+    async def run():
+        broker = ProgressBroker(history_seconds=0.01)
+        await broker.publish(event("done", ProgressEventType.COMPLETE))
+        followed = broker.subscribe("followed", idle_seconds=1)
+        await broker.publish(event("followed", ProgressEventType.QUEUED))
+        first = await followed.__anext__()
+        time.sleep(0.02)
+        await broker.publish(event("new", ProgressEventType.QUEUED))
+        history = set(broker._history)
+        await followed.aclose()
+        return first, history
+
+    first, history = asyncio.run(run())
+    assert first.type == ProgressEventType.QUEUED
+    # Jobs with subscribers keep their history
+    assert history == {"followed", "new"}
+
+
+def test_format_sse():
+    assert format_sse("status", '{"a": 1}') == 'event: status\ndata: {"a": 1}\n\n'
+
+
+class Result(BaseModel):
+    answer: str
+
+
+class StubWorkflow:
+    async def aget_state(self, config):
+        return SimpleNamespace(values={"answer": config["configurable"]["thread_id"]})
+
+
+async def build_result(values):
+    return Result(answer=values["answer"])
+
+
+@pytest.fixture
+def api(monkeypatch):
+    queue = InMemoryJobQueue()
+    broker = ProgressBroker()
+    monkeypatch.setattr(main, "worker_pool", SimpleNamespace(queue=queue))
+    monkeypatch.setattr(main, "progress_broker", broker)
+    monkeypatch.setattr(main, "config", {"PROGRESS": {"KEEPALIVE_SECONDS": 0.01}})
+    return queue, broker
+
+
+async def stream(request_id):
+    response = await main.stream_job_progress(request_id, StubWorkflow(), build_result)
+    assert response.media_type == "text/event-stream"
+    return [chunk async for chunk in response.body_iterator]
+
+
+def test_stream_of_a_running_job(api):
+    queue, broker = api
+
+    async def run():
+        await queue.enqueue(Job(id="job-1", pipeline="plan", payload={}))
+        await broker.publish(event("job-1", ProgressEventType.QUEUED))
+
+        async def work():
+            await asyncio.sleep(0.03)
+            await broker.publish(event("job-1", ProgressEventType.NODE_FINISH, node="first"))
+            await broker.publish(event("job-1", ProgressEventType.COMPLETE))
+
+        worker = asyncio.create_task(work())
+        chunks = await stream("job-1")
+        await worker
+        return chunks
+
+    chunks = asyncio.run(run())
+    assert chunks[0] == format_sse("status", json.dumps({"processing_status": "QUEUED"}))
+    assert chunks[1].startswith("event: queued\n")
+    assert ": keepalive\n\n" in chunks
+    events = [chunk for chunk in chunks if chunk.startswith("event:")]
+    assert [chunk.split("\n")[0] for chunk in events[1:]] == [
+        "event: queued",
+        "event: node_finish",
+        "event: complete",
+        "event: result",
+    ]
+    assert events[-1] == format_sse("result", Result(answer="job-1").model_dump_json())
+
+
+def test_stream_of_a_finished_job(api):
+    queue, _ = api
+
+    async def run():
+        await queue.enqueue(Job(id="done", pipeline="plan", payload={}))
+        await queue.mark_complete("done")
+        await queue.enqueue(Job(id="broken", pipeline="plan", payload={}))
+        await queue.mark_failed("broken", "no budget")
+        return await stream("done"), await stream("broken")
+
+    done, broken = asyncio.run(run())
+    assert [chunk.split("\n")[0] for chunk in done] == ["event: status", "event: complete", "event: result"]
+    assert [chunk.split("\n")[0] for chunk in broken] == ["event: status", "event: failed"]
+    assert '"error": "no budget"' in broken[1]
+
+
+def test_stream_of_an_unknown_job(api):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(main.stream_job_progress("missing", StubWorkflow(), build_result))
+    assert error.value.status_code == 404
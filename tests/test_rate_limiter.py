@@ -0,0 +1,122 @@
+import asyncio
+import httpx
+import openai
+import pytest
+from campaign_planner.utils import rate_limiter as rate_limiter_module
+from campaign_planner.utils.rate_limiter import Priority, RateLimiter, llm_priority
+
+OPTIONS = {"DEFAULT_OUTPUT_TOKENS": 10, "MAX_RETRIES": 2, "BACKOFF_SECONDS": 0}
+
+
+def limiter(requests=6000, tokens=1_000_000, concurrency=2) -> RateLimiter:
+    limits = {
+        "REQUESTS_PER_MINUTE": requests,
+        "TOKENS_PER_MINUTE": tokens,
+        "MAX_CONCURRENCY": concurrency,
+    }
+    return RateLimiter("gpt-4o", limits, OPTIONS)
+
+
+@pytest.fixture(autouse=True)
+def word_count_tokens(monkeypatch):
+    # The tiktoken encodings are downloaded on first use
+    monkeypatch.setattr(rate_limiter_module, "estimate_tokens", lambda prompt, model: len(str(prompt).split()))
+
+
+def test_concurrency_is_capped():
+    async def run():
+        rate_limiter = limiter(concurrency=2)
+        active = peak = 0
+
+        async def call():
+            nonlocal active, peak
+            async with rate_limiter.acquire(1):
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        await asyncio.gather(*(call() for _ in range(6)))
+        return peak
+
+    assert asyncio.run(run()) == 2
+
+
+def test_waiters_are_admitted_by_priority():
+    async def run():
+        rate_limiter = limiter(concurrency=1)
+        order = []
+        release = asyncio.Event()
+
+        async def call(name, priority):
+            llm_priority.set(priority)
+            async with rate_limiter.acquire(1):
+                order.append(name)
+                if name == "first":
+                    await release.wait()
+
+        first = asyncio.create_task(call("first", Priority.BACKGROUND))
+        await asyncio.sleep(0)
+        others = [
+            asyncio.create_task(call("background", Priority.BACKGROUND)),
+            asyncio.create_task(call("interactive", Priority.INTERACTIVE)),
+        ]
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(first, *others)
+        return order
+
+    assert asyncio.run(run()) == ["first", "interactive", "background"]
+
+
+def test_unused_tokens_are_returned_to_the_budget():
+    async def run():
+        rate_limiter = limiter(tokens=1000)
+        async with rate_limiter.acquire(600) as lease:
+            lease.used_tokens = 100
+        return rate_limiter._budget_tokens
+
+    assert asyncio.run(run()) >= 900
+
+
+def test_token_budget_delays_admission():
+    async def run():
+        # 6000 tokens per minute refill at 100 per second
+        rate_limiter = limiter(tokens=6000)
+        async with rate_limiter.acquire(6000):
+            pass
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        async with rate_limiter.acquire(5):
+            pass
+        return loop.time() - started_at
+
+    assert asyncio.run(run()) >= 0.03
+
+
+class FlakyModel:
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.calls = 0
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+            response = httpx.Response(429, headers={"retry-after": "0"}, request=request)
+            raise openai.RateLimitError("rate limited", response=response, body=None)
+        return f"answer to {inputs}"
+
+
+def test_rate_limited_calls_are_retried():
+    model = FlakyModel(failures=2)
+    result = asyncio.run(limiter().ainvoke(model, "prompt"))
+    assert result == "answer to prompt"
+    assert model.calls == 3
+
+
+def test_retries_are_bounded():
+    model = FlakyModel(failures=5)
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(limiter().ainvoke(model, "prompt"))
+    assert model.calls == OPTIONS["MAX_RETRIES"] + 1
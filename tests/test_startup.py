@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+import pytest
+from campaign_planner.utils.startup import StartupOrchestrator
+
+
+def test_components_start_after_their_dependencies():
+    order = []
+
+    def factory(name, delay=0.0):
+        async def build():
+            await asyncio.sleep(delay)
+            order.append(name)
+            return name
+        return build
+
+    orchestrator = (
+        StartupOrchestrator()
+        .add("graphs", factory("graphs"), depends_on=["retriever", "models"])
+        .add("retriever", factory("retriever", 0.02), depends_on=["models"])
+        .add("models", factory("models", 0.02))
+    )
+    components = asyncio.run(orchestrator.run())
+
+    assert order == ["models", "retriever", "graphs"]
+    assert components == {"graphs": "graphs", "retriever": "retriever", "models": "models"}
+    assert set(orchestrator.timings) == {"graphs", "retriever", "models", "total"}
+
+
+def test_independent_components_start_concurrently():
+    async def slow():
+        await asyncio.sleep(0.1)
+
+    def blocking():
+        time.sleep(0.1)
+        return threading.current_thread() is threading.main_thread()
+
+    orchestrator = StartupOrchestrator().add("first", slow).add("second", slow).add("third", blocking)
+    started_at = time.perf_counter()
+    components = asyncio.run(orchestrator.run())
+
+    assert time.perf_counter() - started_at < 0.25
+    # Synchronous factories run off the event loop
+    assert components["third"] is False
+
+
+def test_unknown_dependency_is_rejected():
+    orchestrator = StartupOrchestrator().add("graphs", lambda: None, depends_on=["retriever"])
+    with pytest.raises(ValueError, match="unknown components \\['retriever'\\]"):
+        asyncio.run(orchestrator.run())
+
+
+def test_dependency_cycle_is_rejected():
+    orchestrator = (
+        StartupOrchestrator()
+        .add("first", lambda: None, depends_on=["second"])
+        .add("second", lambda: None, depends_on=["first"])
+    )
+    with pytest.raises(ValueError, match="depend on each other"):
+        asyncio.run(orchestrator.run())
+
+
+def test_failed_optional_component_produces_none():
+    def fail():
+        raise RuntimeError("mask model unavailable")
+
+    orchestrator = (
+        StartupOrchestrator()
+        .add("mask_model", fail, required=False)
+        .add("graphs", lambda: "graphs", depends_on=["mask_model"])
+    )
+    assert asyncio.run(orchestrator.run()) == {"mask_model": None, "graphs": "graphs"}
+
+
+def test_failed_required_component_aborts_startup():
+    cancelled = asyncio.Event()
+
+    async def fail():
+        raise RuntimeError("no database")
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    orchestrator = StartupOrchestrator().add("database", fail).add("retriever", slow)
+
+    async def run():
+        with pytest.raises(RuntimeError, match="no database"):
+            await orchestrator.run()
+        await asyncio.sleep(0)
+        return cancelled.is_set()
+
+    assert asyncio.run(run())
@@ -0,0 +1,279 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlparse
+import pytest
+from creative_planner.utils import storage
+from creative_planner.utils.error_handler import NyxAIException
+from creative_planner.utils.storage import (
+    AZURE_SAS_EXPIRATION_SECONDS,
+    AzureBackend,
+    GCSBackend,
+    StorageBackend,
+)
+
+
+class SigningBackend(StorageBackend):
+    """Signs URLs with a counter, so every new signature is visible"""
+
+    name = "SIGNING"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.signed = []
+
+    async def upload(self, data: bytes, blob_name: str) -> str:
+        return f"signing://{blob_name}"
+
+    async def download(self, blob_name: str) -> bytes:
+        return b""
+
+    async def delete_prefix(self, prefix: str) -> None:
+        pass
+
+    async def generate_signed_url(self, blob_name: str, expiration_time: int) -> str:
+        self.signed.append((blob_name, expiration_time))
+        return f"signing://{blob_name}?signature={len(self.signed)}"
+
+
+def test_sign_blob_returns_the_expiry():
+    backend = SigningBackend()
+    before = time.time()
+    url, expires_at = asyncio.run(backend.sign_blob("creative.jpeg", 600))
+    assert url == "signing://creative.jpeg?signature=1"
+    assert before + 600 <= expires_at <= time.time() + 600
+
+
+def test_fresh_signed_url_is_returned_as_is():
+    backend = SigningBackend()
+    url = asyncio.run(
+        backend.get_fresh_signed_url(
+            "creative.jpeg", "signing://stored", time.time() + 1000, refresh_margin=300
+        )
+    )
+    assert url == "signing://stored"
+    assert backend.signed == []
+
+
+def test_expiring_url_is_re_signed_once_and_reused():
+    backend = SigningBackend()
+
+    async def run():
+        expiring = time.time() + 100
+        return [
+            await backend.get_fresh_signed_url(
+                "creative.jpeg", "signing://stored", expiring, expiration_time=3600, refresh_margin=300
+            )
+            for _ in range(3)
+        ]
+
+    assert asyncio.run(run()) == ["signing://creative.jpeg?signature=1"] * 3
+    assert backend.signed == [("creative.jpeg", 3600)]
+
+
+def test_expired_cache_entries_are_dropped():
+    backend = SigningBackend()
+    backend._signed_urls["old.jpeg"] = ("signing://old.jpeg", time.time() - 1)
+    asyncio.run(backend.get_fresh_signed_url("creative.jpeg"))
+    assert set(backend._signed_urls) == {"creative.jpeg"}
+
+
+class FakeBlob:
+    def __init__(self, bucket, name) -> None:
+        self.bucket = bucket
+        self.name = name
+
+    def upload_from_string(self, data):
+        self.bucket.threads.append(threading.current_thread().name)
+        if self.name.endswith("broken"):
+            raise RuntimeError("quota exceeded")
+        self.bucket.blobs[self.name] = data
+
+    def download_as_bytes(self):
+        self.bucket.threads.append(threading.current_thread().name)
+        return self.bucket.blobs[self.name]
+
+    def generate_signed_url(self, version, expiration, method):
+        return f"https://storage.test/{self.name}?expires={expiration}&version={version}"
+
+
+class FakeBucket:
+    def __init__(self) -> None:
+        self.blobs = {}
+        self.threads = []
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+    def delete_blobs(self, blobs, on_error):
+        for blob in blobs:
+            del self.blobs[blob.name]
+
+
+class FakeGCSClient:
+    def __init__(self, project, credentials) -> None:
+        self.bucket_handle = FakeBucket()
+        self.closed = False
+
+    def bucket(self, name):
+        return self.bucket_handle
+
+    def list_blobs(self, bucket, prefix):
+        return [FakeBlob(bucket, name) for name in list(bucket.blobs) if name.startswith(prefix)]
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def gcs(monkeypatch):
+    monkeypatch.setenv("BRAND_GCP_BUCKET_NAME", "creatives")
+    monkeypatch.setattr(storage, "get_gcp_credentials", lambda: {"project_id": "nyx"})
+    monkeypatch.setattr(
+        storage.service_account.Credentials, "from_service_account_info", lambda info: "credentials"
+    )
+    monkeypatch.setattr(storage.storage, "Client", FakeGCSClient)
+    return GCSBackend({"MAX_WORKERS": 2})
+
+
+def test_gcs_calls_run_in_the_thread_pool(gcs):
+    async def run():
+        url = await gcs.upload(b"image", "image_gen_agents/req-1/output.jpeg")
+        data = await gcs.download("image_gen_agents/req-1/output.jpeg")
+        signed_url = await gcs.generate_signed_url("image_gen_agents/req-1/output.jpeg", 600)
+        await gcs.aclose()
+        return url, data, signed_url
+
+    url, data, signed_url = asyncio.run(run())
+    assert url == "https://storage.googleapis.com/creatives/image_gen_agents/req-1/output.jpeg"
+    assert data == b"image"
+    assert signed_url.endswith("?expires=600&version=v4")
+    assert all(name.startswith("gcs") for name in gcs.bucket.threads)
+    assert gcs.client.closed
+
+
+def test_gcs_errors_are_reported_with_their_codes(gcs):
+    async def run():
+        errors = []
+        for call in (gcs.upload(b"image", "broken"), gcs.download("missing")):
+            with pytest.raises(NyxAIException) as error:
+                await call
+            errors.append(error.value.internal_code)
+        return errors
+
+    assert asyncio.run(run()) == [2010, 2014]
+
+
+def test_gcs_deletes_blobs_under_a_prefix(gcs):
+    async def run():
+        for name in ["artifacts/req-1/image", "artifacts/req-1/mask", "artifacts/req-10/image"]:
+            await gcs.upload(b"image", name)
+        await gcs.delete_prefix("artifacts/req-1/")
+
+    asyncio.run(run())
+    assert set(gcs.bucket.blobs) == {"artifacts/req-10/image"}
+
+
+class FakeDownload:
+    def __init__(self, data) -> None:
+        self.data = data
+
+    async def readall(self):
+        return self.data
+
+
+class FakeBlobProperties:
+    def __init__(self, name) -> None:
+        self.name = name
+
+
+class FakeContainer:
+    def __init__(self) -> None:
+        self.blobs = {}
+        self.deleted_batches = []
+
+    async def upload_blob(self, name, data, overwrite):
+        assert overwrite
+        self.blobs[name] = data
+
+    async def download_blob(self, name):
+        if name not in self.blobs:
+            raise KeyError(name)
+        return FakeDownload(self.blobs[name])
+
+    async def list_blobs(self, name_starts_with):
+        for name in list(self.blobs):
+            if name.startswith(name_starts_with):
+                yield FakeBlobProperties(name)
+
+    async def delete_blobs(self, *names, raise_on_any_failure):
+        self.deleted_batches.append(len(names))
+        for name in names:
+            del self.blobs[name]
+
+
+class FakeBlobServiceClient:
+    def __init__(self) -> None:
+        self.container = FakeContainer()
+        self.closed = False
+
+    def get_container_client(self, name):
+        return self.container
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def azure(monkeypatch):
+    monkeypatch.setenv("AZURE_STORAGE_ACCOUNT", "nyx")
+    monkeypatch.setenv("AZURE_CONTAINER_NAME", "creatives")
+    monkeypatch.setenv("AZURE_STORAGE_CONNECTION_STRING", "UseDevelopmentStorage=true")
+    monkeypatch.setenv("AZURE_STORAGE_KEY", "c2VjcmV0LWFjY291bnQta2V5")
+    monkeypatch.setattr(
+        storage.BlobServiceClient, "from_connection_string", lambda connection_string: FakeBlobServiceClient()
+    )
+    return AzureBackend({})
+
+
+def test_azure_uses_the_async_client(azure):
+    async def run():
+        url = await azure.upload(b"image", "image_gen_agents/req-1/output.jpeg")
+        data = await azure.download("image_gen_agents/req-1/output.jpeg")
+        with pytest.raises(NyxAIException) as error:
+            await azure.download("missing")
+        await azure.aclose()
+        return url, data, error.value.internal_code
+
+    url, data, code = asyncio.run(run())
+    assert url == "https://nyx.blob.core.windows.net/creatives/image_gen_agents/req-1/output.jpeg"
+    assert data == b"image"
+    assert code == 3004
+    assert azure.service_client.closed
+
+
+def test_azure_sas_urls_last_thirty_days(azure):
+    before = time.time()
+    url, expires_at = asyncio.run(azure.sign_blob("image_gen_agents/req-1/output.jpeg", 600))
+
+    query = parse_qs(urlparse(url).query)
+    expiry = datetime.strptime(query["se"][0], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+    assert query["sp"] == ["r"]
+    # The requested lifetime is ignored, and the recorded expiry matches the token's
+    assert abs(expiry.timestamp() - (before + AZURE_SAS_EXPIRATION_SECONDS)) < 5
+    assert before + AZURE_SAS_EXPIRATION_SECONDS <= expires_at <= expiry.timestamp() + 1
+
+
+def test_azure_deletes_blobs_under_a_prefix_in_batches(azure, monkeypatch):
+    monkeypatch.setattr(storage, "AZURE_DELETE_BATCH_SIZE", 2)
+
+    async def run():
+        for index in range(5):
+            await azure.upload(b"image", f"artifacts/req-1/image_{index}")
+        await azure.upload(b"image", "artifacts/req-10/image")
+        await azure.delete_prefix("artifacts/req-1/")
+
+    asyncio.run(run())
+    assert set(azure.container_client.blobs) == {"artifacts/req-10/image"}
+    assert azure.container_client.deleted_batches == [2, 2, 1]
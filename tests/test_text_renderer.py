@@ -0,0 +1,57 @@
+import numpy as np
+from PIL import Image
+from creative_planner.agents.text_layering.renderer import (
+    TextOverlayRenderer,
+    contrast_ratio,
+    largest_free_box,
+)
+
+
+def test_largest_free_box_finds_the_free_rectangle():
+    free = np.zeros((64, 64), dtype=bool)
+    free[8:40, 16:48] = True
+    # A smaller free patch elsewhere is ignored
+    free[50:60, 0:10] = True
+    assert largest_free_box(free, columns=64) == (16, 8, 48, 40)
+
+
+def test_largest_free_box_works_on_grid_cells():
+    free = np.ones((100, 200), dtype=bool)
+    # One busy pixel makes its whole 10 x 10 cell busy
+    free[0, 105] = False
+    assert largest_free_box(free, columns=20) == (0, 10, 200, 100)
+
+
+def test_largest_free_box_without_free_space():
+    assert largest_free_box(np.zeros((64, 64), dtype=bool)) is None
+    assert largest_free_box(np.ones((0, 64), dtype=bool)) is None
+
+
+def test_fit_uses_the_largest_size_that_fits():
+    renderer = TextOverlayRenderer({"MIN_FONT_SIZE": 8, "MAX_FONT_SIZE": 200})
+    box = (0, 0, 600, 300)
+    blocks, gap = renderer._fit("Discover your glow", "Organic skincare", "Shop Now", box)
+
+    height = sum(block.height for block in blocks) + gap * (len(blocks) - 1)
+    assert height <= 300
+    assert all(block.width <= 600 for block in blocks)
+    larger, _ = renderer._fit("Discover your glow", "Organic skincare", "Shop Now", (0, 0, 1200, 600))
+    assert larger[0].font.size > blocks[0].font.size
+
+
+def test_fit_overflows_at_the_minimum_size_when_nothing_fits():
+    renderer = TextOverlayRenderer({"MIN_FONT_SIZE": 14})
+    blocks, gap = renderer._fit("Headline", "", "", (0, 0, 5, 5))
+    assert blocks[0].font.size == 14
+    assert gap == 7
+
+
+def test_render_keeps_text_in_contrast():
+    image = Image.new("RGB", (320, 240), (250, 250, 250))
+    mask = Image.new("L", (320, 240), 0)
+    output = TextOverlayRenderer({}).render(image, mask, "Headline", "Sub", "Go")
+
+    assert output.size == image.size
+    assert image.getpixel((0, 0)) == (250, 250, 250)
+    darkest = min(output.getdata(), key=sum)
+    assert contrast_ratio(darkest, (250, 250, 250)) > 4.5
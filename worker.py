@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import os
+from dotenv import load_dotenv
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from psycopg_pool import AsyncConnectionPool
+from campaign_planner.utils import (
+    load_config,
+    build_llm_cache,
+    PostgresJobQueue,
+    PostgresProgressBroker,
+)
+from creative_planner.utils.logging_config import configure_logging
+from app_setup import (
+    CAMPAIGN_PIPELINE,
+    CREATIVE_PIPELINE,
+    build_startup,
+    build_worker_pool,
+    close_shared_clients,
+    get_database_url,
+)
+
+# Configure logging
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+
+async def run_worker() -> None:
+    """
+    Run queued campaign and creative plans outside the API process.
+
+    Start any number of these next to API instances configured with
+    JOBS.RUN_WORKERS_IN_API set to False; they share the Postgres job queue.
+    """
+    config = load_config()
+    config["LOG_LEVEL"] = os.getenv("LOG_LEVEL", "INFO")
+
+    async with AsyncConnectionPool(
+        get_database_url(),
+        kwargs={"autocommit": True},
+        max_size=20,
+    ) as pool:
+        checkpointer = AsyncPostgresSaver(pool)
+        config["checkpointer"] = checkpointer
+        config["db_pool"] = pool
+        config["llm_cache"] = build_llm_cache(config)
+        job_queue = PostgresJobQueue(pool)
+
+        # Workers only publish progress; the API processes listen for it
+        progress_broker = PostgresProgressBroker(pool, get_database_url())
+
+        orchestrator = build_startup(config, include_objective=False)
+        orchestrator.add("checkpointer", checkpointer.setup)
+        if config["llm_cache"] is not None:
+            orchestrator.add("llm_cache", config["llm_cache"].setup)
+        orchestrator.add("job_queue", job_queue.setup)
+        components = await orchestrator.run()
+
+        worker_pool = build_worker_pool(
+            config,
+            job_queue,
+            progress_broker,
+            components[CAMPAIGN_PIPELINE],
+            components[CREATIVE_PIPELINE],
+        )
+        logger.info("Worker initialized successfully")
+        try:
+            await worker_pool.run_forever()
+        finally:
+            await close_shared_clients(config)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())